@@ -1,38 +1,138 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-import  requests
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from starlette.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
-from typing import List
-import uuid
+from typing import List, Optional
 from datetime import datetime
-from utils.config import SUPABASE_URL, SUPABASE_KEY, bcrypt_context
-from Anfitriao.dto.CreateAnfitriao import AnfitriaoCreate, AnfitriaoUpdate
+from utils.config import SUPABASE_URL, PAGINATION_MAX_LIMIT, PERFIL_AVALIACOES, PERFIL_PERGUNTAS
+from utils.supabase_client import supabase, HEADERS, HEADERS_MINIMAL
+from utils.http_cache import CACHE_PUBLICO
+from utils.prazos import PRAZO_LOTES
+from utils.compressao import COMPRESSAO_LISTAS
+from utils.storage import upload_imagens, remover_objetos, public_urls, todos_os_caminhos
+from utils.pagination import Pagina, fetch_page
+from utils.projecao import Projecao, Retorno
+from utils.ids import in_filter, parse_ids, buscar_por_ids
+from utils.lote import verificar_lote, resultados_por_id
+from utils.cache import anfitrioes_cache
+from Anfitriao import perfil
+from Avaliacao import resumo
+from Reserva.disponibilidade import periodos_lotados
+from Anfitriao.dto.CreateAnfitriao import AnfitriaoCreate, AnfitriaoUpdate, AnfitriaoStatusLote
 
 anfitriao_router = APIRouter(prefix='/anfitrioes', tags=['anfitriao'])
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
+# Join anfitrioes com usuarios para retornar dados completos
+CAMPOS_USUARIO = "id_usuario,nome,email,telefone,cidade,bairro,cep,logradouro,numero,uf,complemento"
+EMBED_USUARIO = f"usuarios({CAMPOS_USUARIO})"
+SELECT_COM_USUARIO = f"*,{EMBED_USUARIO}"
 
-@anfitriao_router.get("/", status_code=HTTP_200_OK)
-def get_anfitrioes():
-    """Retorna todos os anfitriões com dados do usuário"""
-    # Join anfitrioes com usuarios para retornar dados completos
-    url = f"{SUPABASE_URL}/rest/v1/anfitrioes?select=*,usuarios(id_usuario,nome,email,telefone,cidade,bairro,cep,logradouro,numero,uf,complemento)"
-    response = requests.get(url, headers=HEADERS)
+# ?fields=: leituras trazem o usuário por padrão; ?fields=* (ou sem "usuarios")
+# dispensa o join. Escritas devolvem só a linha de anfitrioes
+PROJECAO = Projecao(SELECT_COM_USUARIO, embeds={"usuarios": EMBED_USUARIO})
+PROJECAO_ESCRITA = Projecao("*", embeds={"usuarios": EMBED_USUARIO})
 
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+# Colunas aceitas em ?sort= nas listagens (além da chave primária); nota_media é
+# mantida pelo banco (migrations/003_nota_media_anfitrioes.sql), null sem avaliações
+ORDENAVEIS = ("preco", "capacidade_maxima", "nota_media")
+
+@anfitriao_router.get("/", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO + COMPRESSAO_LISTAS)
+async def get_anfitrioes(
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+    ids: Optional[str] = None,
+):
+    """
+    Retorna os anfitriões com dados do usuário, paginados por cursor. Com
+    ?ids=1,2,3 busca só esses anfitriões (cache por id + uma consulta para
+    os que faltam), chaveados por id.
+    """
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    if ids:
+        return await buscar_por_ids(url, "id_anfitriao", parse_ids(ids), select, cache=anfitrioes_cache)
+
+    params = {"select": select}
+    return await fetch_page(url, pagina, "id_anfitriao", ORDENAVEIS, params, cache=anfitrioes_cache)
+
+# Declarada antes de /{id} para que "search" não seja lido como ID
+@anfitriao_router.get("/search", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO + COMPRESSAO_LISTAS)
+async def search_anfitrioes(
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+    especie: Optional[List[str]] = Query(None),
+    tamanho_pet: Optional[str] = None,
+    preco_min: Optional[float] = Query(None, ge=0),
+    preco_max: Optional[float] = Query(None, ge=0),
+    capacidade: Optional[int] = Query(None, ge=1),
+    cidade: Optional[str] = None,
+    uf: Optional[str] = None,
+    bairro: Optional[str] = None,
+    status: Optional[str] = "ativo",
+):
+    """
+    Busca anfitriões com filtros aplicados no banco (PostgREST), ordenada por
+    ?sort=preco|capacidade_maxima|nota_media e paginada por cursor.
+    - especie: o anfitrião aceita todas as espécies informadas (array contains)
+    - capacidade: quantidade de pets que precisa ser atendida (capacidade_maxima >=)
+    - cidade/bairro: comparação sem diferenciar maiúsculas; uf exata
+    """
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    params = {"select": select}
+
+    if status:
+        params["status"] = f"eq.{status}"
+    if especie:
+        especies = ",".join(_quote_array_item(e) for e in especie)
+        params["especie"] = f"cs.{{{especies}}}"
+    if tamanho_pet:
+        params["tamanho_pet"] = f"eq.{tamanho_pet}"
+    if capacidade is not None:
+        params["capacidade_maxima"] = f"gte.{capacidade}"
+
+    faixa_preco = []
+    if preco_min is not None:
+        faixa_preco.append(f"preco.gte.{preco_min}")
+    if preco_max is not None:
+        faixa_preco.append(f"preco.lte.{preco_max}")
+    if faixa_preco:
+        params["and"] = f"({','.join(faixa_preco)})"
 
-    return response.json()
+    filtros_usuario = {
+        "usuarios.cidade": f"ilike.{cidade}" if cidade else None,
+        "usuarios.bairro": f"ilike.{bairro}" if bairro else None,
+        "usuarios.uf": f"eq.{uf.upper()}" if uf else None,
+    }
+    filtros_usuario = {k: v for k, v in filtros_usuario.items() if v is not None}
+    if filtros_usuario:
+        params["select"] = _select_inner(select)
+        params.update(filtros_usuario)
 
-@anfitriao_router.get("/{id}", status_code=HTTP_200_OK)
-def get_anfitriao_by_id(id: int):
+    return await fetch_page(url, pagina, "id_anfitriao", ORDENAVEIS, params, cache=anfitrioes_cache)
+
+def _select_inner(select: str) -> str:
+    """
+    Inner join com usuarios para filtrar por cidade/uf/bairro. Sem o embed
+    no select, usa um embed vazio: filtra sem trazer as colunas do usuário.
+    """
+    if EMBED_USUARIO in select:
+        return select.replace(EMBED_USUARIO, f"usuarios!inner({CAMPOS_USUARIO})")
+    return f"{select},usuarios!inner()"
+
+def _quote_array_item(value: str) -> str:
+    """Item de array literal do Postgres ({"a","b"}) com aspas escapadas"""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+@anfitriao_router.get("/{id}", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_anfitriao_by_id(id: int, select: str = Depends(PROJECAO)):
     """Retorna um anfitrião específico por ID com dados do usuário"""
-    url = f"{SUPABASE_URL}/rest/v1/anfitrioes?id_anfitriao=eq.{id}&select=*,usuarios(id_usuario,nome,email,telefone,cidade,bairro,cep,logradouro,numero,uf,complemento)"
-    response = requests.get(url, headers=HEADERS)
+    cache_key = ("id", id, select)
+    cached = anfitrioes_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    generation = anfitrioes_cache.generation
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    response = await supabase.get(url, params={"id_anfitriao": f"eq.{id}", "select": select}, headers=HEADERS)
     
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
@@ -40,55 +140,123 @@ def get_anfitriao_by_id(id: int):
     data = response.json()
     if not data:
         raise HTTPException(status_code=404, detail="Anfitrião não encontrado")
-    
-    return data[0]
 
-@anfitriao_router.get("/status/{status}", status_code=HTTP_200_OK)
-def get_anfitrioes_by_status(status: str):
-    """Retorna anfitriões filtrados por status (pendente, ativo, inativo, banido) com dados do usuário"""
-    url = f"{SUPABASE_URL}/rest/v1/anfitrioes?status=eq.{status}&select=*,usuarios(id_usuario,nome,email,telefone,cidade,bairro,cep,logradouro,numero,uf,complemento)"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    anfitriao = data[0]
+    anfitrioes_cache.set(cache_key, anfitriao, generation)
+    return anfitriao
 
-    return response.json()
+@anfitriao_router.get("/{id}/perfil", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_perfil_anfitriao(
+    id: int,
+    avaliacoes: int = Query(PERFIL_AVALIACOES, ge=0, le=50),
+    perguntas_limit: int = Query(PERFIL_PERGUNTAS, ge=1, le=PAGINATION_MAX_LIMIT),
+    perguntas_cursor: Optional[str] = None,
+):
+    """
+    Perfil do anfitrião num único documento: dados com usuário, resumo das
+    notas, últimas avaliações (com nome e foto de quem avaliou), perguntas
+    paginadas e datas reservadas. As consultas ao Supabase rodam em
+    paralelo: a latência é a da mais lenta, não a soma.
+    """
+    anfitriao, resumos, ultimas, perguntas, reservas = await asyncio.gather(
+        get_anfitriao_by_id(id, select=SELECT_COM_USUARIO),
+        resumo.obter_resumos([id]),
+        perfil.ultimas_avaliacoes(id, avaliacoes),
+        perfil.pagina_perguntas(id, perguntas_limit, perguntas_cursor),
+        perfil.datas_reservadas(id),
+    )
+
+    return {
+        "anfitriao": anfitriao,
+        "resumo_avaliacoes": resumos[id],
+        "avaliacoes": ultimas,
+        "perguntas": perguntas,
+        "datas_reservadas": reservas,
+        "periodos_lotados": periodos_lotados(reservas, anfitriao.get("capacidade_maxima") or 0),
+    }
+
+@anfitriao_router.get("/status/{status}", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO + COMPRESSAO_LISTAS)
+async def get_anfitrioes_by_status(
+    status: str,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna anfitriões filtrados por status (pendente, ativo, inativo, banido) com dados do usuário, paginados por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    params = {"status": f"eq.{status}", "select": select}
+    return await fetch_page(url, pagina, "id_anfitriao", ORDENAVEIS, params, cache=anfitrioes_cache)
 
 @anfitriao_router.post("/", status_code=HTTP_201_CREATED)
-def create_anfitriao(anfitriao: AnfitriaoCreate):
+async def create_anfitriao(
+    anfitriao: AnfitriaoCreate,
+    select: str = Depends(PROJECAO_ESCRITA),
+    retorno: Retorno = Depends(),
+):
     """Cria um novo anfitrião"""
     url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
-    response = requests.post(url, json=anfitriao.dict(), headers=HEADERS)
+    response = await supabase.post(url, json=anfitriao.dict(), params=retorno.params(select), headers=retorno.headers)
 
     if response.status_code != 201:
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    anfitrioes_cache.clear()
+
+    return retorno.resposta(response)
+
+@anfitriao_router.patch("/batch/status", status_code=HTTP_200_OK, dependencies=PRAZO_LOTES)
+async def update_status_anfitrioes_lote(lote: AnfitriaoStatusLote):
+    """
+    Altera o status de vários anfitriões (ex.: aprovar ou banir) com um
+    único PATCH id_anfitriao=in.(...). Resultado informado por id.
+    """
+    verificar_lote(lote.ids)
+    ids = list(dict.fromkeys(lote.ids))
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    params = {"id_anfitriao": in_filter(ids), "select": "id_anfitriao"}
+    response = await supabase.patch(url, params=params, json={"status": lote.status}, headers=HEADERS)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    anfitrioes_cache.clear()
+
+    atualizados = {anfitriao["id_anfitriao"] for anfitriao in response.json()}
+    return resultados_por_id(ids, atualizados)
 
 @anfitriao_router.put("/{id}", status_code=HTTP_200_OK)
-def update_anfitriao(id: int, anfitriao: AnfitriaoUpdate):
+async def update_anfitriao(
+    id: int,
+    anfitriao: AnfitriaoUpdate,
+    select: str = Depends(PROJECAO_ESCRITA),
+    retorno: Retorno = Depends(),
+):
     """Atualiza um anfitrião existente"""
-    url = f"{SUPABASE_URL}/rest/v1/anfitrioes?id_anfitriao=eq.{id}"
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    params = {"id_anfitriao": f"eq.{id}", **retorno.params(select)}
     
     # Remove campos None do update
     update_data = {k: v for k, v in anfitriao.dict().items() if v is not None}
     
-    response = requests.patch(url, json=update_data, headers=HEADERS)
+    response = await supabase.patch(url, json=update_data, params=params, headers=retorno.headers)
 
-    if response.status_code != 200:
+    if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    anfitrioes_cache.clear()
+
+    return retorno.resposta(response)
 
 @anfitriao_router.delete("/{id}", status_code=HTTP_204_NO_CONTENT)
-def delete_anfitriao_by_id(id: int):
+async def delete_anfitriao_by_id(id: int):
     """Deleta um anfitrião por ID"""
     url = f"{SUPABASE_URL}/rest/v1/anfitrioes?id_anfitriao=eq.{id}"
-    response = requests.delete(url, headers=HEADERS)
+    response = await supabase.delete(url, headers=HEADERS_MINIMAL)
 
     if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
+    anfitrioes_cache.clear()
+
     return None
 
 # anfitriao_routes.py – exemplo de endpoint para fotos da área
@@ -96,50 +264,29 @@ def delete_anfitriao_by_id(id: int):
 async def upload_fotos_area(id_anfitriao: int, arquivos: List[UploadFile] = File(...)):
     """
     Upload de fotos da área do anfitrião para bucket 'area_anfitriao'
-    e atualização do campo fotos_urls na tabela anfitrioes.
+    e atualização dos campos fotos_urls e fotos_variantes na tabela anfitrioes.
     """
     if len(arquivos) > 10:
         raise HTTPException(status_code=400, detail="Máximo de 10 fotos permitidas")
 
-    fotos_urls = []
-
-    for arquivo in arquivos:
-        conteudo = await arquivo.read()
-        extensao = arquivo.filename.split(".")[-1] if "." in arquivo.filename else "jpg"
-        nome_arquivo = f"area_{id_anfitriao}_{uuid.uuid4().hex}.{extensao}"
-        caminho_storage = f"fotos/{id_anfitriao}/{nome_arquivo}"
-
-        storage_url = f"{SUPABASE_URL}/storage/v1/object/area_anfitriao/{caminho_storage}"
-        storage_headers = {
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-            "Content-Type": arquivo.content_type or "image/jpeg",
-        }
-
-        storage_response = requests.post(
-            storage_url,
-            headers=storage_headers,
-            data=conteudo,
-        )
-
-        if storage_response.status_code not in (200, 201):
-            raise HTTPException(
-                status_code=storage_response.status_code,
-                detail=f"Erro ao fazer upload da imagem: {storage_response.text}",
-            )
-
-        foto_url = f"{SUPABASE_URL}/storage/v1/object/public/area_anfitriao/{caminho_storage}"
-        fotos_urls.append(foto_url)
+    # Variantes (thumb/medium/original) enviadas em paralelo; se algum upload
+    # falhar, os já enviados são removidos
+    caminhos = await upload_imagens("area_anfitriao", f"fotos/{id_anfitriao}", f"area_{id_anfitriao}", arquivos)
+    fotos_variantes = [public_urls("area_anfitriao", variantes) for variantes in caminhos]
+    fotos_urls = [variantes["original"] for variantes in fotos_variantes]
 
     url_update = f"{SUPABASE_URL}/rest/v1/anfitrioes?id_anfitriao=eq.{id_anfitriao}"
-    update_data = {"fotos_urls": fotos_urls}
+    update_data = {"fotos_urls": fotos_urls, "fotos_variantes": fotos_variantes}
 
-    update_response = requests.patch(url_update, json=update_data, headers=HEADERS)
+    update_response = await supabase.patch(url_update, json=update_data, headers=HEADERS_MINIMAL)
 
     if update_response.status_code not in (200, 204):
+        await remover_objetos("area_anfitriao", todos_os_caminhos(caminhos))
         raise HTTPException(
             status_code=update_response.status_code,
             detail=f"Erro ao atualizar anfitrião com URLs das fotos: {update_response.text}",
         )
 
-    return {"fotos_totais": fotos_urls}
\ No newline at end of file
+    anfitrioes_cache.clear()
+
+    return {"fotos_totais": fotos_urls, "fotos_variantes": fotos_variantes}
\ No newline at end of file
@@ -18,4 +18,8 @@ class AnfitriaoUpdate(BaseModel):
     tamanho_pet: Optional[str] = None
     preco: Optional[float] = None
     status: Optional[str] = None
-    fotos_urls: Optional[List[str]] = []  
\ No newline at end of file
+    fotos_urls: Optional[List[str]] = []  
+
+class AnfitriaoStatusLote(BaseModel):
+    ids: List[int]
+    status: str
@@ -0,0 +1,62 @@
+from datetime import date
+from fastapi import HTTPException
+from utils.config import SUPABASE_URL
+from utils.pagination import Pagina, buscar_pagina
+from utils.supabase_client import supabase, HEADERS
+from Pergunta.pergunta_routes import ORDENAVEIS, formatar_pergunta, params_perguntas
+from Reserva.disponibilidade import STATUS_ATIVOS
+
+# avaliacoes tem duas FKs para usuarios: o hint !id_avaliador escolhe a do avaliador
+# (foto_perfil_variantes: migrations/001_variantes_de_imagem.sql)
+SELECT_AVALIACOES = "*,avaliador:usuarios!id_avaliador(id_usuario,nome,foto_perfil_url,foto_perfil_variantes)"
+
+
+async def ultimas_avaliacoes(id_anfitriao: int, quantidade: int) -> list:
+    """Avaliações mais recentes recebidas, com nome e foto de quem avaliou"""
+    if quantidade == 0:
+        return []
+
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    params = {
+        "id_avaliado": f"eq.{id_anfitriao}",
+        "select": SELECT_AVALIACOES,
+        "order": "id_avaliacao.desc",
+        "limit": str(quantidade),
+    }
+    response = await supabase.get(url, params=params, headers=HEADERS)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    return response.json()
+
+
+async def pagina_perguntas(id_anfitriao: int, limit: int, cursor: str = None) -> dict:
+    """Perguntas com resposta, das mais recentes para as mais antigas, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/perguntas"
+    pagina = Pagina(limit=limit, cursor=cursor, sort="data_envio", direction="desc", count=None)
+    params = params_perguntas(id_anfitriao)
+    perguntas, page_headers = await buscar_pagina(url, pagina, "id_pergunta", ORDENAVEIS, params)
+
+    return {
+        "itens": [formatar_pergunta(pergunta) for pergunta in perguntas],
+        "next_cursor": page_headers.get("X-Next-Cursor"),
+    }
+
+
+async def datas_reservadas(id_anfitriao: int) -> list:
+    """Períodos das reservas ativas de hoje em diante"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    params = {
+        "id_anfitriao": f"eq.{id_anfitriao}",
+        "status": f"in.({','.join(STATUS_ATIVOS)})",
+        "data_fim": f"gte.{date.today().isoformat()}",
+        "select": "data_inicio,data_fim",
+        "order": "data_inicio.asc",
+    }
+    response = await supabase.get(url, params=params, headers=HEADERS)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    return response.json()
@@ -1,110 +1,130 @@
-from fastapi import APIRouter, HTTPException
-import requests
+from fastapi import APIRouter, Depends, HTTPException
 from starlette.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
-from utils.config import SUPABASE_URL, SUPABASE_KEY
+from utils.config import SUPABASE_URL
+from utils.supabase_client import supabase, HEADERS
+from utils.http_cache import CACHE_PUBLICO
+from utils.pagination import Pagina, fetch_page
+from utils.projecao import Projecao, Retorno
+from utils.respostas import buscar_um, repassar
+from utils.ids import parse_ids
 from Avaliacao.dto.CreateAvaliacao import AvaliacaoCreate, AvaliacaoUpdate
+from Avaliacao import resumo
 
 avaliacao_router = APIRouter(prefix='/avaliacoes', tags=['avaliacao'])
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
+# Colunas aceitas em ?sort= nas listagens (além da chave primária)
+ORDENAVEIS = ("nota",)
 
-@avaliacao_router.get("/", status_code=HTTP_200_OK)
-def get_avaliacoes():
-    """Retorna todas as avaliações"""
-    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
-    response = requests.get(url, headers=HEADERS)
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+# ?fields= nas leituras e escritas (default: todas as colunas)
+PROJECAO = Projecao("*")
 
-    return response.json()
+@avaliacao_router.get("/", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_avaliacoes(pagina: Pagina = Depends(), select: str = Depends(PROJECAO)):
+    """Retorna as avaliações, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    params = {"select": select}
+    return await fetch_page(url, pagina, "id_avaliacao", ORDENAVEIS, params)
 
-@avaliacao_router.get("/{id}", status_code=HTTP_200_OK)
-def get_avaliacao_by_id(id: int):
+@avaliacao_router.get("/{id}", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_avaliacao_by_id(id: int, select: str = Depends(PROJECAO)):
     """Retorna uma avaliação específica por ID"""
-    url = f"{SUPABASE_URL}/rest/v1/avaliacoes?id_avaliacao=eq.{id}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-
-    data = response.json()
-    if not data:
-        raise HTTPException(status_code=404, detail="Avaliação não encontrada")
-    
-    return data[0]
-
-@avaliacao_router.get("/reserva/{id_reserva}", status_code=HTTP_200_OK)
-def get_avaliacoes_by_reserva(id_reserva: int):
-    """Retorna todas as avaliações de uma reserva específica"""
-    url = f"{SUPABASE_URL}/rest/v1/avaliacoes?id_reserva=eq.{id_reserva}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-
-    return response.json()
-
-@avaliacao_router.get("/avaliado/{id_avaliado}", status_code=HTTP_200_OK)
-def get_avaliacoes_by_avaliado(id_avaliado: int):
-    """Retorna todas as avaliações recebidas por um usuário"""
-    url = f"{SUPABASE_URL}/rest/v1/avaliacoes?id_avaliado=eq.{id_avaliado}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-
-    return response.json()
-
-@avaliacao_router.get("/avaliador/{id_avaliador}", status_code=HTTP_200_OK)
-def get_avaliacoes_by_avaliador(id_avaliador: int):
-    """Retorna todas as avaliações feitas por um usuário"""
-    url = f"{SUPABASE_URL}/rest/v1/avaliacoes?id_avaliador=eq.{id_avaliador}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-
-    return response.json()
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    # Registro único como objeto: os bytes do PostgREST vão direto ao cliente
+    return repassar(await buscar_um(url, {"id_avaliacao": f"eq.{id}", "select": select}, "Avaliação não encontrada"))
+
+@avaliacao_router.get("/reserva/{id_reserva}", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_avaliacoes_by_reserva(
+    id_reserva: int,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna as avaliações de uma reserva específica, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    params = {"id_reserva": f"eq.{id_reserva}", "select": select}
+    return await fetch_page(url, pagina, "id_avaliacao", ORDENAVEIS, params)
+
+# Declarada antes de /avaliado/{id_avaliado} para que "resumo" não seja lido como ID
+@avaliacao_router.get("/avaliado/resumo", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_resumos_avaliados(ids: str):
+    """Resumo de notas de vários usuários de uma vez (?ids=1,2,3), chaveado por id"""
+    resumos = await resumo.obter_resumos(parse_ids(ids))
+    return {str(id_avaliado): dados for id_avaliado, dados in resumos.items()}
+
+@avaliacao_router.get("/avaliado/{id_avaliado}/resumo", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_resumo_avaliado(id_avaliado: int):
+    """Total, soma, média e histograma (1 a 5) das notas recebidas por um usuário"""
+    resumos = await resumo.obter_resumos([id_avaliado])
+    return resumos[id_avaliado]
+
+@avaliacao_router.get("/avaliado/{id_avaliado}", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_avaliacoes_by_avaliado(
+    id_avaliado: int,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna as avaliações recebidas por um usuário, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    params = {"id_avaliado": f"eq.{id_avaliado}", "select": select}
+    return await fetch_page(url, pagina, "id_avaliacao", ORDENAVEIS, params)
+
+@avaliacao_router.get("/avaliador/{id_avaliador}", status_code=HTTP_200_OK, dependencies=CACHE_PUBLICO)
+async def get_avaliacoes_by_avaliador(
+    id_avaliador: int,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna as avaliações feitas por um usuário, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    params = {"id_avaliador": f"eq.{id_avaliador}", "select": select}
+    return await fetch_page(url, pagina, "id_avaliacao", ORDENAVEIS, params)
 
 @avaliacao_router.post("/", status_code=HTTP_201_CREATED)
-def create_avaliacao(avaliacao: AvaliacaoCreate):
+async def create_avaliacao(avaliacao: AvaliacaoCreate, select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
     """Cria uma nova avaliação (RN005: apenas 1 avaliação por reserva/avaliador)"""
     url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
-    response = requests.post(url, json=avaliacao.dict(), headers=HEADERS)
+    response = await supabase.post(url, json=avaliacao.dict(), params=retorno.params(select), headers=retorno.headers)
 
     if response.status_code != 201:
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    resumo.invalidar(avaliacao.id_avaliado)
+    return retorno.resposta(response)
 
 @avaliacao_router.put("/{id}", status_code=HTTP_200_OK)
-def update_avaliacao(id: int, avaliacao: AvaliacaoUpdate):
+async def update_avaliacao(id: int, avaliacao: AvaliacaoUpdate, select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
     """Atualiza uma avaliação existente"""
-    url = f"{SUPABASE_URL}/rest/v1/avaliacoes?id_avaliacao=eq.{id}"
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    filtro = {"id_avaliacao": f"eq.{id}"}
     
     # Remove campos None do update
     update_data = {k: v for k, v in avaliacao.dict().items() if v is not None}
-    
-    response = requests.patch(url, json=update_data, headers=HEADERS)
 
-    if response.status_code != 200:
+    params = {**filtro, **retorno.params(select)}
+    response = await supabase.patch(url, json=update_data, params=params, headers=retorno.headers)
+
+    if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    # O trigger já refez o resumo no banco; sem saber o avaliado, descarta todos em memória
+    if "nota" in update_data:
+        resumo.invalidar()
+
+    return retorno.resposta(response)
 
 @avaliacao_router.delete("/{id}", status_code=HTTP_204_NO_CONTENT)
-def delete_avaliacao_by_id(id: int):
+async def delete_avaliacao_by_id(id: int):
     """Deleta uma avaliação por ID"""
-    url = f"{SUPABASE_URL}/rest/v1/avaliacoes?id_avaliacao=eq.{id}"
-    response = requests.delete(url, headers=HEADERS)
+    url = f"{SUPABASE_URL}/rest/v1/avaliacoes"
+    # Só o avaliado, para descartar o resumo dele em memória
+    params = {"id_avaliacao": f"eq.{id}", "select": "id_avaliado"}
+    response = await supabase.delete(url, params=params, headers=HEADERS)
 
     if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
+    # Com return=representation o PostgREST devolve as linhas removidas
+    removidas = response.json() if response.status_code == 200 and response.content else []
+    for avaliacao in removidas:
+        resumo.invalidar(avaliacao["id_avaliado"])
+
     return None
\ No newline at end of file
@@ -0,0 +1,78 @@
+from fastapi import HTTPException
+from utils.cache import anfitrioes_cache, resumo_avaliacoes_cache
+from utils.config import SUPABASE_URL
+from utils.ids import in_filter
+from utils.supabase_client import supabase, HEADERS
+
+# Linha mantida pelo trigger de migrations/002_resumo_avaliacoes.sql
+SELECT_RESUMO = "id_avaliado,total,soma,nota_1,nota_2,nota_3,nota_4,nota_5"
+
+
+def resumo_vazio(id_avaliado: int) -> dict:
+    return {
+        "id_avaliado": id_avaliado,
+        "total": 0,
+        "soma": 0,
+        "media": None,
+        "histograma": {str(nota): 0 for nota in range(1, 6)},
+    }
+
+
+def formatar_resumo(linha: dict) -> dict:
+    """Linha de resumo_avaliacoes no formato da API (média e histograma)"""
+    return {
+        "id_avaliado": linha["id_avaliado"],
+        "total": linha["total"],
+        "soma": linha["soma"],
+        "media": round(linha["soma"] / linha["total"], 2) if linha["total"] else None,
+        "histograma": {str(nota): linha[f"nota_{nota}"] for nota in range(1, 6)},
+    }
+
+
+async def obter_resumos(ids: list) -> dict:
+    """
+    Resumo de notas por id_avaliado, lido da tabela resumo_avaliacoes (uma
+    linha por avaliado). O cache em memória é só um read-through na frente
+    dela; quem nunca foi avaliado não tem linha e recebe o resumo vazio.
+    """
+    resumos = {}
+    faltando = []
+    for id_avaliado in ids:
+        resumo = resumo_avaliacoes_cache.get(id_avaliado)
+        if resumo is None:
+            faltando.append(id_avaliado)
+        else:
+            resumos[id_avaliado] = resumo
+
+    if faltando:
+        generation = resumo_avaliacoes_cache.generation
+        url = f"{SUPABASE_URL}/rest/v1/resumo_avaliacoes"
+        params = {"id_avaliado": in_filter(faltando), "select": SELECT_RESUMO}
+        response = await supabase.get(url, params=params, headers=HEADERS)
+
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        novos = {id_avaliado: resumo_vazio(id_avaliado) for id_avaliado in faltando}
+        for linha in response.json():
+            novos[linha["id_avaliado"]] = formatar_resumo(linha)
+
+        for id_avaliado, resumo in novos.items():
+            resumo_avaliacoes_cache.set(id_avaliado, resumo, generation)
+        resumos.update(novos)
+
+    return resumos
+
+
+def invalidar(id_avaliado: int = None):
+    """
+    Depois de uma escrita em avaliacoes (o trigger já atualizou o banco):
+    descarta o resumo em memória do avaliado, ou todos quando a rota não
+    sabe de quem era a avaliação. A nota_media dos anfitriões também mudou,
+    então as listagens em cache caem junto.
+    """
+    anfitrioes_cache.clear()
+    if id_avaliado is None:
+        resumo_avaliacoes_cache.clear()
+    else:
+        resumo_avaliacoes_cache.discard(id_avaliado)
@@ -1,99 +1,88 @@
-from fastapi import APIRouter, HTTPException, status
-import requests
-from utils.config import SUPABASE_URL, SUPABASE_KEY
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from utils.config import SUPABASE_URL
+from utils.supabase_client import supabase, HEADERS
+from utils.http_cache import CACHE_PUBLICO
+from utils.ids import in_filter, parse_ids
+from utils.pagination import Pagina, buscar_pagina
+from utils.respostas import buscar_um, carregar, json_rapido
 from Pergunta.dto.CreatePergunta import CreatePergunta, CreateResposta, PerguntaComResposta
 
 pergunta_router = APIRouter(prefix="/perguntas", tags=["Perguntas"])
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
+# Colunas da pergunta + respostas embutidas (o PostgREST devolve só a primeira)
+SELECT_PERGUNTA = "id_pergunta,id_tutor,id_anfitriao,pergunta,data_envio,respostas(*)"
+PARAMS_RESPOSTA = {"respostas.order": "data_envio.asc", "respostas.limit": "1"}
 
+# Colunas aceitas em ?sort= (default: data_envio)
+ORDENAVEIS = ("data_envio",)
 
-# GET all questions for a specific host
-@pergunta_router.get("/anfitriao/{id_anfitriao}")
-async def get_perguntas_by_anfitriao(id_anfitriao: int):
+
+def params_perguntas(id_anfitriao: int, sem_resposta: bool = False) -> dict:
+    """Filtros do PostgREST para as perguntas de um anfitrião"""
+    params = {"id_anfitriao": f"eq.{id_anfitriao}", "select": SELECT_PERGUNTA, **PARAMS_RESPOSTA}
+    if sem_resposta:
+        # Anti-join no PostgREST: só perguntas sem nenhuma resposta
+        params["respostas"] = "is.null"
+    return params
+
+
+def formatar_pergunta(pergunta: dict) -> dict:
+    """Troca a lista `respostas` (no máximo 1 item) por `resposta` (objeto ou None), no próprio dict"""
+    respostas = pergunta.pop("respostas", None)
+    pergunta["resposta"] = respostas[0] if respostas else None
+    return pergunta
+
+
+# Declarada antes de /anfitriao/{id_anfitriao} para que "pendentes" não seja lido como ID
+@pergunta_router.get("/anfitriao/pendentes", dependencies=CACHE_PUBLICO)
+async def get_perguntas_pendentes(ids: str):
     """
-    Fetch all questions and their answers for a specific host
+    Quantidade de perguntas sem resposta por anfitrião (?ids=1,2,3), numa
+    única leitura da view perguntas_pendentes (migrations/005), que já vem
+    agrupada pelo banco. Anfitrião sem pendências não tem linha: conta 0.
     """
-    try:
-        # Buscar todas as perguntas para o anfitrião com respostas relacionadas
-        url = f"{SUPABASE_URL}/rest/v1/perguntas?id_anfitriao=eq.{id_anfitriao}&select=*,respostas(*)"
-        response = requests.get(url, headers=HEADERS)
+    id_anfitrioes = parse_ids(ids)
+    url = f"{SUPABASE_URL}/rest/v1/perguntas_pendentes"
+    params = {"id_anfitriao": in_filter(id_anfitrioes), "select": "id_anfitriao,pendentes"}
+    response = await supabase.get(url, params=params, headers=HEADERS)
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Erro ao buscar perguntas: {response.text}"
-            )
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
 
-        perguntas = response.json()
-        
-        # Transformar dados para o formato esperado
-        perguntas_with_respostas = []
-        for pergunta in perguntas:
-            pergunta_data = {
-                "id_pergunta": pergunta.get("id_pergunta"),
-                "id_tutor": pergunta.get("id_tutor"),
-                "id_anfitriao": pergunta.get("id_anfitriao"),
-                "pergunta": pergunta.get("pergunta"),
-                "data_envio": pergunta.get("data_envio"),
-                "resposta": pergunta.get("respostas")[0] if pergunta.get("respostas") and len(pergunta.get("respostas", [])) > 0 else None
-            }
-            perguntas_with_respostas.append(pergunta_data)
-
-        return perguntas_with_respostas
+    contagens = {linha["id_anfitriao"]: linha["pendentes"] for linha in response.json()}
+    return {str(id_anfitriao): contagens.get(id_anfitriao, 0) for id_anfitriao in id_anfitrioes}
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao buscar perguntas: {str(e)}"
-        )
+
+# GET all questions for a specific host
+@pergunta_router.get("/anfitriao/{id_anfitriao}", dependencies=CACHE_PUBLICO)
+async def get_perguntas_by_anfitriao(
+    id_anfitriao: int,
+    pagina: Pagina = Depends(),
+    sem_resposta: bool = Query(False, description="Só perguntas ainda não respondidas"),
+):
+    """
+    Fetch the questions (with their first answer) for a specific host,
+    paginated by cursor and ordered by data_envio
+    """
+    pagina.sort = pagina.sort or "data_envio"
+    url = f"{SUPABASE_URL}/rest/v1/perguntas"
+    params = params_perguntas(id_anfitriao, sem_resposta)
+    perguntas, page_headers = await buscar_pagina(url, pagina, "id_pergunta", ORDENAVEIS, params)
+
+    return json_rapido([formatar_pergunta(pergunta) for pergunta in perguntas], headers=page_headers)
 
 
 # GET a single question by ID
-@pergunta_router.get("/{id_pergunta}")
+@pergunta_router.get("/{id_pergunta}", dependencies=CACHE_PUBLICO)
 async def get_pergunta_by_id(id_pergunta: int):
     """
     Fetch a single question with its answer
     """
-    try:
-        url = f"{SUPABASE_URL}/rest/v1/perguntas?id_pergunta=eq.{id_pergunta}&select=*,respostas(*)"
-        response = requests.get(url, headers=HEADERS)
-
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Erro ao buscar pergunta: {response.text}"
-            )
-
-        perguntas = response.json()
-        if not perguntas:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Pergunta não encontrada"
-            )
-
-        pergunta = perguntas[0]
-        pergunta_data = {
-            "id_pergunta": pergunta.get("id_pergunta"),
-            "id_tutor": pergunta.get("id_tutor"),
-            "id_anfitriao": pergunta.get("id_anfitriao"),
-            "pergunta": pergunta.get("pergunta"),
-            "data_envio": pergunta.get("data_envio"),
-            "resposta": pergunta.get("respostas")[0] if pergunta.get("respostas") and len(pergunta.get("respostas", [])) > 0 else None
-        }
-
-        return pergunta_data
+    url = f"{SUPABASE_URL}/rest/v1/perguntas"
+    params = {"id_pergunta": f"eq.{id_pergunta}", "select": SELECT_PERGUNTA, **PARAMS_RESPOSTA}
+    response = await buscar_um(url, params, "Pergunta não encontrada")
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao buscar pergunta: {str(e)}"
-        )
+    return json_rapido(formatar_pergunta(carregar(response)))
 
 
 # POST create a new question
@@ -104,7 +93,7 @@ async def create_pergunta(pergunta: CreatePergunta):
     """
     try:
         url = f"{SUPABASE_URL}/rest/v1/perguntas"
-        response = requests.post(url, json=pergunta.dict(), headers=HEADERS)
+        response = await supabase.post(url, json=pergunta.dict(), headers=HEADERS)
 
         if response.status_code != 201:
             raise HTTPException(
@@ -129,7 +118,7 @@ async def create_resposta(resposta: CreateResposta):
     """
     try:
         url = f"{SUPABASE_URL}/rest/v1/respostas"
-        response = requests.post(url, json=resposta.dict(), headers=HEADERS)
+        response = await supabase.post(url, json=resposta.dict(), headers=HEADERS)
 
         if response.status_code != 201:
             raise HTTPException(
@@ -1,149 +1,145 @@
 # Pet/routes/pet_routes.py
-from fastapi import APIRouter, HTTPException, UploadFile, File
-import requests
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from starlette.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
-from typing import List
-import uuid
-from utils.config import SUPABASE_URL, SUPABASE_KEY
+from typing import List, Optional
+from utils.config import SUPABASE_URL
+from utils.supabase_client import supabase, HEADERS_MINIMAL
+from utils.http_cache import CACHE_PRIVADO
+from utils.prazos import PRAZO_LOTES
+from utils.storage import upload_imagens, remover_objetos, public_urls, todos_os_caminhos
+from utils.pagination import Pagina, fetch_page
+from utils.projecao import Projecao, Retorno
+from utils.respostas import buscar_um, repassar
+from utils.lote import verificar_lote
+from utils.ids import parse_ids, buscar_por_ids
 from Pet.dto.CreatePet import PetCreate, PetUpdate
 
 pet_router = APIRouter(prefix='/pets', tags=['pet'])
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
+# Colunas aceitas em ?sort= nas listagens (além da chave primária)
+ORDENAVEIS = ("nome", "especie")
 
-@pet_router.get("/", status_code=HTTP_200_OK)
-def get_pets():
-    """Retorna todos os pets"""
-    url = f"{SUPABASE_URL}/rest/v1/pets"
-    response = requests.get(url, headers=HEADERS)
+# ?fields= nas leituras e escritas (default: todas as colunas)
+PROJECAO = Projecao("*")
 
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+@pet_router.get("/", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_pets(
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+    ids: Optional[str] = None,
+):
+    """
+    Retorna os pets, paginados por cursor. Com ?ids=1,2,3 busca só esses
+    pets numa única consulta, chaveados por id.
+    """
+    url = f"{SUPABASE_URL}/rest/v1/pets"
+    if ids:
+        return await buscar_por_ids(url, "id_pet", parse_ids(ids), select)
 
-    return response.json()
+    params = {"select": select}
+    return await fetch_page(url, pagina, "id_pet", ORDENAVEIS, params)
 
-@pet_router.get("/{id}", status_code=HTTP_200_OK)
-def get_pet_by_id(id: int):
+@pet_router.get("/{id}", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_pet_by_id(id: int, select: str = Depends(PROJECAO)):
     """Retorna um pet específico por ID"""
-    url = f"{SUPABASE_URL}/rest/v1/pets?id_pet=eq.{id}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    url = f"{SUPABASE_URL}/rest/v1/pets"
+    # Registro único como objeto: os bytes do PostgREST vão direto ao cliente
+    return repassar(await buscar_um(url, {"id_pet": f"eq.{id}", "select": select}, "Pet não encontrado"))
+
+@pet_router.get("/tutor/{id_tutor}", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_pets_by_tutor(
+    id_tutor: int,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna os pets de um tutor específico, paginados por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/pets"
+    params = {"id_tutor": f"eq.{id_tutor}", "select": select}
+    return await fetch_page(url, pagina, "id_pet", ORDENAVEIS, params)
 
-    data = response.json()
-    if not data:
-        raise HTTPException(status_code=404, detail="Pet não encontrado")
-    
-    return data[0]
+@pet_router.post("/", status_code=HTTP_201_CREATED)
+async def create_pet(pet: PetCreate, select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
+    """Cria um novo pet"""
+    url = f"{SUPABASE_URL}/rest/v1/pets"
+    response = await supabase.post(url, json=pet.dict(), params=retorno.params(select), headers=retorno.headers)
 
-@pet_router.get("/tutor/{id_tutor}", status_code=HTTP_200_OK)
-def get_pets_by_tutor(id_tutor: int):
-    """Retorna todos os pets de um tutor específico"""
-    url = f"{SUPABASE_URL}/rest/v1/pets?id_tutor=eq.{id_tutor}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
+    if response.status_code != 201:
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    return retorno.resposta(response)
 
-@pet_router.post("/", status_code=HTTP_201_CREATED)
-def create_pet(pet: PetCreate):
-    """Cria um novo pet"""
+@pet_router.post("/batch", status_code=HTTP_201_CREATED, dependencies=PRAZO_LOTES)
+async def create_pets_lote(pets: List[PetCreate], select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
+    """
+    Cria vários pets com uma única inserção no Supabase. A inserção é
+    atômica: ou todos são gravados ou nenhum. Com return=representation
+    devolve os pets criados na ordem enviada.
+    """
+    verificar_lote(pets)
     url = f"{SUPABASE_URL}/rest/v1/pets"
-    response = requests.post(url, json=pet.dict(), headers=HEADERS)
+    payload = [pet.dict() for pet in pets]
+    response = await supabase.post(url, json=payload, params=retorno.params(select), headers=retorno.headers)
 
     if response.status_code != 201:
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    return retorno.resposta(response)
 
 @pet_router.post("/{id_pet}/fotos", status_code=HTTP_200_OK)
 async def upload_fotos_pet(id_pet: int, arquivos: List[UploadFile] = File(...)):
     """
     Faz upload de múltiplas fotos do pet para o bucket 'pets'
-    no Supabase Storage e atualiza o campo fotos_urls na tabela pets.
+    no Supabase Storage e atualiza os campos fotos_urls e fotos_variantes
+    (thumb/medium/original de cada foto) na tabela pets.
     """
     if len(arquivos) > 10:
         raise HTTPException(status_code=400, detail="Máximo de 10 fotos permitidas")
     
-    fotos_urls = []
-    
-    for arquivo in arquivos:
-        # 1. Ler conteúdo do arquivo
-        conteudo = await arquivo.read()
-        
-        # 2. Gerar um nome de arquivo único
-        extensao = arquivo.filename.split(".")[-1] if "." in arquivo.filename else "jpg"
-        nome_arquivo = f"pet_{id_pet}_{uuid.uuid4().hex}.{extensao}"
-        caminho_storage = f"fotos/{id_pet}/{nome_arquivo}"
-        
-        # 3. Upload para o Supabase Storage
-        storage_url = f"{SUPABASE_URL}/storage/v1/object/pets/{caminho_storage}"
-        
-        storage_headers = {
-            "apikey": SUPABASE_KEY,
-            "Authorization": f"Bearer {SUPABASE_KEY}",
-            "Content-Type": arquivo.content_type or "image/jpeg",
-        }
-        
-        storage_response = requests.post(
-            storage_url,
-            headers=storage_headers,
-            data=conteudo,
-        )
-        
-        if storage_response.status_code not in (200, 201):
-            raise HTTPException(
-                status_code=storage_response.status_code,
-                detail=f"Erro ao fazer upload da imagem: {storage_response.text}",
-            )
-        
-        # 4. Montar URL pública
-        foto_url = f"{SUPABASE_URL}/storage/v1/object/public/pets/{caminho_storage}"
-        fotos_urls.append(foto_url)
+    # 1. Gera thumb/medium/original de cada foto e envia em paralelo para o
+    #    Supabase Storage (desfeito por completo se algum upload falhar)
+    caminhos = await upload_imagens("pets", f"fotos/{id_pet}", f"pet_{id_pet}", arquivos)
+
+    # 2. Montar URLs públicas (fotos_urls continua apontando para o original)
+    fotos_variantes = [public_urls("pets", variantes) for variantes in caminhos]
+    fotos_urls = [variantes["original"] for variantes in fotos_variantes]
     
-    # 5. Atualizar o pet com as fotos_urls
+    # 3. Atualizar o pet com as URLs (só depois de todos os uploads)
     url_update = f"{SUPABASE_URL}/rest/v1/pets?id_pet=eq.{id_pet}"
-    update_data = {"fotos_urls": fotos_urls}
+    update_data = {"fotos_urls": fotos_urls, "fotos_variantes": fotos_variantes}
     
-    update_response = requests.patch(url_update, json=update_data, headers=HEADERS)
+    update_response = await supabase.patch(url_update, json=update_data, headers=HEADERS_MINIMAL)
     
     if update_response.status_code not in (200, 204):
+        await remover_objetos("pets", todos_os_caminhos(caminhos))
         raise HTTPException(
             status_code=update_response.status_code,
             detail=f"Erro ao atualizar pet com URLs das fotos: {update_response.text}",
         )
     
-    # 6. Retornar as URLs das fotos
-    return {"fotos_urls": fotos_urls}
+    # 4. Retornar as URLs das fotos
+    return {"fotos_urls": fotos_urls, "fotos_variantes": fotos_variantes}
 
 @pet_router.put("/{id}", status_code=HTTP_200_OK)
-def update_pet(id: int, pet: PetUpdate):
+async def update_pet(id: int, pet: PetUpdate, select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
     """Atualiza um pet existente"""
-    url = f"{SUPABASE_URL}/rest/v1/pets?id_pet=eq.{id}"
+    url = f"{SUPABASE_URL}/rest/v1/pets"
+    params = {"id_pet": f"eq.{id}", **retorno.params(select)}
     
     # Remove campos None do update
     update_data = {k: v for k, v in pet.dict().items() if v is not None}
     
-    response = requests.patch(url, json=update_data, headers=HEADERS)
+    response = await supabase.patch(url, json=update_data, params=params, headers=retorno.headers)
 
-    if response.status_code != 200:
+    if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    return retorno.resposta(response)
 
 @pet_router.delete("/{id}", status_code=HTTP_204_NO_CONTENT)
-def delete_pet_by_id(id: int):
+async def delete_pet_by_id(id: int):
     """Deleta um pet por ID"""
     url = f"{SUPABASE_URL}/rest/v1/pets?id_pet=eq.{id}"
-    response = requests.delete(url, headers=HEADERS)
+    response = await supabase.delete(url, headers=HEADERS_MINIMAL)
 
     if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
@@ -0,0 +1,267 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import HTTPException
+from utils.config import SUPABASE_URL
+from utils.ids import in_filter
+from utils.supabase_client import supabase, HEADERS
+
+# Reservas que ocupam vaga do anfitrião
+STATUS_ATIVOS = ("pendente", "confirmada")
+
+# Código da recusa do trigger de capacidade (exclusion_violation)
+SEM_DISPONIBILIDADE = "23P01"
+DETALHE_SEM_DISPONIBILIDADE = "Anfitrião sem disponibilidade para as datas informadas"
+
+_locks = {}
+
+
+@asynccontextmanager
+async def lock_anfitriao(id_anfitriao: int):
+    """
+    Serializa verificação + gravação de reservas do mesmo anfitrião dentro
+    do processo. Entre workers/réplicas a garantia vem do banco (trigger de
+    migrations/004_capacidade_reservas.sql; ver erro_de_gravacao).
+    """
+    entry = _locks.setdefault(id_anfitriao, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _locks.pop(id_anfitriao, None)
+
+
+@asynccontextmanager
+async def lock_anfitrioes(ids_anfitriao):
+    """Locks de vários anfitriões, sempre na mesma ordem (sem deadlock entre lotes)"""
+    async with AsyncExitStack() as stack:
+        for id_anfitriao in sorted(set(ids_anfitriao)):
+            await stack.enter_async_context(lock_anfitriao(id_anfitriao))
+        yield
+
+
+def periodo(data_inicio: date, data_fim: date) -> tuple:
+    """
+    Intervalo semiaberto [inicio, fim) ocupado pela reserva. Reservas de um
+    único dia (inicio == fim) ocupam aquele dia.
+    """
+    if data_fim < data_inicio:
+        raise HTTPException(status_code=400, detail="data_fim deve ser igual ou posterior a data_inicio")
+    return data_inicio, max(data_fim, data_inicio + timedelta(days=1))
+
+
+def ocupacao_maxima(reservas: list, inicio: date, fim: date) -> int:
+    """Maior número de reservas simultâneas dentro de [inicio, fim) (sweep line)"""
+    eventos = []
+    for reserva in reservas:
+        r_inicio, r_fim = periodo(
+            date.fromisoformat(reserva["data_inicio"]),
+            date.fromisoformat(reserva["data_fim"]),
+        )
+        r_inicio, r_fim = max(r_inicio, inicio), min(r_fim, fim)
+        if r_inicio < r_fim:
+            eventos.append((r_inicio, 1))
+            eventos.append((r_fim, -1))
+
+    # Saídas antes de entradas no mesmo dia: a vaga é liberada no check-out
+    eventos.sort(key=lambda e: (e[0], e[1]))
+    atual = maximo = 0
+    for _, delta in eventos:
+        atual += delta
+        maximo = max(maximo, atual)
+    return maximo
+
+
+def periodos_lotados(reservas: list, capacidade: int) -> list:
+    """
+    Intervalos [data_inicio, data_fim) em que as reservas ocupam toda a
+    capacidade do anfitrião (mesma varredura de ocupacao_maxima).
+    """
+    if capacidade <= 0:
+        return []
+
+    eventos = []
+    for reserva in reservas:
+        r_inicio, r_fim = periodo(
+            date.fromisoformat(reserva["data_inicio"]),
+            date.fromisoformat(reserva["data_fim"]),
+        )
+        eventos.append((r_inicio, 1))
+        eventos.append((r_fim, -1))
+    eventos.sort(key=lambda e: (e[0], e[1]))
+
+    lotados = []
+    atual = 0
+    inicio_lotado = None
+    for dia, delta in eventos:
+        atual += delta
+        if atual >= capacidade and inicio_lotado is None:
+            inicio_lotado = dia
+            # Check-out e check-in no mesmo dia: continua o intervalo anterior
+            if lotados and lotados[-1]["data_fim"] == dia.isoformat():
+                inicio_lotado = date.fromisoformat(lotados.pop()["data_inicio"])
+        elif atual < capacidade and inicio_lotado is not None:
+            if dia > inicio_lotado:
+                lotados.append({"data_inicio": inicio_lotado.isoformat(), "data_fim": dia.isoformat()})
+            inicio_lotado = None
+    return lotados
+
+
+async def _capacidade(id_anfitriao: int) -> int:
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    params = {"id_anfitriao": f"eq.{id_anfitriao}", "select": "capacidade_maxima"}
+    response = await supabase.get(url, params=params, headers=HEADERS)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    data = response.json()
+    if not data:
+        raise HTTPException(status_code=404, detail="Anfitrião não encontrado")
+    return data[0]["capacidade_maxima"] or 0
+
+
+async def _reservas_sobrepostas(id_anfitriao: int, inicio: date, fim: date, ignorar: Optional[int]) -> list:
+    """Só as reservas ativas que cruzam o intervalo, não o histórico do anfitrião"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    params = {
+        "id_anfitriao": f"eq.{id_anfitriao}",
+        "status": f"in.({','.join(STATUS_ATIVOS)})",
+        "data_inicio": f"lt.{fim.isoformat()}",
+        "data_fim": f"gte.{inicio.isoformat()}",
+        "select": "id_reserva,data_inicio,data_fim",
+    }
+    if ignorar is not None:
+        params["id_reserva"] = f"neq.{ignorar}"
+
+    response = await supabase.get(url, params=params, headers=HEADERS)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    return response.json()
+
+
+async def consultar_disponibilidade(
+    id_anfitriao: int,
+    data_inicio: date,
+    data_fim: date,
+    ignorar_reserva: Optional[int] = None,
+) -> dict:
+    """
+    RN004: verifica se o anfitrião tem vaga em todo o período.
+    Sempre 2 consultas ao Supabase (em paralelo), independente do histórico.
+    """
+    inicio, fim = periodo(data_inicio, data_fim)
+
+    capacidade, reservas = await asyncio.gather(
+        _capacidade(id_anfitriao),
+        _reservas_sobrepostas(id_anfitriao, inicio, fim, ignorar_reserva),
+    )
+
+    ocupacao = ocupacao_maxima(reservas, inicio, fim)
+    return {
+        "id_anfitriao": id_anfitriao,
+        "data_inicio": data_inicio.isoformat(),
+        "data_fim": data_fim.isoformat(),
+        "capacidade_maxima": capacidade,
+        "ocupacao_maxima": ocupacao,
+        "disponivel": ocupacao < capacidade,
+    }
+
+
+async def garantir_disponibilidade(
+    id_anfitriao: int,
+    data_inicio: date,
+    data_fim: date,
+    ignorar_reserva: Optional[int] = None,
+):
+    """Levanta 409 quando o período não cabe na capacidade do anfitrião"""
+    resultado = await consultar_disponibilidade(id_anfitriao, data_inicio, data_fim, ignorar_reserva)
+    if not resultado["disponivel"]:
+        raise HTTPException(status_code=409, detail=DETALHE_SEM_DISPONIBILIDADE)
+
+
+def erro_de_gravacao(response) -> HTTPException:
+    """
+    Erro de uma escrita em reservas. A recusa do trigger de capacidade
+    (23P01: outro worker ocupou a vaga depois da verificação) vira o mesmo
+    409 de garantir_disponibilidade.
+    """
+    try:
+        codigo = response.json().get("code")
+    except (ValueError, AttributeError):
+        codigo = None
+    if codigo == SEM_DISPONIBILIDADE:
+        return HTTPException(status_code=409, detail=DETALHE_SEM_DISPONIBILIDADE)
+    return HTTPException(status_code=response.status_code, detail=response.text)
+
+
+async def _capacidades(ids_anfitriao: list) -> dict:
+    url = f"{SUPABASE_URL}/rest/v1/anfitrioes"
+    params = {"id_anfitriao": in_filter(ids_anfitriao), "select": "id_anfitriao,capacidade_maxima"}
+    response = await supabase.get(url, params=params, headers=HEADERS)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    return {a["id_anfitriao"]: a["capacidade_maxima"] or 0 for a in response.json()}
+
+
+async def _reservas_ativas(ids_anfitriao: list, inicio: date, fim: date) -> dict:
+    """Reservas ativas dos anfitriões que cruzam [inicio, fim), agrupadas por anfitrião"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    params = {
+        "id_anfitriao": in_filter(ids_anfitriao),
+        "status": f"in.({','.join(STATUS_ATIVOS)})",
+        "data_inicio": f"lt.{fim.isoformat()}",
+        "data_fim": f"gte.{inicio.isoformat()}",
+        "select": "id_reserva,id_anfitriao,data_inicio,data_fim",
+    }
+    response = await supabase.get(url, params=params, headers=HEADERS)
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    por_anfitriao = {}
+    for reserva in response.json():
+        por_anfitriao.setdefault(reserva["id_anfitriao"], []).append(reserva)
+    return por_anfitriao
+
+
+async def disponibilidade_lote(novas: list) -> list:
+    """
+    RN004 para um lote de reservas [(id_anfitriao, data_inicio, data_fim)].
+    Sempre 2 consultas ao Supabase (em paralelo) para o lote inteiro; cada
+    reserva aceita passa a ocupar vaga para as seguintes do mesmo lote.
+    Retorna, na ordem recebida, None (cabe) ou o motivo da recusa.
+    Deve ser chamada sob lock_anfitrioes dos anfitriões envolvidos.
+    """
+    periodos = [periodo(data_inicio, data_fim) for _, data_inicio, data_fim in novas]
+    ids_anfitriao = list(dict.fromkeys(id_anfitriao for id_anfitriao, _, _ in novas))
+    inicio = min(p[0] for p in periodos)
+    fim = max(p[1] for p in periodos)
+
+    capacidades, agenda = await asyncio.gather(
+        _capacidades(ids_anfitriao),
+        _reservas_ativas(ids_anfitriao, inicio, fim),
+    )
+
+    motivos = []
+    for (id_anfitriao, data_inicio, data_fim), (r_inicio, r_fim) in zip(novas, periodos):
+        if id_anfitriao not in capacidades:
+            motivos.append("anfitriao_nao_encontrado")
+            continue
+
+        reservas = agenda.setdefault(id_anfitriao, [])
+        if ocupacao_maxima(reservas, r_inicio, r_fim) >= capacidades[id_anfitriao]:
+            motivos.append("sem_disponibilidade")
+            continue
+
+        reservas.append({"data_inicio": data_inicio.isoformat(), "data_fim": data_fim.isoformat()})
+        motivos.append(None)
+    return motivos
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 
 class ReservaCreate(BaseModel):
@@ -12,4 +12,8 @@ class ReservaCreate(BaseModel):
 class ReservaUpdate(BaseModel):
     data_inicio: Optional[date]
     data_fim: Optional[date]
-    status: Optional[str]
\ No newline at end of file
+    status: Optional[str]
+
+class ReservaStatusLote(BaseModel):
+    ids: List[int]
+    status: str
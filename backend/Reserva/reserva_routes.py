@@ -1,98 +1,204 @@
-from fastapi import APIRouter, HTTPException
-import requests
+from contextlib import nullcontext
+from datetime import date
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
 from starlette.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
-from utils.config import SUPABASE_URL, SUPABASE_KEY
-from Reserva.dto.CreateReserva import ReservaCreate, ReservaUpdate
+from utils.config import SUPABASE_URL
+from utils.supabase_client import supabase, HEADERS, HEADERS_MINIMAL
+from utils.http_cache import CACHE_PRIVADO
+from utils.prazos import PRAZO_LOTES
+from utils.pagination import Pagina, fetch_page
+from utils.projecao import Projecao, Retorno
+from utils.respostas import buscar_um, carregar, repassar
+from utils.ids import in_filter
+from utils.lote import verificar_lote, resultados_por_id
+from Reserva.dto.CreateReserva import ReservaCreate, ReservaUpdate, ReservaStatusLote
+from Reserva.disponibilidade import (
+    STATUS_ATIVOS,
+    consultar_disponibilidade,
+    disponibilidade_lote,
+    garantir_disponibilidade,
+    lock_anfitriao,
+    lock_anfitrioes,
+    erro_de_gravacao,
+)
 
 reserva_router = APIRouter(prefix='/reservas', tags=['reserva'])
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
+# Colunas aceitas em ?sort= nas listagens (além da chave primária)
+ORDENAVEIS = ("data_inicio", "data_fim")
 
-@reserva_router.get("/", status_code=HTTP_200_OK)
-def get_reservas():
-    """Retorna todas as reservas"""
-    url = f"{SUPABASE_URL}/rest/v1/reservas"
-    response = requests.get(url, headers=HEADERS)
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+# ?fields= nas leituras e escritas (default: todas as colunas)
+PROJECAO = Projecao("*")
 
-    return response.json()
+@reserva_router.get("/", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_reservas(pagina: Pagina = Depends(), select: str = Depends(PROJECAO)):
+    """Retorna as reservas, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    params = {"select": select}
+    return await fetch_page(url, pagina, "id_reserva", ORDENAVEIS, params)
 
-@reserva_router.get("/{id}", status_code=HTTP_200_OK)
-def get_reserva_by_id(id: int):
+@reserva_router.get("/{id}", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_reserva_by_id(id: int, select: str = Depends(PROJECAO)):
     """Retorna uma reserva específica por ID"""
-    url = f"{SUPABASE_URL}/rest/v1/reservas?id_reserva=eq.{id}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    # Registro único como objeto: os bytes do PostgREST vão direto ao cliente
+    return repassar(await buscar_um(url, {"id_reserva": f"eq.{id}", "select": select}, "Reserva não encontrada"))
+
+@reserva_router.get("/tutor/{id_tutor}", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_reservas_by_tutor(
+    id_tutor: int,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna as reservas de um tutor específico, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    params = {"id_tutor": f"eq.{id_tutor}", "select": select}
+    return await fetch_page(url, pagina, "id_reserva", ORDENAVEIS, params)
+
+@reserva_router.get("/anfitriao/{id_anfitriao}", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_reservas_by_anfitriao(
+    id_anfitriao: int,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna as reservas de um anfitrião específico, paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    params = {"id_anfitriao": f"eq.{id_anfitriao}", "select": select}
+    return await fetch_page(url, pagina, "id_reserva", ORDENAVEIS, params)
+
+@reserva_router.get("/anfitriao/{id_anfitriao}/disponibilidade", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_disponibilidade(id_anfitriao: int, data_inicio: date, data_fim: date):
+    """Informa se o anfitrião tem vaga no período (capacidade x reservas sobrepostas)"""
+    return await consultar_disponibilidade(id_anfitriao, data_inicio, data_fim)
+
+@reserva_router.get("/status/{status}", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_reservas_by_status(
+    status: str,
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+):
+    """Retorna as reservas filtradas por status (pendente, confirmada, concluida, cancelada), paginadas por cursor"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    params = {"status": f"eq.{status}", "select": select}
+    return await fetch_page(url, pagina, "id_reserva", ORDENAVEIS, params)
 
-    data = response.json()
-    if not data:
-        raise HTTPException(status_code=404, detail="Reserva não encontrada")
+@reserva_router.post("/", status_code=HTTP_201_CREATED)
+async def create_reserva(reserva: ReservaCreate, select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
+    """Cria uma nova reserva (RN004: valida disponibilidade de datas e capacidade do anfitrião)"""
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
     
-    return data[0]
+    reserva_dict = _para_json(reserva)
 
-@reserva_router.get("/tutor/{id_tutor}", status_code=HTTP_200_OK)
-def get_reservas_by_tutor(id_tutor: int):
-    """Retorna todas as reservas de um tutor específico"""
-    url = f"{SUPABASE_URL}/rest/v1/reservas?id_tutor=eq.{id_tutor}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    # Verificação e gravação sob o mesmo lock: evita double-booking concorrente
+    async with lock_anfitriao(reserva.id_anfitriao):
+        if reserva.status in STATUS_ATIVOS:
+            await garantir_disponibilidade(reserva.id_anfitriao, reserva.data_inicio, reserva.data_fim)
 
-    return response.json()
+        response = await supabase.post(url, json=reserva_dict, params=retorno.params(select), headers=retorno.headers)
 
-@reserva_router.get("/anfitriao/{id_anfitriao}", status_code=HTTP_200_OK)
-def get_reservas_by_anfitriao(id_anfitriao: int):
-    """Retorna todas as reservas de um anfitrião específico"""
-    url = f"{SUPABASE_URL}/rest/v1/reservas?id_anfitriao=eq.{id_anfitriao}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    if response.status_code != 201:
+        raise erro_de_gravacao(response)
+
+    return retorno.resposta(response)
+
+@reserva_router.post("/batch", status_code=HTTP_201_CREATED, dependencies=PRAZO_LOTES)
+async def create_reservas_lote(reservas: List[ReservaCreate], select: str = Depends(PROJECAO)):
+    """
+    Cria várias reservas em uma única inserção no Supabase. Período
+    inválido e RN004 são verificados por item: as reservas recusadas são
+    informadas no resultado do item, as demais são gravadas.
+    """
+    verificar_lote(reservas)
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
 
-    return response.json()
+    motivos = {i: "periodo_invalido" for i, reserva in enumerate(reservas) if reserva.data_fim < reserva.data_inicio}
+    ativas = [i for i, reserva in enumerate(reservas) if reserva.status in STATUS_ATIVOS and i not in motivos]
+    criadas = []
+
+    async with lock_anfitrioes(reservas[i].id_anfitriao for i in ativas):
+        if ativas:
+            recusas = await disponibilidade_lote([
+                (reservas[i].id_anfitriao, reservas[i].data_inicio, reservas[i].data_fim) for i in ativas
+            ])
+            motivos.update({i: motivo for i, motivo in zip(ativas, recusas) if motivo})
+
+        aceitas = [_para_json(reserva) for i, reserva in enumerate(reservas) if i not in motivos]
+        if aceitas:
+            # Recusa do banco (vaga tomada por outro worker) desfaz a inserção inteira: 409
+            response = await supabase.post(url, json=aceitas, params={"select": select}, headers=HEADERS)
+
+            if response.status_code != 201:
+                raise erro_de_gravacao(response)
+
+            criadas = response.json()
+
+    # O PostgREST devolve as linhas inseridas na ordem enviada
+    linhas = iter(criadas)
+    resultados = []
+    for i in range(len(reservas)):
+        if i in motivos:
+            resultados.append({"indice": i, "status": motivos[i]})
+        else:
+            resultados.append({"indice": i, "status": "criada", "reserva": next(linhas, None)})
+
+    return {"criadas": len(reservas) - len(motivos), "resultados": resultados}
+
+@reserva_router.patch("/batch/status", status_code=HTTP_200_OK, dependencies=PRAZO_LOTES)
+async def update_status_reservas_lote(lote: ReservaStatusLote):
+    """
+    Altera o status de várias reservas (ex.: confirmar ou cancelar) com um
+    único PATCH id_reserva=in.(...). Reativar uma reserva cancelada ou
+    concluída passa pela RN004. Resultado informado por id.
+    """
+    verificar_lote(lote.ids)
+    ids = list(dict.fromkeys(lote.ids))
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
 
-@reserva_router.get("/status/{status}", status_code=HTTP_200_OK)
-def get_reservas_by_status(status: str):
-    """Retorna reservas filtradas por status (pendente, confirmada, concluida, cancelada)"""
-    url = f"{SUPABASE_URL}/rest/v1/reservas?status=eq.{status}"
-    response = requests.get(url, headers=HEADERS)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    reativadas = []
+    if lote.status in STATUS_ATIVOS:
+        params = {"id_reserva": in_filter(ids), "select": "id_reserva,id_anfitriao,data_inicio,data_fim,status"}
+        atuais = await supabase.get(url, params=params, headers=HEADERS)
 
-    return response.json()
+        if atuais.status_code != 200:
+            raise HTTPException(status_code=atuais.status_code, detail=atuais.text)
 
-@reserva_router.post("/", status_code=HTTP_201_CREATED)
-def create_reserva(reserva: ReservaCreate):
-    """Cria uma nova reserva (RN004: validar disponibilidade de datas)"""
-    url = f"{SUPABASE_URL}/rest/v1/reservas"
-    
-    # Converte datas para string no formato ISO
+        reativadas = [r for r in atuais.json() if r["status"] not in STATUS_ATIVOS]
+
+    motivos = {}
+    atualizados = set()
+    async with lock_anfitrioes(r["id_anfitriao"] for r in reativadas):
+        if reativadas:
+            recusas = await disponibilidade_lote([
+                (r["id_anfitriao"], date.fromisoformat(r["data_inicio"]), date.fromisoformat(r["data_fim"]))
+                for r in reativadas
+            ])
+            motivos = {r["id_reserva"]: motivo for r, motivo in zip(reativadas, recusas) if motivo}
+
+        aceitos = [id_reserva for id_reserva in ids if id_reserva not in motivos]
+        if aceitos:
+            params = {"id_reserva": in_filter(aceitos), "select": "id_reserva"}
+            response = await supabase.patch(url, params=params, json={"status": lote.status}, headers=HEADERS)
+
+            if response.status_code != 200:
+                raise erro_de_gravacao(response)
+
+            atualizados = {r["id_reserva"] for r in response.json()}
+
+    return resultados_por_id(ids, atualizados, motivos)
+
+def _para_json(reserva: ReservaCreate) -> dict:
+    """Converte datas para string no formato ISO"""
     reserva_dict = reserva.dict()
     reserva_dict['data_inicio'] = str(reserva_dict['data_inicio'])
     reserva_dict['data_fim'] = str(reserva_dict['data_fim'])
-    
-    response = requests.post(url, json=reserva_dict, headers=HEADERS)
-
-    if response.status_code != 201:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-
-    return response.json()
+    return reserva_dict
 
 @reserva_router.put("/{id}", status_code=HTTP_200_OK)
-def update_reserva(id: int, reserva: ReservaUpdate):
+async def update_reserva(id: int, reserva: ReservaUpdate, select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
     """Atualiza uma reserva existente"""
-    url = f"{SUPABASE_URL}/rest/v1/reservas?id_reserva=eq.{id}"
+    url = f"{SUPABASE_URL}/rest/v1/reservas"
+    filtro = {"id_reserva": f"eq.{id}"}
     
     # Remove campos None do update e converte datas
     update_data = {}
@@ -102,19 +208,38 @@ def update_reserva(id: int, reserva: ReservaUpdate):
                 update_data[k] = str(v)
             else:
                 update_data[k] = v
-    
-    response = requests.patch(url, json=update_data, headers=HEADERS)
 
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    # RN004: nova data ou reativação precisa caber na capacidade do anfitrião
+    lock = nullcontext()
+    verificar = None
+    if 'data_inicio' in update_data or 'data_fim' in update_data or update_data.get('status') in STATUS_ATIVOS:
+        params = {**filtro, "select": "id_anfitriao,status,data_inicio,data_fim"}
+        atual = carregar(await buscar_um(url, params, "Reserva não encontrada"))
+        if update_data.get('status', atual['status']) in STATUS_ATIVOS:
+            verificar = (
+                atual['id_anfitriao'],
+                reserva.data_inicio or date.fromisoformat(atual['data_inicio']),
+                reserva.data_fim or date.fromisoformat(atual['data_fim']),
+            )
+            lock = lock_anfitriao(atual['id_anfitriao'])
+
+    async with lock:
+        if verificar:
+            await garantir_disponibilidade(*verificar, ignorar_reserva=id)
+
+        params = {**filtro, **retorno.params(select)}
+        response = await supabase.patch(url, json=update_data, params=params, headers=retorno.headers)
+
+    if response.status_code not in (200, 204):
+        raise erro_de_gravacao(response)
 
-    return response.json()
+    return retorno.resposta(response)
 
 @reserva_router.delete("/{id}", status_code=HTTP_204_NO_CONTENT)
-def delete_reserva_by_id(id: int):
+async def delete_reserva_by_id(id: int):
     """Deleta uma reserva por ID"""
     url = f"{SUPABASE_URL}/rest/v1/reservas?id_reserva=eq.{id}"
-    response = requests.delete(url, headers=HEADERS)
+    response = await supabase.delete(url, headers=HEADERS_MINIMAL)
 
     if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
@@ -1,49 +1,92 @@
+import asyncio
+import time
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from starlette.status import HTTP_200_OK
-import os
 import uuid
 from s3_client import s3, AWS_BUCKET_NAME
+from utils import metricas, prazos, tracing
+from utils.imagens import ler_validando, processar_imagem
 
 upload_router = APIRouter(prefix='/upload', tags=['upload'])
 
+
+async def _s3(operacao: str, **kwargs):
+    """Chamada boto3 no threadpool, limitada ao prazo da requisição e com a latência registrada por operação"""
+    inicio = time.perf_counter()
+    try:
+        # O boto3 não é cancelável: para de esperar quando o prazo da requisição acaba
+        return await asyncio.wait_for(run_in_threadpool(getattr(s3, operacao), **kwargs), prazos.restante())
+    finally:
+        metricas.S3_DURACAO.observar(time.perf_counter() - inicio, operacao)
+        tracing.registrar("s3", operacao, inicio, bytes=len(kwargs.get("Body", b"")))
+
+
+async def _enviar_s3(key: str, content_type: str, conteudo: bytes):
+    """
+    put_object de uma variante, com o boto3 fora do event loop. As variantes
+    já saem reduzidas (no máximo IMAGE_ORIGINAL_MAX_SIZE px), então uma
+    única chamada basta: não há multipart.
+    """
+    await _s3(
+        "put_object",
+        Bucket=AWS_BUCKET_NAME,
+        Key=key,
+        Body=conteudo,
+        ContentType=content_type,
+    )
+    metricas.UPLOAD_BYTES.inc("s3", valor=len(conteudo))
+
+
 @upload_router.post("/image", status_code=HTTP_200_OK)
 async def upload_image(file: UploadFile = File(...)):
     """
-    Upload uma imagem PNG para o S3 e retorna a URL pública
+    Upload uma imagem PNG/JPG para o S3 e retorna a URL pública do original
+    (JPEG sem EXIF) e das variantes thumb/medium (WebP)
     """
     try:
         # Validar se as variáveis de ambiente S3 estão configuradas
         if not AWS_BUCKET_NAME:
             raise HTTPException(status_code=500, detail="Configuração S3 não inicializada. Verifique variáveis de ambiente AWS_BUCKET_NAME")
 
-        # Validar tipo de arquivo
-        if file.content_type not in ["image/png", "image/jpeg", "image/jpg"]:
-            raise HTTPException(status_code=400, detail="Apenas arquivos PNG e JPG são permitidos")
-
-        # Validar tamanho (máximo 5MB)
-        contents = await file.read()
-        if len(contents) > 5 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Arquivo muito grande (máximo 5MB)")
-
-        # Gerar nome único para o arquivo
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"anfitrioes/{uuid.uuid4()}{file_extension}"
-
-        # Fazer upload para S3
-        s3.put_object(
-            Bucket=AWS_BUCKET_NAME,
-            Key=unique_filename,
-            Body=contents,
-            ContentType=file.content_type
+        # Validar tipo (magic bytes) e tamanho durante a leitura
+        contents = await ler_validando(file)
+
+        # Gerar variantes no pool de processos
+        variantes = await processar_imagem(contents)
+
+        # Gerar nomes únicos para as variantes
+        base = f"anfitrioes/{uuid.uuid4()}"
+        keys = {
+            nome: f"{base}.{extensao}" if nome == "original" else f"{base}_{nome}.{extensao}"
+            for nome, (_, extensao, _) in variantes.items()
+        }
+
+        # Fazer upload para S3 (variantes em paralelo; desfaz tudo se alguma falhar)
+        resultados = await asyncio.gather(
+            *(
+                _enviar_s3(keys[nome], content_type, dados)
+                for nome, (dados, _, content_type) in variantes.items()
+            ),
+            return_exceptions=True,
         )
+        erros = [r for r in resultados if isinstance(r, BaseException)]
+        if erros:
+            await _s3(
+                "delete_objects",
+                Bucket=AWS_BUCKET_NAME,
+                Delete={"Objects": [{"Key": key} for key in keys.values()]},
+            )
+            raise erros[0]
 
-        # Construir URL pública do S3
-        image_url = f"https://{AWS_BUCKET_NAME}.s3.amazonaws.com/{unique_filename}"
+        # Construir URLs públicas do S3
+        urls = {nome: f"https://{AWS_BUCKET_NAME}.s3.amazonaws.com/{key}" for nome, key in keys.items()}
 
         return {
             "success": True,
-            "image_url": image_url,
-            "filename": unique_filename
+            "image_url": urls["original"],
+            "filename": keys["original"],
+            "variantes": urls,
         }
 
     except HTTPException:
@@ -1,52 +1,67 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-import  requests
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import Optional
 from starlette.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT
-import uuid
 from datetime import datetime
-from utils.config import SUPABASE_URL, SUPABASE_KEY, bcrypt_context
+from utils.config import SUPABASE_URL
+from utils.senhas import gerar_hash, verificar_senha
+from utils.supabase_client import supabase, HEADERS, HEADERS_MINIMAL
+from utils.http_cache import CACHE_PRIVADO
+from utils.compressao import COMPRESSAO_LISTAS
+from utils.storage import upload_imagens, remover_objetos, public_urls
+from utils.pagination import Pagina, fetch_page
+from utils.projecao import Projecao, Retorno
+from utils.respostas import buscar_um, repassar
+from utils.ids import parse_ids, buscar_por_ids
+from utils.cache import anfitrioes_cache
 from Usuario.dto.LoginRequest import LoginRequest  # e LoginResponse se for usar
 
 from Usuario.dto.CreateUsuario import UsuarioCreate, UsuarioUpdate
 
 usuario_router = APIRouter(prefix='/usuarios', tags=['usuario'])
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
-
-@usuario_router.get("/", status_code=HTTP_200_OK)
-def get_usuarios():
+# Colunas aceitas em ?sort= nas listagens (além da chave primária)
+ORDENAVEIS = ("nome", "data_cadastro")
+
+# Colunas devolvidas por padrão: senha_hash nunca sai da API.
+# foto_perfil_variantes vem de migrations/001_variantes_de_imagem.sql
+CAMPOS_PADRAO = (
+    "id_usuario,nome,email,telefone,tipo,data_cadastro,logradouro,numero,"
+    "bairro,cidade,uf,cep,complemento,foto_perfil_url,foto_perfil_variantes"
+)
+PROJECAO = Projecao(CAMPOS_PADRAO, proibidos=("senha_hash",))
+
+# O login só precisa destas colunas (inclui o hash para verificar a senha)
+CAMPOS_LOGIN = "id_usuario,nome,email,tipo,telefone,senha_hash"
+
+@usuario_router.get("/", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO + COMPRESSAO_LISTAS)
+async def get_usuarios(
+    pagina: Pagina = Depends(),
+    select: str = Depends(PROJECAO),
+    ids: Optional[str] = None,
+):
+    """
+    Retorna os usuários, paginados por cursor. Com ?ids=1,2,3 busca só
+    esses usuários numa única consulta, chaveados por id.
+    """
     url = f"{SUPABASE_URL}/rest/v1/usuarios"
-    response = requests.get(url, headers=HEADERS)
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-
-    return response.json()
+    if ids:
+        return await buscar_por_ids(url, "id_usuario", parse_ids(ids), select)
 
-@usuario_router.get("/{id}", status_code=HTTP_200_OK)
-def get_usuario_by_id(id: int):
-    url = f"{SUPABASE_URL}/rest/v1/usuarios?id_usuario=eq.{id}"
-    response = requests.get(url, headers=HEADERS)
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+    params = {"select": select}
+    return await fetch_page(url, pagina, "id_usuario", ORDENAVEIS, params)
 
-    data = response.json()
-
-    if not data:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-
-    return data[0]
+@usuario_router.get("/{id}", status_code=HTTP_200_OK, dependencies=CACHE_PRIVADO)
+async def get_usuario_by_id(id: int, select: str = Depends(PROJECAO)):
+    url = f"{SUPABASE_URL}/rest/v1/usuarios"
+    # Registro único como objeto: os bytes do PostgREST vão direto ao cliente
+    return repassar(await buscar_um(url, {"id_usuario": f"eq.{id}", "select": select}, "Usuário não encontrado"))
 
 @usuario_router.post("/", status_code=HTTP_201_CREATED)
-def create_usuario(usuario: UsuarioCreate):
+async def create_usuario(usuario: UsuarioCreate, select: str = Depends(PROJECAO), retorno: Retorno = Depends()):
     url = f"{SUPABASE_URL}/rest/v1/usuarios"
 
-    usuario.senha_hash = bcrypt_context.hash(usuario.senha_hash)
+    # bcrypt é CPU-bound: roda no pool de processos de hash
+    usuario.senha_hash = await gerar_hash(usuario.senha_hash)
     
     # Set default data_cadastro if not provided
     if not usuario.data_cadastro:
@@ -55,31 +70,35 @@ def create_usuario(usuario: UsuarioCreate):
     # Convert to dict and remove None values
     usuario_data = {k: v for k, v in usuario.dict().items() if v is not None}
 
-    response = requests.post(url, json=usuario_data, headers=HEADERS)
+    response = await supabase.post(url, json=usuario_data, params=retorno.params(select), headers=retorno.headers)
 
     if response.status_code != 201:
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
-    return response.json()
+    return retorno.resposta(response)
 
 @usuario_router.delete("/{id}", status_code=HTTP_204_NO_CONTENT)
-def delete_usuario_by_id(id: int):
+async def delete_usuario_by_id(id: int):
     url = f"{SUPABASE_URL}/rest/v1/usuarios?id_usuario=eq.{id}"
-    response = requests.delete(url, headers=HEADERS)
+    response = await supabase.delete(url, headers=HEADERS_MINIMAL)
 
     if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
+    # O join de anfitriões embute dados do usuário
+    anfitrioes_cache.clear()
+
     return None
 
 @usuario_router.post("/login", status_code=HTTP_200_OK)
-def login_usuario(login_data: LoginRequest):
+async def login_usuario(login_data: LoginRequest):
     """
     Autentica um usuário com email e senha.
     """
     # 1. Buscar usuário pelo email
-    url = f"{SUPABASE_URL}/rest/v1/usuarios?email=eq.{login_data.email}"
-    response = requests.get(url, headers=HEADERS)
+    url = f"{SUPABASE_URL}/rest/v1/usuarios"
+    params = {"email": f"eq.{login_data.email}", "select": CAMPOS_LOGIN}
+    response = await supabase.get(url, params=params, headers=HEADERS)
 
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
@@ -93,9 +112,19 @@ def login_usuario(login_data: LoginRequest):
     usuario = usuarios[0]
 
     # 3. Verificar senha (bcrypt)
-    if not bcrypt_context.verify(login_data.senha, usuario["senha_hash"]):
+    senha_ok, novo_hash = await verificar_senha(login_data.senha, usuario["senha_hash"])
+    if not senha_ok:
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
 
+    # 3.1 Hash gerado com outro custo (BCRYPT_ROUNDS mudou): regrava com o atual.
+    # Melhor esforço: uma falha aqui não impede o login
+    if novo_hash:
+        url_update = f"{SUPABASE_URL}/rest/v1/usuarios?id_usuario=eq.{usuario['id_usuario']}"
+        try:
+            await supabase.patch(url_update, json={"senha_hash": novo_hash}, headers=HEADERS_MINIMAL)
+        except Exception:
+            pass
+
     # 4. Montar resposta (sem senha)
     return {
         "id_usuario": usuario["id_usuario"],
@@ -107,13 +136,19 @@ def login_usuario(login_data: LoginRequest):
     }
 
 @usuario_router.put("/{id}", status_code=HTTP_200_OK)
-def update_usuario(id: int, usuario_update: UsuarioUpdate):
+async def update_usuario(
+    id: int,
+    usuario_update: UsuarioUpdate,
+    select: str = Depends(PROJECAO),
+    retorno: Retorno = Depends(),
+):
     """
     Atualiza parcialmente os dados de um usuário existente.
     Usado, por exemplo, após o cadastro inicial para completar informações
     na tela InfoAdc (foto de perfil, endereço, etc.).
     """
-    url = f"{SUPABASE_URL}/rest/v1/usuarios?id_usuario=eq.{id}"
+    url = f"{SUPABASE_URL}/rest/v1/usuarios"
+    params = {"id_usuario": f"eq.{id}", **retorno.params(select)}
 
     # Converte para dict e remove campos None para não sobrescrever com null
     update_data = {k: v for k, v in usuario_update.dict().items() if v is not None}
@@ -121,65 +156,43 @@ def update_usuario(id: int, usuario_update: UsuarioUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="Nenhum dado para atualizar")
 
-    response = requests.patch(url, json=update_data, headers=HEADERS)  # PATCH para atualização parcial
+    response = await supabase.patch(url, json=update_data, params=params, headers=retorno.headers)  # PATCH para atualização parcial
 
     if response.status_code not in (200, 204):
         raise HTTPException(status_code=response.status_code, detail=response.text)
 
+    # O join de anfitriões embute dados do usuário
+    anfitrioes_cache.clear()
+
     # Supabase REST com Prefer=return=representation normalmente retorna o registro atualizado
-    return response.json()
+    return retorno.resposta(response)
 
 @usuario_router.post("/{id}/foto-perfil", status_code=HTTP_200_OK)
 async def upload_foto_perfil(id: int, arquivo: UploadFile = File(...)):
     """
     Faz upload da foto de perfil do usuário para o bucket 'usuarios'
-    no Supabase Storage e atualiza o campo foto_perfil_url na tabela usuarios.
+    no Supabase Storage e atualiza os campos foto_perfil_url e
+    foto_perfil_variantes na tabela usuarios.
     """
-    # 1. Ler conteúdo do arquivo
-    conteudo = await arquivo.read()
-
-    # 2. Gerar um nome de arquivo único
-    extensao = arquivo.filename.split(".")[-1] if "." in arquivo.filename else "jpg"
-    nome_arquivo = f"perfil_{id}_{uuid.uuid4().hex}.{extensao}"
-    caminho_storage = f"perfil/{id}/{nome_arquivo}"
-
-    # 3. Upload para o Supabase Storage
-    storage_url = f"{SUPABASE_URL}/storage/v1/object/usuarios/{caminho_storage}"
-
-    storage_headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": arquivo.content_type or "image/jpeg",
-    }
-
-    storage_response = requests.post(
-        storage_url,
-        headers=storage_headers,
-        data=conteudo,
-    )
-
-    if storage_response.status_code not in (200, 201):
-        raise HTTPException(
-            status_code=storage_response.status_code,
-            detail=f"Erro ao fazer upload da imagem: {storage_response.text}",
-        )
+    # 1. Gerar thumb/medium/original (sem EXIF) e enviar para o Supabase Storage
+    caminhos = (await upload_imagens("usuarios", f"perfil/{id}", f"perfil_{id}", [arquivo]))[0]
 
-    # 4. Montar URL pública (se o bucket estiver público)
-    # Formato típico de URL pública:
-    # {SUPABASE_URL}/storage/v1/object/public/<nome_bucket>/<caminho>
-    foto_perfil_url = f"{SUPABASE_URL}/storage/v1/object/public/usuarios/{caminho_storage}"
+    # 2. Montar URLs públicas (foto_perfil_url continua apontando para o original)
+    foto_perfil_variantes = public_urls("usuarios", caminhos)
+    foto_perfil_url = foto_perfil_variantes["original"]
 
-    # 5. Atualizar o usuário com a foto_perfil_url
+    # 3. Atualizar o usuário com a foto_perfil_url
     url_update = f"{SUPABASE_URL}/rest/v1/usuarios?id_usuario=eq.{id}"
-    update_data = {"foto_perfil_url": foto_perfil_url}
+    update_data = {"foto_perfil_url": foto_perfil_url, "foto_perfil_variantes": foto_perfil_variantes}
 
-    update_response = requests.patch(url_update, json=update_data, headers=HEADERS)
+    update_response = await supabase.patch(url_update, json=update_data, headers=HEADERS_MINIMAL)
 
     if update_response.status_code not in (200, 204):
+        await remover_objetos("usuarios", list(caminhos.values()))
         raise HTTPException(
             status_code=update_response.status_code,
             detail=f"Erro ao atualizar usuário com URL da foto: {update_response.text}",
         )
 
-    # 6. Retornar a URL da foto
-    return {"foto_perfil_url": foto_perfil_url}
\ No newline at end of file
+    # 4. Retornar a URL da foto
+    return {"foto_perfil_url": foto_perfil_url, "foto_perfil_variantes": foto_perfil_variantes}
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""
+Benchmarks de carga da API contra um Supabase (PostgREST + Storage) e um
+S3 falsos, em processo e com latência configurável. Uso (de backend/):
+
+    python -m bench --perfil pequeno --saida bench/baselines/pequeno.json
+    python -m bench --perfil pequeno --comparar bench/baselines/pequeno.json
+
+Ver `python -m bench --help` e tests.md.
+"""
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+# Antes de qualquer import da app: o Supabase e o S3 verdadeiros nunca são
+# usados, e todas as requisições saem do mesmo "IP" (sem rate limit)
+os.environ.setdefault("SUPABASE_URL", "http://supabase.bench")
+os.environ.setdefault("SUPABASE_KEY", "chave-bench")
+os.environ.setdefault("AWS_BUCKET_NAME", "bench")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from bench import executar as bench
+from bench.cenarios import CENARIOS, Contexto, rotas_sem_cenario
+from bench.dados import PERFIS, SENHA, Volumes, gerar
+from bench.falsos import Latencia, S3Falso, SupabaseFalso
+from bench.postgrest import Banco
+
+
+def _latencia(texto: str) -> tuple:
+    """"base:cauda" em ms (ex.: 5:3)"""
+    base, _, cauda = texto.partition(":")
+    return float(base), float(cauda or 0)
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(
+        prog="python -m bench",
+        description="Benchmark de carga das rotas da API contra Supabase/S3 falsos em processo",
+    )
+    parser.add_argument("--perfil", choices=sorted(PERFIS), default="pequeno", help="volume de dados (default: pequeno)")
+    parser.add_argument("--usuarios", type=int, help="sobrescreve a quantidade de usuários do perfil")
+    parser.add_argument("--reservas", type=int, help="sobrescreve a quantidade de reservas do perfil")
+    parser.add_argument("--concorrencia", default="1,8,32", help="níveis de concorrência (default: 1,8,32)")
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por cenário e nível (default: 200)")
+    parser.add_argument("--aquecimento", type=int, default=10, help="requisições fora da medição por cenário")
+    parser.add_argument("--rotas", help="regex sobre 'MÉTODO /rota' para rodar só alguns cenários")
+    parser.add_argument("--rest", type=_latencia, default=(5, 3), metavar="BASE:CAUDA", help="latência do PostgREST em ms (default: 5:3)")
+    parser.add_argument("--storage", type=_latencia, default=(20, 10), metavar="BASE:CAUDA", help="latência do Storage em ms (default: 20:10)")
+    parser.add_argument("--s3", type=_latencia, default=(30, 15), metavar="BASE:CAUDA", help="latência do S3 em ms (default: 30:15)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--alocacoes", action="store_true", help="pico de alocações por medição (tracemalloc; mais lento)")
+    parser.add_argument("--saida", help="grava o relatório JSON (ex.: bench/baselines/pequeno.json)")
+    parser.add_argument("--comparar", help="baseline JSON para comparar; sai com código 1 se houver regressão")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="variação aceita na comparação (default: 0.2 = 20%%)")
+    return parser.parse_args()
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _progresso(cenario, concorrencia, medicao):
+    print(
+        f"{cenario.nome:<55} c={concorrencia:<3} {medicao['rps']:>8.1f} req/s"
+        f"  p50 {medicao['p50_ms']:>8.2f}  p95 {medicao['p95_ms']:>8.2f}  p99 {medicao['p99_ms']:>8.2f} ms"
+        f"  erros {medicao['erros']}  recusadas {medicao['recusadas']}",
+        flush=True,
+    )
+
+
+def main() -> int:
+    args = _argumentos()
+
+    from main import app
+    from utils import config, senhas
+
+    # Uma linha JSON por requisição amostrada atrapalharia a saída; o trace em si continua sendo medido
+    logging.getLogger("lardocepet.tracing").setLevel(logging.WARNING)
+
+    perfil = PERFIS[args.perfil]
+    volumes = Volumes(args.usuarios or perfil["usuarios"], args.reservas or perfil["reservas"])
+    concorrencias = tuple(int(c) for c in args.concorrencia.split(","))
+
+    cenarios = CENARIOS
+    if args.rotas:
+        cenarios = [cenario for cenario in CENARIOS if re.search(args.rotas, cenario.nome)]
+    for rota in rotas_sem_cenario(app):
+        print(f"aviso: rota sem cenário: {rota}", file=sys.stderr)
+
+    # Dados gerados uma vez; o hash tem o custo atual para o login não regravar a senha
+    inicio, rss_inicial = time.perf_counter(), bench.rss_mb()
+    senha_hash = senhas.contexto(config.BCRYPT_ROUNDS).hash(SENHA)
+    banco = Banco(gerar(volumes, senha_hash, args.semente))
+    print(
+        f"dados: {volumes.como_dict()} em {time.perf_counter() - inicio:.1f}s, "
+        f"{bench.rss_mb() - rss_inicial:.0f} MB",
+        flush=True,
+    )
+
+    latencias = {
+        "rest": Latencia(*args.rest, semente=args.semente),
+        "storage": Latencia(*args.storage, semente=args.semente + 1),
+        "s3": Latencia(*args.s3, semente=args.semente + 2),
+    }
+    supabase_falso = SupabaseFalso(banco, latencias["rest"], latencias["storage"])
+    s3_falso = S3Falso(latencias["s3"])
+    rss_dados = bench.rss_mb()
+
+    resultados = asyncio.run(bench.executar(
+        app,
+        cenarios,
+        Contexto(volumes, args.semente),
+        supabase_falso,
+        s3_falso,
+        concorrencias=concorrencias,
+        requisicoes=args.requisicoes,
+        aquecimento=args.aquecimento,
+        alocacoes=args.alocacoes,
+        progresso=_progresso,
+    ))
+
+    relatorio = {
+        "config": {
+            "perfil": args.perfil,
+            "volumes": volumes.como_dict(),
+            "concorrencias": list(concorrencias),
+            "requisicoes": args.requisicoes,
+            "aquecimento": args.aquecimento,
+            "latencias_ms": {nome: latencia.como_dict() for nome, latencia in latencias.items()},
+            "semente": args.semente,
+            "app": {
+                "bcrypt_rounds": config.BCRYPT_ROUNDS,
+                "hash_workers": config.HASH_WORKERS,
+                "image_workers": config.IMAGE_WORKERS,
+                "single_flight": config.SUPABASE_SINGLE_FLIGHT,
+                "hedge": config.SUPABASE_HEDGE,
+                "trace_sample_rate": config.TRACE_SAMPLE_RATE,
+            },
+            "python": platform.python_version(),
+            "plataforma": platform.platform(terse=True),
+            "commit": _commit(),
+        },
+        "memoria": {
+            "rss_inicial_mb": round(rss_inicial, 1),
+            "rss_com_dados_mb": round(rss_dados, 1),
+            "rss_final_mb": round(bench.rss_mb(), 1),
+            "rss_pico_mb": round(bench.rss_pico_mb(), 1),
+        },
+        "resultados": resultados,
+    }
+
+    if args.saida:
+        bench.salvar(args.saida, relatorio)
+        print(f"relatório gravado em {args.saida}")
+
+    if args.comparar:
+        regressoes = bench.comparar(relatorio, bench.carregar(args.comparar), args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO {regressao}")
+        if regressoes:
+            return 1
+        print(f"sem regressões em relação a {args.comparar} (tolerância {args.tolerancia:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Um cenário por rota da API: como montar uma requisição válida sorteando
+ids dentro dos volumes gerados (bench/dados.py) e quais status contam
+como sucesso.
+
+Exclusões usam os ids das linhas criadas pelos POSTs do próprio
+benchmark (o Supabase falso numera a partir do fim de cada tabela), então
+os cenários de criação vêm antes dos de exclusão e os dados originais
+continuam íntegros para as leituras.
+"""
+import io
+import random
+from datetime import date, timedelta
+from fastapi.routing import APIRoute
+from bench.dados import SENHA, Volumes
+
+
+class Contexto:
+    """Sorteios e sequências de ids compartilhados pelos cenários de uma execução"""
+
+    def __init__(self, volumes: Volumes, semente: int = 42):
+        self.volumes = volumes
+        self.rng = random.Random(semente)
+        self.hoje = date.today()
+        self._sequencias = {}
+        self._imagem = None
+
+    def sequencia(self, nome: str, inicio: int) -> int:
+        """Próximo id de uma sequência (ex.: linhas criadas pelo benchmark a excluir)"""
+        atual = self._sequencias.get(nome, inicio)
+        self._sequencias[nome] = atual + 1
+        return atual
+
+    def usuario(self) -> int:
+        return self.rng.randint(1, self.volumes.usuarios)
+
+    def anfitriao(self) -> int:
+        return self.rng.randint(1, self.volumes.anfitrioes)
+
+    def tutor(self) -> int:
+        return self.rng.randint(self.volumes.primeiro_tutor, self.volumes.usuarios)
+
+    def pet(self) -> int:
+        return self.rng.randint(1, self.volumes.pets)
+
+    def reserva(self) -> int:
+        return self.rng.randint(1, self.volumes.reservas)
+
+    def avaliacao(self) -> int:
+        return self.rng.randint(1, self.volumes.avaliacoes)
+
+    def pergunta(self) -> int:
+        return self.rng.randint(1, self.volumes.perguntas)
+
+    def ids(self, sortear, quantidade: int = 20) -> str:
+        return ",".join(str(sortear()) for _ in range(quantidade))
+
+    def periodo(self, inicio_dias: int = 30, fim_dias: int = 365) -> tuple:
+        inicio = self.hoje + timedelta(days=self.rng.randint(inicio_dias, fim_dias))
+        return inicio.isoformat(), (inicio + timedelta(days=self.rng.randint(1, 7))).isoformat()
+
+    def imagem(self) -> bytes:
+        """JPEG 1280x960 (gerado uma vez) para as rotas de upload"""
+        if self._imagem is None:
+            from PIL import Image
+
+            imagem = Image.linear_gradient("L").resize((1280, 960)).convert("RGB")
+            saida = io.BytesIO()
+            imagem.save(saida, "JPEG", quality=90)
+            self._imagem = saida.getvalue()
+        return self._imagem
+
+    def arquivo(self) -> tuple:
+        return ("foto.jpg", self.imagem(), "image/jpeg")
+
+
+class Cenario:
+    """
+    - metodo / rota: como declarados no router (ex.: "GET", "/pets/{id}")
+    - gerar: Contexto -> kwargs do httpx (url, json, files...)
+    - esperados: status que contam como sucesso
+    - recusas: status de recusa por sobrecarga (503 com Retry-After), contados
+      à parte em `recusadas` e não como erro
+    """
+
+    def __init__(self, metodo: str, rota: str, gerar, esperados: tuple = (200,), recusas: tuple = ()):
+        self.metodo = metodo
+        self.rota = rota
+        self.gerar = gerar
+        self.esperados = esperados
+        self.recusas = recusas
+
+    @property
+    def nome(self) -> str:
+        return f"{self.metodo} {self.rota}"
+
+
+def _usuario_novo(c: Contexto) -> dict:
+    n = c.sequencia("email", 1)
+    return {
+        "nome": f"Novo {n}", "email": f"novo{n}@bench.example.com", "senha_hash": SENHA, "telefone": None,
+        "tipo": "tutor", "data_cadastro": None, "logradouro": None, "numero": None, "bairro": "Centro",
+        "cidade": "Campinas", "uf": "SP", "cep": None, "complemento": None,
+    }
+
+
+def _pet_novo(c: Contexto) -> dict:
+    return {"id_tutor": c.tutor(), "nome": "Rex", "especie": "cachorro", "idade": 3, "peso": 12.5}
+
+
+def _reserva_nova(c: Contexto) -> dict:
+    # Datas além das geradas: poucas recusas por capacidade (409)
+    inicio, fim = c.periodo(400, 800)
+    return {"id_tutor": c.tutor(), "id_anfitriao": c.anfitriao(), "data_inicio": inicio, "data_fim": fim}
+
+
+def _disponibilidade(c: Contexto) -> dict:
+    inicio, fim = c.periodo()
+    return {"url": f"/reservas/anfitriao/{c.anfitriao()}/disponibilidade", "params": {"data_inicio": inicio, "data_fim": fim}}
+
+
+CENARIOS = [
+    # Usuários
+    Cenario("GET", "/usuarios/", lambda c: {"url": "/usuarios/", "params": {"limit": 50}}),
+    Cenario("GET", "/usuarios/{id}", lambda c: {"url": f"/usuarios/{c.usuario()}"}),
+    # Cadastro e login passam pelo bcrypt: acima da vazão do pool de hash (HASH_WORKERS / custo
+    # do hash) a fila que não cabe no prazo é recusada com 503, como previsto (utils/senhas.py)
+    Cenario("POST", "/usuarios/", lambda c: {"url": "/usuarios/", "json": _usuario_novo(c)}, (201,), recusas=(503,)),
+    Cenario("POST", "/usuarios/login", lambda c: {
+        "url": "/usuarios/login", "json": {"email": f"usuario{c.usuario()}@bench.example.com", "senha": SENHA},
+    }, recusas=(503,)),
+    Cenario("PUT", "/usuarios/{id}", lambda c: {"url": f"/usuarios/{c.usuario()}", "json": {"telefone": "11999990000"}}),
+    Cenario("POST", "/usuarios/{id}/foto-perfil", lambda c: {
+        "url": f"/usuarios/{c.usuario()}/foto-perfil", "files": {"arquivo": c.arquivo()},
+    }),
+    Cenario("DELETE", "/usuarios/{id}", lambda c: {
+        "url": f"/usuarios/{c.sequencia('excluir_usuario', c.volumes.usuarios + 1)}",
+    }, (204,)),
+
+    # Pets
+    Cenario("GET", "/pets/", lambda c: {"url": "/pets/", "params": {"limit": 50}}),
+    Cenario("GET", "/pets/{id}", lambda c: {"url": f"/pets/{c.pet()}"}),
+    Cenario("GET", "/pets/tutor/{id_tutor}", lambda c: {"url": f"/pets/tutor/{c.tutor()}"}),
+    Cenario("POST", "/pets/", lambda c: {"url": "/pets/", "json": _pet_novo(c)}, (201,)),
+    Cenario("POST", "/pets/batch", lambda c: {"url": "/pets/batch", "json": [_pet_novo(c) for _ in range(10)]}, (201,)),
+    Cenario("PUT", "/pets/{id}", lambda c: {"url": f"/pets/{c.pet()}", "json": {"peso": 13.0}}),
+    Cenario("POST", "/pets/{id_pet}/fotos", lambda c: {
+        "url": f"/pets/{c.pet()}/fotos", "files": [("arquivos", c.arquivo())],
+    }),
+    Cenario("DELETE", "/pets/{id}", lambda c: {"url": f"/pets/{c.sequencia('excluir_pet', c.volumes.pets + 1)}"}, (204,)),
+
+    # Anfitriões
+    Cenario("GET", "/anfitrioes/", lambda c: {"url": "/anfitrioes/", "params": {"limit": 50}}),
+    Cenario("GET", "/anfitrioes/search", lambda c: {"url": "/anfitrioes/search", "params": {
+        "especie": "cachorro", "preco_max": 200, "cidade": "Campinas", "sort": "preco", "limit": 20,
+    }}),
+    Cenario("GET", "/anfitrioes/{id}", lambda c: {"url": f"/anfitrioes/{c.anfitriao()}"}),
+    Cenario("GET", "/anfitrioes/{id}/perfil", lambda c: {"url": f"/anfitrioes/{c.anfitriao()}/perfil"}),
+    Cenario("GET", "/anfitrioes/status/{status}", lambda c: {"url": "/anfitrioes/status/ativo", "params": {"limit": 50}}),
+    # Tutores viram anfitriões: o id do anfitrião é o do usuário
+    Cenario("POST", "/anfitrioes/", lambda c: {"url": "/anfitrioes/", "json": {
+        "id_anfitriao": c.sequencia("novo_anfitriao", c.volumes.primeiro_tutor),
+        "capacidade_maxima": 3, "especie": ["cachorro"], "preco": 90.0, "status": "ativo",
+    }}, (201,)),
+    Cenario("PATCH", "/anfitrioes/batch/status", lambda c: {"url": "/anfitrioes/batch/status", "json": {
+        "ids": [c.anfitriao() for _ in range(20)], "status": "ativo",
+    }}),
+    Cenario("PUT", "/anfitrioes/{id}", lambda c: {"url": f"/anfitrioes/{c.anfitriao()}", "json": {"preco": 120.0}}),
+    Cenario("POST", "/anfitrioes/{id_anfitriao}/fotos-area", lambda c: {
+        "url": f"/anfitrioes/{c.anfitriao()}/fotos-area", "files": [("arquivos", c.arquivo())],
+    }),
+    Cenario("DELETE", "/anfitrioes/{id}", lambda c: {
+        "url": f"/anfitrioes/{c.sequencia('excluir_anfitriao', c.volumes.primeiro_tutor)}",
+    }, (204,)),
+
+    # Reservas
+    Cenario("GET", "/reservas/", lambda c: {"url": "/reservas/", "params": {"limit": 50}}),
+    Cenario("GET", "/reservas/{id}", lambda c: {"url": f"/reservas/{c.reserva()}"}),
+    Cenario("GET", "/reservas/tutor/{id_tutor}", lambda c: {"url": f"/reservas/tutor/{c.tutor()}"}),
+    Cenario("GET", "/reservas/anfitriao/{id_anfitriao}", lambda c: {"url": f"/reservas/anfitriao/{c.anfitriao()}"}),
+    Cenario("GET", "/reservas/anfitriao/{id_anfitriao}/disponibilidade", _disponibilidade),
+    Cenario("GET", "/reservas/status/{status}", lambda c: {"url": "/reservas/status/confirmada", "params": {"limit": 50}}),
+    Cenario("POST", "/reservas/", lambda c: {"url": "/reservas/", "json": _reserva_nova(c)}, (201, 409)),
+    Cenario("POST", "/reservas/batch", lambda c: {"url": "/reservas/batch", "json": [_reserva_nova(c) for _ in range(10)]}, (201,)),
+    Cenario("PATCH", "/reservas/batch/status", lambda c: {"url": "/reservas/batch/status", "json": {
+        "ids": [c.reserva() for _ in range(20)], "status": "concluida",
+    }}),
+    Cenario("PUT", "/reservas/{id}", lambda c: {"url": f"/reservas/{c.reserva()}", "json": {
+        "data_inicio": None, "data_fim": None, "status": "concluida",
+    }}),
+    Cenario("DELETE", "/reservas/{id}", lambda c: {
+        "url": f"/reservas/{c.sequencia('excluir_reserva', c.volumes.reservas + 1)}",
+    }, (204,)),
+
+    # Avaliações
+    Cenario("GET", "/avaliacoes/", lambda c: {"url": "/avaliacoes/", "params": {"limit": 50}}),
+    Cenario("GET", "/avaliacoes/{id}", lambda c: {"url": f"/avaliacoes/{c.avaliacao()}"}),
+    Cenario("GET", "/avaliacoes/reserva/{id_reserva}", lambda c: {"url": f"/avaliacoes/reserva/{c.reserva()}"}),
+    Cenario("GET", "/avaliacoes/avaliado/resumo", lambda c: {
+        "url": "/avaliacoes/avaliado/resumo", "params": {"ids": c.ids(c.anfitriao)},
+    }),
+    Cenario("GET", "/avaliacoes/avaliado/{id_avaliado}/resumo", lambda c: {"url": f"/avaliacoes/avaliado/{c.anfitriao()}/resumo"}),
+    Cenario("GET", "/avaliacoes/avaliado/{id_avaliado}", lambda c: {"url": f"/avaliacoes/avaliado/{c.anfitriao()}"}),
+    Cenario("GET", "/avaliacoes/avaliador/{id_avaliador}", lambda c: {"url": f"/avaliacoes/avaliador/{c.tutor()}"}),
+    Cenario("POST", "/avaliacoes/", lambda c: {"url": "/avaliacoes/", "json": {
+        "id_reserva": c.reserva(), "id_avaliador": c.tutor(), "id_avaliado": c.anfitriao(),
+        "nota": c.rng.randint(1, 5), "comentario": "Ótimo anfitrião",
+    }}, (201,)),
+    Cenario("PUT", "/avaliacoes/{id}", lambda c: {"url": f"/avaliacoes/{c.avaliacao()}", "json": {
+        "nota": c.rng.randint(1, 5), "comentario": None,
+    }}),
+    Cenario("DELETE", "/avaliacoes/{id}", lambda c: {
+        "url": f"/avaliacoes/{c.sequencia('excluir_avaliacao', c.volumes.avaliacoes + 1)}",
+    }, (204,)),
+
+    # Perguntas
+    Cenario("GET", "/perguntas/anfitriao/pendentes", lambda c: {
+        "url": "/perguntas/anfitriao/pendentes", "params": {"ids": c.ids(c.anfitriao)},
+    }),
+    Cenario("GET", "/perguntas/anfitriao/{id_anfitriao}", lambda c: {"url": f"/perguntas/anfitriao/{c.anfitriao()}"}),
+    Cenario("GET", "/perguntas/{id_pergunta}", lambda c: {"url": f"/perguntas/{c.pergunta()}"}),
+    Cenario("POST", "/perguntas/", lambda c: {"url": "/perguntas/", "json": {
+        "id_tutor": c.tutor(), "id_anfitriao": c.anfitriao(), "pergunta": "Tem quintal?",
+    }}, (201,)),
+    Cenario("POST", "/perguntas/respostas", lambda c: {"url": "/perguntas/respostas", "json": {
+        "id_pergunta": c.pergunta(), "id_anfitriao": c.anfitriao(), "resposta": "Tem sim",
+    }}, (201,)),
+
+    # Upload e monitoramento
+    Cenario("POST", "/upload/image", lambda c: {"url": "/upload/image", "files": {"file": c.arquivo()}}),
+    Cenario("GET", "/health", lambda c: {"url": "/health"}),
+    Cenario("GET", "/metrics", lambda c: {"url": "/metrics"}),
+]
+
+
+def rotas_sem_cenario(app, cenarios: list = CENARIOS) -> list:
+    """Rotas da app que nenhum cenário cobre (ex.: rota nova sem benchmark)"""
+    cobertas = {(cenario.metodo, cenario.rota) for cenario in cenarios}
+    return sorted(
+        f"{metodo} {rota.path}"
+        for rota in app.routes
+        if isinstance(rota, APIRoute)
+        for metodo in rota.methods
+        if (metodo, rota.path) not in cobertas
+    )
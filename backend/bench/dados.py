@@ -0,0 +1,215 @@
+"""
+Dados sintéticos para o Supabase falso, gerados de forma determinística
+(mesma semente, mesmas linhas) a partir de dois volumes: usuários e
+reservas. As demais tabelas são proporcionais (ver Volumes).
+
+Ids são sequenciais a partir de 1, então os cenários sorteiam ids válidos
+sabendo só os volumes: os primeiros `anfitrioes` usuários são anfitriões,
+os demais tutores.
+"""
+import random
+from datetime import date, timedelta
+
+# Perfis de volume (--perfil); "grande" ocupa alguns GB de memória
+PERFIS = {
+    "pequeno": {"usuarios": 2_000, "reservas": 20_000},
+    "medio": {"usuarios": 20_000, "reservas": 200_000},
+    "grande": {"usuarios": 100_000, "reservas": 1_000_000},
+}
+
+SENHA = "senha-bench"
+
+CIDADES = (
+    ("São Paulo", "SP"), ("Campinas", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"),
+    ("Curitiba", "PR"), ("Porto Alegre", "RS"), ("Recife", "PE"), ("Salvador", "BA"),
+)
+BAIRROS = ("Centro", "Jardim América", "Vila Nova", "Boa Vista", "Santa Cecília", "Liberdade")
+ESPECIES = (("cachorro",), ("gato",), ("cachorro", "gato"), ("cachorro", "gato", "passaro"))
+TAMANHOS = ("pequeno", "medio", "grande")
+STATUS_ANFITRIAO = (("ativo", 0.8), ("pendente", 0.15), ("inativo", 0.05))
+STATUS_RESERVA = (("pendente", 0.15), ("confirmada", 0.35), ("concluida", 0.4), ("cancelada", 0.1))
+
+
+class Volumes:
+    """Linhas por tabela, derivadas da quantidade de usuários e de reservas"""
+
+    def __init__(self, usuarios: int, reservas: int):
+        if usuarios < 10:
+            raise ValueError("São necessários ao menos 10 usuários")
+        self.usuarios = usuarios
+        self.anfitrioes = usuarios // 5
+        self.pets = usuarios
+        self.reservas = reservas
+        self.avaliacoes = reservas // 4
+        self.perguntas = usuarios
+        self.respostas = usuarios // 2
+
+    @property
+    def primeiro_tutor(self) -> int:
+        return self.anfitrioes + 1
+
+    def como_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def _sorteio(rng: random.Random, opcoes: tuple):
+    """Escolha ponderada por [(valor, peso)] (mais barata que rng.choices por linha)"""
+    limite, acumulado = rng.random(), 0.0
+    for valor, peso in opcoes:
+        acumulado += peso
+        if limite < acumulado:
+            return valor
+    return opcoes[-1][0]
+
+
+def gerar(volumes: Volumes, senha_hash: str, semente: int = 42, hoje: date = None) -> dict:
+    """
+    {tabela: [linhas]}. Datas relativas a `hoje` (reservas de um ano atrás
+    até um ano à frente), para que disponibilidade e perfil encontrem
+    reservas ativas. Strings repetidas (datas, status, cidades) são
+    compartilhadas entre as linhas para caber nos volumes grandes.
+    """
+    rng = random.Random(semente)
+    hoje = hoje or date.today()
+    dias = [(hoje + timedelta(days=d)).isoformat() for d in range(-400, 400)]
+    envios = [f"{dia}T{h:02d}:{m:02d}:00+00:00" for dia in dias[:400] for h, m in ((9, 15), (14, 40))]
+
+    usuarios = []
+    for i in range(1, volumes.usuarios + 1):
+        cidade, uf = CIDADES[i % len(CIDADES)]
+        usuarios.append({
+            "id_usuario": i,
+            "nome": f"Usuário {i}",
+            "email": f"usuario{i}@bench.example.com",
+            "senha_hash": senha_hash,
+            "telefone": f"119{i:08d}",
+            "tipo": "anfitriao" if i <= volumes.anfitrioes else "tutor",
+            "data_cadastro": envios[i % len(envios)],
+            "logradouro": "Rua das Flores",
+            "numero": str(i % 1000),
+            "bairro": BAIRROS[i % len(BAIRROS)],
+            "cidade": cidade,
+            "uf": uf,
+            "cep": f"{i % 100000:05d}000",
+            "complemento": None,
+            "foto_perfil_url": None,
+            "foto_perfil_variantes": None,
+        })
+
+    anfitrioes = [
+        {
+            "id_anfitriao": i,
+            "descricao": f"Espaço do anfitrião {i}, com quintal e passeios diários",
+            "capacidade_maxima": rng.randint(1, 8),
+            "especie": ESPECIES[rng.randrange(len(ESPECIES))],
+            "tamanho_pet": TAMANHOS[rng.randrange(len(TAMANHOS))],
+            "preco": float(rng.randrange(40, 300, 5)),
+            "status": _sorteio(rng, STATUS_ANFITRIAO),
+            "fotos_urls": (),
+            "fotos_variantes": (),
+        }
+        for i in range(1, volumes.anfitrioes + 1)
+    ]
+
+    tutores = volumes.usuarios - volumes.anfitrioes
+    pets = [
+        {
+            "id_pet": i,
+            "id_tutor": volumes.primeiro_tutor + rng.randrange(tutores),
+            "nome": f"Pet {i}",
+            "especie": "cachorro" if rng.random() < 0.6 else "gato",
+            "raca": None,
+            "idade": rng.randint(1, 15),
+            "idade_unidade": "ano",
+            "peso": round(rng.uniform(2, 40), 1),
+            "peso_unidade": "kg",
+            "observacoes": None,
+            "fotos_urls": (),
+            "fotos_variantes": (),
+        }
+        for i in range(1, volumes.pets + 1)
+    ]
+
+    reservas = []
+    for i in range(1, volumes.reservas + 1):
+        inicio = rng.randrange(0, len(dias) - 20)
+        reservas.append({
+            "id_reserva": i,
+            "id_tutor": volumes.primeiro_tutor + rng.randrange(tutores),
+            "id_anfitriao": rng.randint(1, volumes.anfitrioes),
+            "data_inicio": dias[inicio],
+            "data_fim": dias[inicio + rng.randint(1, 14)],
+            "status": _sorteio(rng, STATUS_RESERVA),
+        })
+
+    # Uma avaliação a cada 4 reservas: tutor avalia o anfitrião
+    avaliacoes = [
+        {
+            "id_avaliacao": i,
+            "id_reserva": reserva["id_reserva"],
+            "id_avaliador": reserva["id_tutor"],
+            "id_avaliado": reserva["id_anfitriao"],
+            "nota": rng.randint(1, 5),
+            "comentario": "Tudo certo com a estadia",
+        }
+        for i, reserva in enumerate(reservas[::4][:volumes.avaliacoes], start=1)
+    ]
+
+    # Carga inicial de resumo_avaliacoes e nota_media (migrations/002 e 003): o banco falso não
+    # tem o trigger, então as escritas do bench não alteram essas linhas
+    resumos = {}
+    for avaliacao in avaliacoes:
+        resumo = resumos.setdefault(avaliacao["id_avaliado"], {
+            "id_avaliado": avaliacao["id_avaliado"], "total": 0, "soma": 0,
+            **{f"nota_{nota}": 0 for nota in range(1, 6)},
+        })
+        resumo["total"] += 1
+        resumo["soma"] += avaliacao["nota"]
+        resumo[f"nota_{avaliacao['nota']}"] += 1
+    for anfitriao in anfitrioes:
+        resumo = resumos.get(anfitriao["id_anfitriao"])
+        anfitriao["nota_media"] = round(resumo["soma"] / resumo["total"], 2) if resumo else None
+
+    perguntas = [
+        {
+            "id_pergunta": i,
+            "id_tutor": volumes.primeiro_tutor + rng.randrange(tutores),
+            "id_anfitriao": rng.randint(1, volumes.anfitrioes),
+            "pergunta": "Aceita pets que tomam remédio?",
+            "data_envio": envios[rng.randrange(len(envios) - 1)],
+        }
+        for i in range(1, volumes.perguntas + 1)
+    ]
+
+    # Metade das perguntas respondidas (as de id par)
+    respostas = [
+        {
+            "id_resposta": i,
+            "id_pergunta": pergunta["id_pergunta"],
+            "id_anfitriao": pergunta["id_anfitriao"],
+            "resposta": "Sim, sem problemas",
+            "data_envio": envios[-1],
+        }
+        for i, pergunta in enumerate(perguntas[1::2][:volumes.respostas], start=1)
+    ]
+
+    # View perguntas_pendentes (migrations/005): como o resumo, fica fixa durante o bench
+    respondidas = {resposta["id_pergunta"] for resposta in respostas}
+    pendentes = {}
+    for pergunta in perguntas:
+        if pergunta["id_pergunta"] not in respondidas:
+            pendentes[pergunta["id_anfitriao"]] = pendentes.get(pergunta["id_anfitriao"], 0) + 1
+
+    return {
+        "usuarios": usuarios,
+        "anfitrioes": anfitrioes,
+        "pets": pets,
+        "reservas": reservas,
+        "avaliacoes": avaliacoes,
+        "resumo_avaliacoes": sorted(resumos.values(), key=lambda resumo: resumo["id_avaliado"]),
+        "perguntas": perguntas,
+        "respostas": respostas,
+        "perguntas_pendentes": [
+            {"id_anfitriao": id_anfitriao, "pendentes": total} for id_anfitriao, total in sorted(pendentes.items())
+        ],
+    }
@@ -0,0 +1,212 @@
+"""
+Execução dos cenários contra a app real (em processo, via
+httpx.ASGITransport), com o Supabase e o S3 falsos no lugar dos
+verdadeiros. Para cada cenário e nível de concorrência mede vazão,
+latências (p50/p95/p99), chamadas ao Supabase por requisição e memória.
+"""
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import asynccontextmanager
+import httpx
+import orjson
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_mb() -> float:
+    """Memória residente atual do processo (Linux: /proc; senão o pico do getrusage)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return rss_pico_mb()
+
+
+def rss_pico_mb() -> float:
+    if resource is None:
+        return 0.0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KiB no Linux, bytes no macOS
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+
+def percentil(ordenados: list, p: float) -> float:
+    """Percentil por posição mais próxima (nearest-rank)"""
+    if not ordenados:
+        return 0.0
+    posicao = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[posicao]
+
+
+@asynccontextmanager
+async def ambiente(app, supabase_falso, s3_falso):
+    """
+    Sobe a app (lifespan), troca o pool do SupabaseClient por um
+    transporte ASGI para o Supabase falso e o cliente boto3 pelo stub.
+    Entrega um httpx.AsyncClient que fala com a app em processo.
+    """
+    import Upload.upload_routes as upload_routes
+    from utils.supabase_client import supabase
+
+    async with app.router.lifespan_context(app):
+        original = supabase.client
+        supabase._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=supabase_falso), timeout=original.timeout
+        )
+        await original.aclose()
+
+        s3_original, bucket_original = upload_routes.s3, upload_routes.AWS_BUCKET_NAME
+        upload_routes.s3 = s3_falso
+        upload_routes.AWS_BUCKET_NAME = bucket_original or "bench"
+        try:
+            transporte = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transporte, base_url="http://api.bench", timeout=None) as cliente:
+                yield cliente
+        finally:
+            upload_routes.s3, upload_routes.AWS_BUCKET_NAME = s3_original, bucket_original
+
+
+async def medir(cliente, cenario, contexto, supabase_falso, concorrencia: int, requisicoes: int, alocacoes: bool = False) -> dict:
+    """`requisicoes` chamadas ao cenário, `concorrencia` de cada vez"""
+    latencias = []
+    status = Counter()
+    restantes = requisicoes
+
+    async def trabalhador():
+        nonlocal restantes
+        while restantes > 0:
+            restantes -= 1
+            kwargs = cenario.gerar(contexto)
+            inicio = time.perf_counter()
+            try:
+                response = await cliente.request(cenario.metodo, **kwargs)
+                codigo = str(response.status_code)
+            except Exception as erro:
+                codigo = type(erro).__name__
+            latencias.append(time.perf_counter() - inicio)
+            status[codigo] += 1
+
+    gc.collect()
+    rss_antes = rss_mb()
+    chamadas_antes = sum(supabase_falso.chamadas.values())
+    if alocacoes:
+        tracemalloc.reset_peak()
+        alocado_antes = tracemalloc.get_traced_memory()[0]
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    latencias.sort()
+    esperados = {str(codigo) for codigo in cenario.esperados}
+    recusas = {str(codigo) for codigo in cenario.recusas}
+    resultado = {
+        "requisicoes": requisicoes,
+        "rps": round(requisicoes / duracao, 1),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+        "max_ms": round(latencias[-1] * 1000, 2),
+        "status": dict(sorted(status.items())),
+        "erros": sum(n for codigo, n in status.items() if codigo not in esperados and codigo not in recusas),
+        "recusadas": sum(n for codigo, n in status.items() if codigo in recusas),
+        "supabase_por_requisicao": round((sum(supabase_falso.chamadas.values()) - chamadas_antes) / requisicoes, 2),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_antes, 1),
+    }
+    if alocacoes:
+        resultado["alocado_pico_mb"] = round((tracemalloc.get_traced_memory()[1] - alocado_antes) / 2**20, 2)
+    return resultado
+
+
+async def executar(
+    app,
+    cenarios: list,
+    contexto,
+    supabase_falso,
+    s3_falso,
+    concorrencias: tuple = (1, 8, 32),
+    requisicoes: int = 200,
+    aquecimento: int = 10,
+    alocacoes: bool = False,
+    progresso=None,
+) -> dict:
+    """
+    {cenário: {concorrência: medição}}. Cada cenário recebe `aquecimento`
+    requisições (fora da medição) antes do primeiro nível de concorrência.
+    """
+    resultados = {}
+    if alocacoes:
+        tracemalloc.start()
+    try:
+        async with ambiente(app, supabase_falso, s3_falso) as cliente:
+            for cenario in cenarios:
+                if aquecimento:
+                    await medir(cliente, cenario, contexto, supabase_falso, 1, aquecimento)
+                resultados[cenario.nome] = {}
+                for concorrencia in concorrencias:
+                    medicao = await medir(
+                        cliente, cenario, contexto, supabase_falso, concorrencia, requisicoes, alocacoes
+                    )
+                    resultados[cenario.nome][str(concorrencia)] = medicao
+                    if progresso:
+                        progresso(cenario, concorrencia, medicao)
+    finally:
+        if alocacoes:
+            tracemalloc.stop()
+    return resultados
+
+
+# ------------------------
+# Baselines
+# ------------------------
+def salvar(caminho: str, relatorio: dict):
+    """JSON com chaves ordenadas e indentado: regressões aparecem como diff"""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "wb") as arquivo:
+        arquivo.write(orjson.dumps(relatorio, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS) + b"\n")
+
+
+def carregar(caminho: str) -> dict:
+    with open(caminho, "rb") as arquivo:
+        return orjson.loads(arquivo.read())
+
+
+def comparar(atual: dict, base: dict, tolerancia: float = 0.2) -> list:
+    """
+    Regressões de `atual` em relação à baseline, por cenário e concorrência:
+    p95 ou p99 acima de (1 + tolerancia) × base, vazão abaixo de
+    (1 - tolerancia) × base, mais erros, recusas por sobrecarga acima da
+    tolerância ou mais chamadas ao Supabase por requisição. Cenários que só existem num dos lados são ignorados.
+    """
+    regressoes = []
+    for nome, niveis in atual["resultados"].items():
+        for concorrencia, medicao in niveis.items():
+            anterior = base.get("resultados", {}).get(nome, {}).get(concorrencia)
+            if anterior is None:
+                continue
+            motivos = []
+            for chave in ("p95_ms", "p99_ms"):
+                if medicao[chave] > anterior[chave] * (1 + tolerancia):
+                    motivos.append(f"{chave} {anterior[chave]} -> {medicao[chave]}")
+            if medicao["rps"] < anterior["rps"] * (1 - tolerancia):
+                motivos.append(f"rps {anterior['rps']} -> {medicao['rps']}")
+            if medicao["erros"] > anterior["erros"]:
+                motivos.append(f"erros {anterior['erros']} -> {medicao['erros']}")
+            if medicao.get("recusadas", 0) > anterior.get("recusadas", 0) * (1 + tolerancia):
+                motivos.append(f"recusadas {anterior.get('recusadas', 0)} -> {medicao['recusadas']}")
+            if medicao["supabase_por_requisicao"] > anterior["supabase_por_requisicao"]:
+                motivos.append(
+                    f"supabase/req {anterior['supabase_por_requisicao']} -> {medicao['supabase_por_requisicao']}"
+                )
+            if motivos:
+                regressoes.append(f"{nome} (c={concorrencia}): {'; '.join(motivos)}")
+    return regressoes
@@ -0,0 +1,203 @@
+"""
+Dependências externas falsas para os benchmarks: Supabase (PostgREST +
+Storage) como app ASGI em memória e um stub do cliente boto3 do S3, ambos
+com latência configurável.
+"""
+import asyncio
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import parse_qsl
+import orjson
+from bench.postgrest import Banco, Consulta, ErroConsulta
+
+OBJETO = "application/vnd.pgrst.object+json"
+
+
+class Latencia:
+    """
+    Atraso simulado de uma chamada: `base_ms` fixo mais uma cauda
+    exponencial de média `cauda_ms` (a maioria rápida, algumas lentas)
+    """
+
+    def __init__(self, base_ms: float = 0.0, cauda_ms: float = 0.0, semente: int = None):
+        self.base_ms = base_ms
+        self.cauda_ms = cauda_ms
+        self._rng = random.Random(semente)
+
+    def sortear(self) -> float:
+        """Atraso em segundos"""
+        atraso = self.base_ms
+        if self.cauda_ms > 0:
+            atraso += self._rng.expovariate(1 / self.cauda_ms)
+        return atraso / 1000
+
+    def como_dict(self) -> dict:
+        return {"base_ms": self.base_ms, "cauda_ms": self.cauda_ms}
+
+
+def _prefer(headers: dict) -> dict:
+    """Prefer: return=minimal, count=exact -> {"return": "minimal", "count": "exact"}"""
+    itens = (item.strip().partition("=") for item in headers.get("prefer", "").split(","))
+    return {chave: valor for chave, _, valor in itens if chave}
+
+
+class SupabaseFalso:
+    """
+    App ASGI que responde como o Supabase em /rest/v1/<tabela> e
+    /storage/v1/object/<bucket>/<caminho>. Usado com httpx.ASGITransport no
+    lugar do pool de conexões do SupabaseClient; conta as chamadas por
+    (api, método) para o relatório de chamadas por requisição.
+    """
+
+    def __init__(self, banco: Banco, latencia_rest: Latencia = None, latencia_storage: Latencia = None):
+        self.banco = banco
+        self.latencia_rest = latencia_rest or Latencia()
+        self.latencia_storage = latencia_storage or Latencia()
+        self.objetos = {}
+        self.chamadas = Counter()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        corpo = b""
+        while True:
+            mensagem = await receive()
+            corpo += mensagem.get("body", b"")
+            if not mensagem.get("more_body"):
+                break
+
+        metodo = scope["method"]
+        caminho = scope["path"]
+        headers = {nome.decode().lower(): valor.decode() for nome, valor in scope["headers"]}
+        params = parse_qsl(scope["query_string"].decode(), keep_blank_values=True)
+
+        if caminho.startswith("/rest/v1/"):
+            self.chamadas["rest", metodo] += 1
+            atraso = self.latencia_rest.sortear()
+            if atraso:
+                await asyncio.sleep(atraso)
+            try:
+                status, extras, resposta = self._rest(metodo, caminho[len("/rest/v1/"):], params, headers, corpo)
+            except ErroConsulta as erro:
+                status, extras = erro.status, {}
+                resposta = orjson.dumps({"code": erro.codigo, "message": erro.mensagem})
+        elif caminho.startswith("/storage/v1/object/"):
+            self.chamadas["storage", metodo] += 1
+            atraso = self.latencia_storage.sortear()
+            if atraso:
+                await asyncio.sleep(atraso)
+            status, extras, resposta = self._storage(metodo, caminho[len("/storage/v1/object/"):], corpo)
+        else:
+            status, extras, resposta = 404, {}, orjson.dumps({"message": "Not Found"})
+
+        cabecalhos = [(b"content-type", b"application/json"), (b"content-length", str(len(resposta)).encode())]
+        cabecalhos += [(nome.encode(), valor.encode()) for nome, valor in extras.items()]
+        await send({"type": "http.response.start", "status": status, "headers": cabecalhos})
+        await send({"type": "http.response.body", "body": resposta})
+
+    def _rest(self, metodo: str, nome_tabela: str, params: list, headers: dict, corpo: bytes) -> tuple:
+        prefer = _prefer(headers)
+        representacao = prefer.get("return") == "representation"
+
+        if metodo == "POST":
+            tabela = self.banco.tabela(nome_tabela)
+            dados = orjson.loads(corpo)
+            # Valida o select antes de gravar (como a transação do PostgREST)
+            consulta = Consulta(self.banco, nome_tabela, [(k, v) for k, v in params if k == "select"])
+            inseridas = [tabela.inserir(dict(linha)) for linha in (dados if isinstance(dados, list) else [dados])]
+            if not representacao:
+                return 201, {}, b""
+            return 201, {}, orjson.dumps([consulta.projetar(linha) for linha in inseridas])
+
+        consulta = Consulta(self.banco, nome_tabela, params)
+
+        if metodo in ("GET", "HEAD"):
+            contar = prefer.get("count") in ("exact", "planned", "estimated")
+            linhas, total = consulta.executar(contar)
+            linhas = [consulta.projetar(linha) for linha in linhas]
+            extras = {}
+            status = 200
+            if contar:
+                intervalo = f"{consulta.offset}-{consulta.offset + len(linhas) - 1}" if linhas else "*"
+                extras["content-range"] = f"{intervalo}/{total}"
+                if len(linhas) < total:
+                    status = 206
+            if OBJETO in headers.get("accept", ""):
+                if len(linhas) != 1:
+                    return 406, {}, orjson.dumps({
+                        "code": "PGRST116",
+                        "message": "JSON object requested, multiple (or no) rows returned",
+                    })
+                return status, extras, orjson.dumps(linhas[0])
+            return status, extras, orjson.dumps(linhas)
+
+        alvos = list(consulta.filtradas())
+        if metodo == "PATCH":
+            valores = orjson.loads(corpo)
+            for linha in alvos:
+                consulta.tabela.atualizar(linha, valores)
+        elif metodo == "DELETE":
+            for linha in alvos:
+                consulta.tabela.remover(linha)
+        else:
+            raise ErroConsulta(405, "PGRST117", f"Método não suportado: {metodo}")
+
+        if not representacao:
+            return 204, {}, b""
+        return 200, {}, orjson.dumps([consulta.projetar(linha) for linha in alvos])
+
+    def _storage(self, metodo: str, caminho: str, corpo: bytes) -> tuple:
+        if metodo in ("POST", "PUT"):
+            self.objetos[caminho] = len(corpo)
+            return 200, {}, orjson.dumps({"Key": caminho})
+
+        if metodo == "DELETE":
+            # DELETE /storage/v1/object/<bucket> {"prefixes": [...]}
+            removidos = []
+            for prefixo in orjson.loads(corpo or b"{}").get("prefixes", []):
+                if self.objetos.pop(f"{caminho}/{prefixo}", None) is not None:
+                    removidos.append({"name": prefixo})
+            return 200, {}, orjson.dumps(removidos)
+
+        if metodo == "GET" and caminho.startswith("public/"):
+            tamanho = self.objetos.get(caminho[len("public/"):])
+            if tamanho is not None:
+                return 200, {}, bytes(tamanho)
+
+        return 404, {}, orjson.dumps({"statusCode": "404", "error": "not_found", "message": "Object not found"})
+
+
+class S3Falso:
+    """
+    Stub do cliente boto3 usado em Upload/upload_routes.py. Cada chamada
+    bloqueia o thread pelo atraso da latência (como o boto3 no threadpool)
+    e só o tamanho dos objetos é guardado.
+    """
+
+    def __init__(self, latencia: Latencia = None):
+        self.latencia = latencia or Latencia()
+        self.objetos = {}
+        self.chamadas = Counter()
+        self._lock = threading.Lock()
+
+    def _chamar(self, operacao: str):
+        with self._lock:
+            self.chamadas[operacao] += 1
+            atraso = self.latencia.sortear()
+        if atraso:
+            time.sleep(atraso)
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._chamar("put_object")
+        self.objetos[Bucket, Key] = len(Body)
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    def delete_objects(self, Bucket, Delete, **kwargs):
+        self._chamar("delete_objects")
+        for objeto in Delete["Objects"]:
+            self.objetos.pop((Bucket, objeto["Key"]), None)
+        return {}
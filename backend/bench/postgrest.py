@@ -0,0 +1,519 @@
+"""
+Banco em memória com o subconjunto do PostgREST que a API usa.
+
+- filtros: eq, neq, gt, gte, lt, lte, in, is, like, ilike, cs (e not.)
+- or=(...) / and=(...), inclusive aninhados
+- select com colunas e embeds: usuarios(...), avaliador:usuarios!id_avaliador(...),
+  usuarios!inner(...), respostas(*); filtros, order e limit do embed
+  (usuarios.cidade=ilike.x, respostas.limit=1) e anti-join (respostas=is.null)
+- order (asc/desc, nullsfirst/nullslast), limit e offset
+
+Chaves primárias e as FKs de ESQUEMA têm índice: as consultas por elas não
+varrem a tabela, como no Postgres. Sem índice (ou com um índice pouco
+seletivo) a tabela é percorrida na ordem da chave e a leitura para assim
+que a página fecha.
+"""
+import operator
+import re
+from functools import cmp_to_key
+
+# Tabela -> (chave primária, colunas com índice)
+ESQUEMA = {
+    "usuarios": ("id_usuario", ("email",)),
+    "anfitrioes": ("id_anfitriao", ("status",)),
+    "pets": ("id_pet", ("id_tutor",)),
+    "reservas": ("id_reserva", ("id_tutor", "id_anfitriao", "status")),
+    "avaliacoes": ("id_avaliacao", ("id_reserva", "id_avaliador", "id_avaliado")),
+    "resumo_avaliacoes": ("id_avaliado", ()),
+    "perguntas": ("id_pergunta", ("id_anfitriao",)),
+    "respostas": ("id_resposta", ("id_pergunta",)),
+    "perguntas_pendentes": ("id_anfitriao", ()),
+}
+
+# (tabela, embed[!fk]) -> (cardinalidade, coluna local, tabela embutida, coluna da embutida)
+RELACOES = {
+    ("anfitrioes", "usuarios"): ("um", "id_anfitriao", "usuarios", "id_usuario"),
+    ("pets", "usuarios"): ("um", "id_tutor", "usuarios", "id_usuario"),
+    ("avaliacoes", "usuarios!id_avaliador"): ("um", "id_avaliador", "usuarios", "id_usuario"),
+    ("avaliacoes", "usuarios!id_avaliado"): ("um", "id_avaliado", "usuarios", "id_usuario"),
+    ("perguntas", "respostas"): ("muitos", "id_pergunta", "respostas", "id_pergunta"),
+}
+
+# Índice só compensa quando devolve até 1/8 da tabela; acima disso, varredura em ordem
+_SELETIVIDADE = 8
+
+_COMPARACOES = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+class ErroConsulta(Exception):
+    """Consulta inválida: vira a resposta de erro do PostgREST (status + código)"""
+
+    def __init__(self, status: int, codigo: str, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.codigo = codigo
+        self.mensagem = mensagem
+
+
+# ------------------------
+# Parsing
+# ------------------------
+def dividir(texto: str) -> list:
+    """Divide por vírgulas de primeiro nível (fora de parênteses, chaves e aspas)"""
+    partes, atual, nivel, aspas, escape = [], [], 0, False, False
+    for char in texto:
+        if escape:
+            escape = False
+        elif char == "\\" and aspas:
+            escape = True
+        elif char == '"':
+            aspas = not aspas
+        elif not aspas and char in "({":
+            nivel += 1
+        elif not aspas and char in ")}":
+            nivel -= 1
+        elif char == "," and nivel == 0 and not aspas:
+            partes.append("".join(atual))
+            atual = []
+            continue
+        atual.append(char)
+    partes.append("".join(atual))
+    return [parte.strip() for parte in partes if parte.strip()]
+
+
+def _sem_aspas(texto: str) -> str:
+    if len(texto) >= 2 and texto[0] == texto[-1] == '"':
+        return texto[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return texto
+
+
+def _literal(texto: str):
+    """Valor de filtro para colunas não textuais (o PostgREST recebe tudo como texto)"""
+    if texto in ("true", "false"):
+        return texto == "true"
+    try:
+        return int(texto)
+    except ValueError:
+        pass
+    try:
+        return float(texto)
+    except ValueError:
+        return texto
+
+
+def condicao(coluna: str, expressao: str):
+    """Filtro `coluna=op.valor` como função linha -> bool"""
+    negar = expressao.startswith("not.")
+    if negar:
+        expressao = expressao[4:]
+    op, _, texto = expressao.partition(".")
+
+    if op in _COMPARACOES:
+        comparar = _COMPARACOES[op]
+        texto = _sem_aspas(texto)
+        literal = _literal(texto)
+
+        def teste(valor):
+            try:
+                return comparar(valor, texto if isinstance(valor, str) else literal)
+            except TypeError:
+                return False
+    elif op == "in":
+        itens = [_sem_aspas(item) for item in dividir(texto.strip()[1:-1])]
+        textos = set(itens)
+        literais = {_literal(item) for item in itens}
+
+        def teste(valor):
+            return valor in (textos if isinstance(valor, str) else literais)
+    elif op == "is":
+        esperado = {"null": None, "true": True, "false": False}.get(texto.lower(), ...)
+        if esperado is ...:
+            raise ErroConsulta(400, "PGRST100", f"Valor inválido para is: {texto}")
+
+        def teste(valor):
+            return valor is esperado
+    elif op in ("like", "ilike"):
+        padrao = re.compile(
+            ".*".join(re.escape(parte) for parte in _sem_aspas(texto).split("*")),
+            re.IGNORECASE if op == "ilike" else 0,
+        )
+
+        def teste(valor):
+            return valor is not None and padrao.fullmatch(str(valor)) is not None
+    elif op == "cs":
+        itens = {_sem_aspas(item) for item in dividir(texto.strip()[1:-1])}
+
+        def teste(valor):
+            return valor is not None and itens <= set(valor)
+    else:
+        raise ErroConsulta(400, "PGRST100", f"Operador não suportado: {op}")
+
+    if op == "is":
+        return (lambda linha: not teste(linha.get(coluna))) if negar else (lambda linha: teste(linha.get(coluna)))
+    # Como no SQL: comparações com NULL não são verdadeiras nem negadas
+    if negar:
+        return lambda linha: linha.get(coluna) is not None and not teste(linha.get(coluna))
+    return lambda linha: linha.get(coluna) is not None and teste(linha.get(coluna))
+
+
+def logico(texto: str, conjuncao: str):
+    """or=(a.eq.1,and(b.gt.2,c.is.null)) como função linha -> bool"""
+    texto = texto.strip()
+    if not (texto.startswith("(") and texto.endswith(")")):
+        raise ErroConsulta(400, "PGRST100", f"Filtro lógico inválido: {texto}")
+
+    testes = []
+    for item in dividir(texto[1:-1]):
+        negar = item.startswith("not.")
+        if negar:
+            item = item[4:]
+        if item.startswith(("and(", "or(")):
+            nome, _, resto = item.partition("(")
+            teste = logico("(" + resto, nome)
+        else:
+            coluna, _, expressao = item.partition(".")
+            teste = condicao(coluna, expressao)
+        testes.append((lambda linha, t=teste: not t(linha)) if negar else teste)
+
+    if conjuncao == "or":
+        return lambda linha: any(teste(linha) for teste in testes)
+    return lambda linha: all(teste(linha) for teste in testes)
+
+
+def ordem(texto: str) -> list:
+    """order=a.desc.nullslast,b -> [(coluna, desc, nulos_primeiro)]"""
+    termos = []
+    for termo in dividir(texto):
+        partes = termo.split(".")
+        desc = "desc" in partes[1:]
+        if "nullsfirst" in partes[1:]:
+            nulos_primeiro = True
+        elif "nullslast" in partes[1:]:
+            nulos_primeiro = False
+        else:
+            # Padrão do Postgres: NULL é o maior valor
+            nulos_primeiro = desc
+        termos.append((partes[0], desc, nulos_primeiro))
+    return termos
+
+
+def ordenar(linhas: list, termos: list) -> list:
+    def comparar(a, b):
+        for coluna, desc, nulos_primeiro in termos:
+            va, vb = a.get(coluna), b.get(coluna)
+            if va == vb:
+                continue
+            if va is None or vb is None:
+                return (-1 if va is None else 1) * (1 if nulos_primeiro else -1)
+            resultado = -1 if va < vb else 1
+            return -resultado if desc else resultado
+        return 0
+    return sorted(linhas, key=cmp_to_key(comparar))
+
+
+def colunas(texto: str):
+    """Colunas de um select: None para * (todas)"""
+    nomes = []
+    for item in dividir(texto):
+        if item == "*":
+            return None
+        # alias:coluna e coluna::tipo — só o nome da coluna interessa aqui
+        nomes.append(item.split("::")[0].rpartition(":")[2])
+    return nomes
+
+
+# ------------------------
+# Tabelas
+# ------------------------
+class Tabela:
+    """Linhas por chave primária (em ordem crescente) e índices das colunas de ESQUEMA"""
+
+    def __init__(self, nome: str, linhas=()):
+        self.nome = nome
+        self.pk, indexadas = ESQUEMA[nome]
+        self.linhas = {}
+        self.indices = {coluna: {} for coluna in indexadas}
+        self.colunas = {}
+        self._ordenada = True
+        self._maior_pk = 0
+        for linha in linhas:
+            self.inserir(linha)
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def _indexar(self, linha: dict, remover: bool = False):
+        pk = linha[self.pk]
+        for coluna, indice in self.indices.items():
+            valor = linha.get(coluna)
+            if remover:
+                indice[valor].discard(pk)
+                if not indice[valor]:
+                    del indice[valor]
+            else:
+                indice.setdefault(valor, set()).add(pk)
+
+    def inserir(self, linha: dict) -> dict:
+        if not self.colunas:
+            self.colunas = dict.fromkeys(linha)
+        elif linha.keys() != self.colunas.keys():
+            self.colunas.update(dict.fromkeys(linha))
+            linha = {**dict.fromkeys(self.colunas), **linha}
+
+        pk = linha.get(self.pk)
+        if pk is None:
+            pk = linha[self.pk] = self._maior_pk + 1
+        if pk in self.linhas:
+            raise ErroConsulta(409, "23505", f"Chave duplicada: {self.pk}={pk}")
+
+        self._ordenada = self._ordenada and pk > self._maior_pk
+        self._maior_pk = max(self._maior_pk, pk)
+        self.linhas[pk] = linha
+        self._indexar(linha)
+        return linha
+
+    def atualizar(self, linha: dict, valores: dict):
+        reindexar = any(coluna in self.indices for coluna in valores)
+        if reindexar:
+            self._indexar(linha, remover=True)
+        linha.update(valores)
+        for coluna in valores:
+            self.colunas.setdefault(coluna, None)
+        if reindexar:
+            self._indexar(linha)
+
+    def remover(self, linha: dict):
+        self._indexar(linha, remover=True)
+        del self.linhas[linha[self.pk]]
+
+    def em_ordem(self, desc: bool = False):
+        """Linhas na ordem da chave primária"""
+        if not self._ordenada:
+            self.linhas = dict(sorted(self.linhas.items()))
+            self._ordenada = True
+        return reversed(self.linhas.values()) if desc else iter(self.linhas.values())
+
+    def pks(self, coluna: str, valores: list):
+        """Chaves das linhas com coluna em `valores` pelo índice; None se a coluna não tem índice"""
+        if coluna == self.pk:
+            return {pk for pk in valores if pk in self.linhas}
+        indice = self.indices.get(coluna)
+        if indice is None:
+            return None
+        encontradas = set()
+        for valor in valores:
+            encontradas |= indice.get(valor, set())
+        return encontradas
+
+    def buscar(self, coluna: str, valor) -> list:
+        """Linhas com coluna = valor (usado nos embeds), em ordem de chave"""
+        if valor is None:
+            return []
+        pks = self.pks(coluna, [valor])
+        if pks is None:
+            return [linha for linha in self.em_ordem() if linha.get(coluna) == valor]
+        return [self.linhas[pk] for pk in sorted(pks)]
+
+
+class Banco:
+    def __init__(self, tabelas: dict):
+        self.tabelas = {nome: Tabela(nome, linhas) for nome, linhas in tabelas.items()}
+        for nome in ESQUEMA:
+            self.tabelas.setdefault(nome, Tabela(nome))
+
+    def tabela(self, nome: str) -> Tabela:
+        tabela = self.tabelas.get(nome)
+        if tabela is None:
+            raise ErroConsulta(404, "42P01", f'relation "public.{nome}" does not exist')
+        return tabela
+
+
+# ------------------------
+# Consultas
+# ------------------------
+class Embed:
+    """Recurso embutido no select: [alias:]nome[!fk][!inner](colunas)"""
+
+    def __init__(self, tabela: str, item: str):
+        cabeca, _, resto = item.partition("(")
+        alias, _, nome = cabeca.rpartition(":")
+        nome, *modificadores = nome.split("!")
+        dicas = [m for m in modificadores if m not in ("inner", "left")]
+
+        self.relacao = RELACOES.get((tabela, f"{nome}!{dicas[0]}" if dicas else nome)) or RELACOES.get((tabela, nome))
+        if self.relacao is None:
+            raise ErroConsulta(400, "PGRST200", f"Sem relação entre {tabela} e {nome}")
+        self.nome = alias or nome
+        self.inner = "inner" in modificadores
+        self.colunas = colunas(resto[:-1]) if resto[:-1].strip() else []
+        self.filtros = []
+        self.ordem = None
+        self.limite = None
+        self.offset = 0
+        # respostas=is.null (anti-join) / respostas=not.is.null
+        self.nulo = None
+
+    @property
+    def filtra(self) -> bool:
+        """Se o embed decide quais linhas do pai saem"""
+        return self.inner or self.nulo is not None
+
+    def parametro(self, chave: str, valor: str):
+        if chave == "order":
+            self.ordem = ordem(valor)
+        elif chave == "limit":
+            self.limite = int(valor)
+        elif chave == "offset":
+            self.offset = int(valor)
+        else:
+            self.filtros.append(condicao(chave, valor))
+
+    def linhas(self, banco: Banco, linha: dict) -> list:
+        cardinalidade, local, tabela, remota = self.relacao
+        encontradas = banco.tabela(tabela).buscar(remota, linha.get(local))
+        if self.filtros:
+            encontradas = [e for e in encontradas if all(f(e) for f in self.filtros)]
+        if cardinalidade == "muitos":
+            if self.ordem:
+                encontradas = ordenar(encontradas, self.ordem)
+            fim = None if self.limite is None else self.offset + self.limite
+            encontradas = encontradas[self.offset:fim]
+        return encontradas
+
+    def aceita(self, banco: Banco, linha: dict) -> bool:
+        vazio = not self.linhas(banco, linha)
+        if self.nulo is not None:
+            return vazio == self.nulo
+        return not vazio
+
+    def valor(self, banco: Banco, linha: dict):
+        encontradas = [projetar(e, self.colunas) for e in self.linhas(banco, linha)]
+        if self.relacao[0] == "um":
+            return encontradas[0] if encontradas else None
+        return encontradas
+
+
+def projetar(linha: dict, nomes) -> dict:
+    return dict(linha) if nomes is None else {nome: linha.get(nome) for nome in nomes}
+
+
+class Consulta:
+    """Parâmetros de uma requisição ao PostgREST (GET, PATCH ou DELETE) já interpretados"""
+
+    def __init__(self, banco: Banco, nome_tabela: str, params: list):
+        self.banco = banco
+        self.tabela = banco.tabela(nome_tabela)
+        self.filtros = []
+        self.indexaveis = []
+        self.ordem = None
+        self.limite = None
+        self.offset = 0
+
+        params = list(params)
+        select = next((valor for chave, valor in params if chave == "select"), "*")
+        self.colunas, self.embeds = self._select(select)
+        embeds = {embed.nome: embed for embed in self.embeds}
+
+        try:
+            for chave, valor in params:
+                if chave == "select":
+                    continue
+                if chave in ("or", "and"):
+                    self.filtros.append(logico(valor, chave))
+                elif chave == "order":
+                    self.ordem = ordem(valor)
+                elif chave == "limit":
+                    self.limite = int(valor)
+                elif chave == "offset":
+                    self.offset = int(valor)
+                elif chave in embeds:
+                    embeds[chave].nulo = valor == "is.null"
+                elif "." in chave:
+                    nome, _, resto = chave.partition(".")
+                    if nome not in embeds:
+                        raise ErroConsulta(400, "PGRST108", f"{nome} não está no select")
+                    embeds[nome].parametro(resto, valor)
+                else:
+                    self.filtros.append(condicao(chave, valor))
+                    self._indexavel(chave, valor)
+        except ValueError as erro:
+            raise ErroConsulta(400, "PGRST100", str(erro))
+
+        self.embeds_filtrantes = [embed for embed in self.embeds if embed.filtra]
+
+    def _select(self, select: str) -> tuple:
+        nomes, embeds = [], []
+        for item in dividir(select):
+            if "(" in item:
+                embeds.append(Embed(self.tabela.nome, item))
+            else:
+                nomes.append(item)
+        return (colunas(",".join(nomes)) if nomes else []), embeds
+
+    def _indexavel(self, coluna: str, valor: str):
+        """eq/in em coluna com índice: candidatas sem varrer a tabela"""
+        if coluna != self.tabela.pk and coluna not in self.tabela.indices:
+            return
+        op, _, texto = valor.partition(".")
+        if op == "eq":
+            itens = [_sem_aspas(texto)]
+        elif op == "in":
+            itens = [_sem_aspas(item) for item in dividir(texto.strip()[1:-1])]
+        else:
+            return
+        # A chave do índice é o valor da linha: texto (email, status) ou número (ids)
+        self.indexaveis.append((coluna, [v for item in itens for v in {item, _literal(item)}]))
+
+    def _candidatas(self, desc: bool):
+        melhor = None
+        for coluna, valores in self.indexaveis:
+            pks = self.tabela.pks(coluna, valores)
+            if pks is not None and (melhor is None or len(pks) < len(melhor)):
+                melhor = pks
+        if melhor is not None and len(melhor) * _SELETIVIDADE <= len(self.tabela):
+            return (self.tabela.linhas[pk] for pk in sorted(melhor, reverse=desc))
+        return self.tabela.em_ordem(desc)
+
+    def filtradas(self, desc: bool = False):
+        """Linhas que passam nos filtros, na ordem da chave primária (sob demanda)"""
+        for linha in self._candidatas(desc):
+            if all(filtro(linha) for filtro in self.filtros) and all(
+                embed.aceita(self.banco, linha) for embed in self.embeds_filtrantes
+            ):
+                yield linha
+
+    def executar(self, contar: bool = False) -> tuple:
+        """(linhas da página, total ou None). Sem `contar`, para de ler quando a página fecha"""
+        fim = None if self.limite is None else self.offset + self.limite
+        pk = self.tabela.pk
+
+        if not self.ordem or (len(self.ordem) == 1 and self.ordem[0][0] == pk):
+            desc = bool(self.ordem) and self.ordem[0][1]
+            pagina, total = [], 0
+            for linha in self.filtradas(desc):
+                if total >= self.offset and (fim is None or total < fim):
+                    pagina.append(linha)
+                total += 1
+                if not contar and fim is not None and total >= fim:
+                    break
+        else:
+            todas = ordenar(list(self.filtradas()), self.ordem)
+            total = len(todas)
+            pagina = todas[self.offset:fim]
+
+        return pagina, (total if contar else None)
+
+    def projetar(self, linha: dict) -> dict:
+        saida = projetar(linha, self.colunas)
+        for embed in self.embeds:
+            # Embed sem colunas (usuarios!inner()) só filtra
+            if embed.colunas != []:
+                saida[embed.nome] = embed.valor(self.banco, linha)
+        return saida
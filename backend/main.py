@@ -1,6 +1,22 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from utils.supabase_client import supabase
+from utils.cache import anfitrioes_cache, resumo_avaliacoes_cache
+from utils.imagens import encerrar_pool
+from utils.http_cache import ETagMiddleware
+from utils.compressao import CompressaoMiddleware
+from utils import compressao
+from utils import senhas
+from utils import metricas
+from utils import resiliencia
+from utils.metricas import MetricasMiddleware
+from utils.tracing import TracingMiddleware
+from utils.limites import LimiteMiddleware
+from utils.prazos import PrazoMiddleware
+
 from Usuario.usuario_routes import usuario_router
 from Avaliacao.avaliacao_routes import avaliacao_router
 from Anfitriao.anfitriao_routes import anfitriao_router
@@ -10,7 +26,21 @@ from Pergunta.pergunta_routes import pergunta_router
 from Upload.upload_routes import upload_router
 
 
-app = FastAPI(title="Lar Doce Pet API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pool de conexões compartilhado com o Supabase durante toda a vida da app
+    await supabase.start()
+    yield
+    await supabase.close()
+    # Processos que geram as variantes de imagem e os hashes de senha
+    encerrar_pool()
+    senhas.encerrar_pool()
+
+
+# orjson para as respostas montadas na API; listas e registros do PostgREST
+# já saem serializados (utils/respostas.py)
+app = FastAPI(title="Lar Doce Pet API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Configuração de CORS
 origins = [
@@ -22,6 +52,23 @@ origins = [
     "*",                       # durante desenvolvimento, pode deixar * (não é recomendado em produção)
 ]
 
+# ETag/304 nas rotas com Cache-Control (registrado antes do CORS para que
+# as respostas 304 também recebam os headers de CORS)
+app.add_middleware(ETagMiddleware)
+
+# gzip/brotli por fora do ETag: o hash é sempre do corpo sem compressão
+app.add_middleware(CompressaoMiddleware)
+
+# Orçamento de latência por rota: 504 quando ele acaba, com as etapas medidas até ali
+app.add_middleware(PrazoMiddleware)
+
+# Server-Timing com o tempo gasto em Supabase, S3, bcrypt e imagens (amostrado por TRACE_SAMPLE_RATE)
+app.add_middleware(TracingMiddleware)
+
+# Rate limit por IP/classe de rota e limite de requisições simultâneas (429/503 com
+# Retry-After); dentro do CORS para que o navegador consiga ler a recusa
+app.add_middleware(LimiteMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     # allow_origins=["*"],
@@ -29,12 +76,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],            # GET, POST, PUT, DELETE, OPTIONS, etc
     allow_headers=["*"],            # Headers customizados
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Server-Timing", "X-Trace-Id", "Retry-After"],  # Paginação, cache, trace e limites
 )
 
+# Contagem e latência por rota, por fora de tudo (inclui CORS e compressão)
+app.add_middleware(MetricasMiddleware)
+
 app.include_router(usuario_router)  
 app.include_router(pet_router)  
 app.include_router(anfitriao_router)  
 app.include_router(reserva_router)  
 app.include_router(avaliacao_router)
 app.include_router(pergunta_router)
-app.include_router(upload_router)
\ No newline at end of file
+app.include_router(upload_router)
+
+
+@app.get("/health", tags=['health'])
+async def health():
+    """Status da API, estatísticas do pool de conexões com o Supabase, circuitos abertos, GETs compartilhados, caches, pool de hash e compressão"""
+    return {
+        "status": "ok",
+        "supabase_pool": supabase.pool_stats(),
+        "circuitos_abertos": resiliencia.stats(),
+        "single_flight": supabase.single_flight.stats(),
+        "caches": {
+            "anfitrioes": anfitrioes_cache.stats(),
+            "resumo_avaliacoes": resumo_avaliacoes_cache.stats(),
+        },
+        "hash_senhas": senhas.stats(),
+        "compressao": compressao.stats(),
+    }
+
+
+@app.get("/metrics", tags=['health'])
+async def metrics():
+    """Métricas no formato do Prometheus: rotas, Supabase (REST/Storage), S3, hash de senha, uploads e pool"""
+    return Response(metricas.exportar(), media_type=metricas.CONTENT_TYPE)
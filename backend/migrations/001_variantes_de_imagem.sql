@@ -0,0 +1,15 @@
+-- Variantes de imagem geradas no upload (utils/imagens.py, utils/storage.py):
+-- URLs públicas de cada variante ({"thumb": ..., "medium": ..., "original": ...}).
+-- fotos_urls / foto_perfil_url continuam com a URL do original.
+--
+-- Aplicar no SQL Editor do Supabase antes de subir a API que grava essas colunas.
+
+-- Uma foto de perfil: um objeto com as variantes
+alter table usuarios add column if not exists foto_perfil_variantes jsonb;
+
+-- Várias fotos: lista de objetos, na mesma ordem de fotos_urls
+alter table pets add column if not exists fotos_variantes jsonb not null default '[]'::jsonb;
+alter table anfitrioes add column if not exists fotos_variantes jsonb not null default '[]'::jsonb;
+
+-- O PostgREST só enxerga colunas novas depois de recarregar o cache do schema
+notify pgrst, 'reload schema';
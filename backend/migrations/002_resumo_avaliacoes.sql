@@ -0,0 +1,82 @@
+-- Resumo de notas por usuário avaliado (Avaliacao/resumo.py), mantido pelo
+-- banco: um trigger em avaliacoes aplica cada escrita, então todos os
+-- workers/réplicas leem o mesmo agregado e a rota lê uma linha por avaliado.
+--
+-- Aplicar no SQL Editor do Supabase antes de subir a API que lê a tabela.
+
+create table if not exists resumo_avaliacoes (
+    id_avaliado integer primary key,
+    total integer not null default 0,
+    soma integer not null default 0,
+    -- Histograma: quantidade de avaliações com cada nota
+    nota_1 integer not null default 0,
+    nota_2 integer not null default 0,
+    nota_3 integer not null default 0,
+    nota_4 integer not null default 0,
+    nota_5 integer not null default 0
+);
+
+-- Soma (sinal = 1) ou retira (sinal = -1) uma nota do resumo do avaliado
+create or replace function aplicar_resumo_avaliacao(p_id_avaliado integer, p_nota integer, p_sinal integer)
+returns void
+language plpgsql
+as $$
+begin
+    insert into resumo_avaliacoes (id_avaliado) values (p_id_avaliado)
+    on conflict (id_avaliado) do nothing;
+
+    update resumo_avaliacoes set
+        total = total + p_sinal,
+        soma = soma + p_sinal * p_nota,
+        nota_1 = nota_1 + case when p_nota = 1 then p_sinal else 0 end,
+        nota_2 = nota_2 + case when p_nota = 2 then p_sinal else 0 end,
+        nota_3 = nota_3 + case when p_nota = 3 then p_sinal else 0 end,
+        nota_4 = nota_4 + case when p_nota = 4 then p_sinal else 0 end,
+        nota_5 = nota_5 + case when p_nota = 5 then p_sinal else 0 end
+    where id_avaliado = p_id_avaliado;
+end;
+$$;
+
+create or replace function avaliacoes_resumo_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform aplicar_resumo_avaliacao(old.id_avaliado, old.nota, -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform aplicar_resumo_avaliacao(new.id_avaliado, new.nota, 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists avaliacoes_resumo on avaliacoes;
+create trigger avaliacoes_resumo
+after insert or delete or update of id_avaliado, nota on avaliacoes
+for each row execute function avaliacoes_resumo_trigger();
+
+-- Carga inicial com as avaliações que já existem
+insert into resumo_avaliacoes (id_avaliado, total, soma, nota_1, nota_2, nota_3, nota_4, nota_5)
+select
+    id_avaliado,
+    count(*),
+    sum(nota),
+    count(*) filter (where nota = 1),
+    count(*) filter (where nota = 2),
+    count(*) filter (where nota = 3),
+    count(*) filter (where nota = 4),
+    count(*) filter (where nota = 5)
+from avaliacoes
+group by id_avaliado
+on conflict (id_avaliado) do update set
+    total = excluded.total,
+    soma = excluded.soma,
+    nota_1 = excluded.nota_1,
+    nota_2 = excluded.nota_2,
+    nota_3 = excluded.nota_3,
+    nota_4 = excluded.nota_4,
+    nota_5 = excluded.nota_5;
+
+notify pgrst, 'reload schema';
@@ -0,0 +1,36 @@
+-- Média das notas do anfitrião na própria linha de anfitrioes, para ordenar
+-- as listagens (?sort=nota_media). Vem de resumo_avaliacoes
+-- (002_resumo_avaliacoes.sql): id_avaliado é o id_usuario do anfitrião,
+-- que é o id_anfitriao. Sem avaliações a média fica null (fim da ordenação).
+--
+-- Aplicar no SQL Editor do Supabase depois da 002.
+
+alter table anfitrioes add column if not exists nota_media numeric(3, 2);
+
+-- Keyset da listagem ordenada: order=nota_media.desc.nullslast,id_anfitriao.asc
+create index if not exists anfitrioes_nota_media_idx on anfitrioes (nota_media desc nulls last, id_anfitriao);
+
+create or replace function resumo_nota_media_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+    update anfitrioes
+    set nota_media = case when new.total > 0 then round(new.soma::numeric / new.total, 2) end
+    where id_anfitriao = new.id_avaliado;
+    return null;
+end;
+$$;
+
+drop trigger if exists resumo_nota_media on resumo_avaliacoes;
+create trigger resumo_nota_media
+after insert or update of total, soma on resumo_avaliacoes
+for each row execute function resumo_nota_media_trigger();
+
+-- Carga inicial a partir dos resumos que já existem
+update anfitrioes a
+set nota_media = round(r.soma::numeric / r.total, 2)
+from resumo_avaliacoes r
+where r.id_avaliado = a.id_anfitriao and r.total > 0;
+
+notify pgrst, 'reload schema';
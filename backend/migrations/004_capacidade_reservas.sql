@@ -0,0 +1,73 @@
+-- RN004 garantida pelo banco: reservas ativas (pendente/confirmada) de um
+-- anfitrião nunca passam da capacidade_maxima em nenhum dia. A API já
+-- confere antes de gravar (Reserva/disponibilidade.py), mas o lock dela é
+-- por processo; com vários workers ou réplicas, duas reservas podem passar
+-- pela verificação ao mesmo tempo.
+--
+-- Como o anfitrião aceita até capacidade_maxima reservas sobrepostas, uma
+-- exclusion constraint (nenhuma sobreposição) não serve: o trigger trava a
+-- linha do anfitrião (as gravações concorrentes dele esperam a transação
+-- anterior) e conta a ocupação. A recusa usa o código 23P01
+-- (exclusion_violation), que o PostgREST devolve como 409.
+--
+-- Períodos como em periodo(): [data_inicio, data_fim), e reservas de um único
+-- dia ocupam aquele dia.
+--
+-- Aplicar no SQL Editor do Supabase.
+
+create or replace function reservas_capacidade_trigger()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_fim date := greatest(new.data_fim, new.data_inicio + 1);
+    v_capacidade integer;
+    v_ocupadas integer;
+begin
+    if new.status not in ('pendente', 'confirmada') then
+        return new;
+    end if;
+
+    select capacidade_maxima into v_capacidade
+    from anfitrioes
+    where id_anfitriao = new.id_anfitriao
+    for update;
+
+    -- A ocupação só aumenta no início de uma reserva: basta contar nesses dias
+    select coalesce(max(ocupadas), 0) into v_ocupadas
+    from (
+        select count(r.id_reserva) as ocupadas
+        from (
+            select new.data_inicio as dia
+            union
+            select data_inicio
+            from reservas
+            where id_anfitriao = new.id_anfitriao
+                and data_inicio > new.data_inicio
+                and data_inicio < v_fim
+        ) pontos
+        left join reservas r
+            on r.id_anfitriao = new.id_anfitriao
+            and r.status in ('pendente', 'confirmada')
+            and r.id_reserva is distinct from new.id_reserva
+            and r.data_inicio <= pontos.dia
+            and greatest(r.data_fim, r.data_inicio + 1) > pontos.dia
+        group by pontos.dia
+    ) por_dia;
+
+    if v_ocupadas + 1 > coalesce(v_capacidade, 0) then
+        raise exception 'Anfitrião sem disponibilidade para as datas informadas'
+            using errcode = 'exclusion_violation';
+    end if;
+
+    return new;
+end;
+$$;
+
+drop trigger if exists reservas_capacidade on reservas;
+create trigger reservas_capacidade
+before insert or update of id_anfitriao, data_inicio, data_fim, status on reservas
+for each row execute function reservas_capacidade_trigger();
+
+-- Consulta de sobreposição por anfitrião (trigger e Reserva/disponibilidade.py)
+create index if not exists reservas_anfitriao_periodo_idx on reservas (id_anfitriao, data_inicio, data_fim);
@@ -0,0 +1,20 @@
+-- Perguntas sem resposta por anfitrião, agrupadas no banco: a rota
+-- /perguntas/anfitriao/pendentes lê as contagens de todos os anfitriões
+-- pedidos numa única consulta (id_anfitriao=in.(...)). Anfitrião sem
+-- pendências não aparece na view.
+--
+-- Aplicar no SQL Editor do Supabase.
+
+create or replace view perguntas_pendentes as
+select p.id_anfitriao, count(*)::integer as pendentes
+from perguntas p
+where not exists (
+    select 1 from respostas r where r.id_pergunta = p.id_pergunta
+)
+group by p.id_anfitriao;
+
+-- Filtro da view e do anti-join
+create index if not exists perguntas_id_anfitriao_idx on perguntas (id_anfitriao);
+create index if not exists respostas_id_pergunta_idx on respostas (id_pergunta);
+
+notify pgrst, 'reload schema';
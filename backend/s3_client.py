@@ -1,5 +1,6 @@
 import os
 import boto3
+from botocore.config import Config
 from dotenv import load_dotenv
 
 load_dotenv() 
@@ -9,9 +10,13 @@ AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION     = os.getenv("AWS_REGION")
 AWS_BUCKET_NAME = os.getenv("AWS_BUCKET_NAME")
 
+# Conexões simultâneas do boto3 (as chamadas rodam no threadpool)
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "20"))
+
 s3 = boto3.client(
     "s3",
     aws_access_key_id=AWS_ACCESS_KEY,
     aws_secret_access_key=AWS_SECRET_KEY,
-    region_name=AWS_REGION
+    region_name=AWS_REGION,
+    config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
 )
@@ -0,0 +1,14 @@
+import os
+from dotenv import load_dotenv
+
+# Carrega o .env antes de qualquer import da app; sem configuração (ex.: CI),
+# usa valores fixos para que os testes unitários rodem contra o upstream falso
+load_dotenv()
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_KEY", "chave-de-teste")
+# Custo mínimo do bcrypt: os testes não medem a força do hash
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Todas as requisições com trace, para os testes verem o Server-Timing
+os.environ.setdefault("TRACE_SAMPLE_RATE", "1")
+# Os testes fazem centenas de requisições do mesmo "IP"; o limite tem testes próprios
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
@@ -0,0 +1,38 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils import resiliencia
+from utils.supabase_client import supabase
+
+
+class FakeSupabase:
+    """
+    Upstream falso para testes unitários: cada chamada ao Supabase passa por
+    um httpx.MockTransport e é registrada em `calls`. As respostas são
+    definidas por `handler(request) -> httpx.Response`.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.handler = lambda request: httpx.Response(200, json=[])
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request)
+        return self.handler(request)
+
+
+@pytest.fixture
+def fake_supabase():
+    fake = FakeSupabase()
+    # Circuitos fechados e sem histórico de latência a cada teste
+    resiliencia.reiniciar()
+    original = supabase._client
+    supabase._client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+    yield fake
+    supabase._client = original
+
+
+@pytest.fixture
+def client(fake_supabase):
+    return TestClient(app)
@@ -0,0 +1,24 @@
+import io
+import os
+from PIL import Image
+
+
+def png(largura=64, altura=48, ruido=False) -> bytes:
+    """PNG real para os testes de upload (ruído deixa o arquivo grande)"""
+    if ruido:
+        imagem = Image.frombytes("RGB", (largura, altura), os.urandom(largura * altura * 3))
+    else:
+        imagem = Image.new("RGBA", (largura, altura), (200, 120, 40, 128))
+    saida = io.BytesIO()
+    imagem.save(saida, "PNG")
+    return saida.getvalue()
+
+
+def jpeg_com_exif(largura=640, altura=480) -> bytes:
+    imagem = Image.new("RGB", (largura, altura), (10, 200, 30))
+    exif = Image.Exif()
+    exif[0x010F] = "Camera Teste"  # Make
+    exif[0x0112] = 6               # Orientation: girar 90°
+    saida = io.BytesIO()
+    imagem.save(saida, "JPEG", exif=exif)
+    return saida.getvalue()
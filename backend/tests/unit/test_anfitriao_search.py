@@ -0,0 +1,75 @@
+import httpx
+import pytest
+from utils.cache import anfitrioes_cache
+from utils.pagination import encode_cursor
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    anfitrioes_cache.clear()
+
+
+# ------------------------
+# GET /anfitrioes/search
+# ------------------------
+def test_search_sem_filtros_lista_ativos(client, fake_supabase):
+    response = client.get("/anfitrioes/search")
+    assert response.status_code == 200
+
+    upstream = fake_supabase.calls[0].url.params
+    assert upstream["status"] == "eq.ativo"
+    assert "usuarios(" in upstream["select"]
+    assert "!inner" not in upstream["select"]
+
+
+def test_search_filtros_no_banco(client, fake_supabase):
+    response = client.get("/anfitrioes/search", params=[
+        ("especie", "cachorro"),
+        ("especie", "gato"),
+        ("tamanho_pet", "médio"),
+        ("preco_min", "30"),
+        ("preco_max", "80"),
+        ("capacidade", "2"),
+        ("cidade", "Santos"),
+        ("uf", "sp"),
+        ("sort", "preco"),
+        ("direction", "desc"),
+    ])
+    assert response.status_code == 200
+
+    upstream = fake_supabase.calls[0].url.params
+    assert upstream["especie"] == 'cs.{"cachorro","gato"}'
+    assert upstream["tamanho_pet"] == "eq.médio"
+    assert upstream["and"] == "(preco.gte.30.0,preco.lte.80.0)"
+    assert upstream["capacidade_maxima"] == "gte.2"
+    assert upstream["usuarios.cidade"] == "ilike.Santos"
+    assert upstream["usuarios.uf"] == "eq.SP"
+    assert "usuarios!inner(" in upstream["select"]
+    assert upstream["order"] == "preco.desc.nullslast,id_anfitriao.asc"
+
+
+def test_search_ordenacao_invalida(client):
+    response = client.get("/anfitrioes/search", params={"sort": "descricao"})
+    assert response.status_code == 400
+
+
+def test_search_ordena_pela_nota_media(client, fake_supabase):
+    cursor = encode_cursor({"s": "nota_media", "d": "desc", "v": 4.5, "k": 12})
+
+    response = client.get("/anfitrioes/search", params={"sort": "nota_media", "direction": "desc", "cursor": cursor})
+    assert response.status_code == 200
+
+    upstream = fake_supabase.calls[0].url.params
+    assert upstream["order"] == "nota_media.desc.nullslast,id_anfitriao.asc"
+    assert upstream["or"] == '(nota_media.lt."4.5",nota_media.is.null,and(nota_media.eq."4.5",id_anfitriao.gt.12))'
+
+
+def test_escrita_de_avaliacao_invalida_listagem(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(201 if request.method == "POST" else 200, json=[])
+    client.get("/anfitrioes/", params={"sort": "nota_media"})
+    client.post("/avaliacoes/", json={
+        "id_reserva": 1, "id_avaliador": 3, "id_avaliado": 7, "nota": 4, "comentario": None,
+    })
+    client.get("/anfitrioes/", params={"sort": "nota_media"})
+
+    assert [r.method for r in fake_supabase.calls] == ["GET", "POST", "GET"], "nota_media mudou no banco"
@@ -0,0 +1,108 @@
+import asyncio
+import httpx
+import pytest
+from main import app
+from bench.cenarios import CENARIOS, Contexto, rotas_sem_cenario
+from bench.dados import SENHA, Volumes, gerar
+from bench.executar import comparar, executar
+from bench.falsos import S3Falso, SupabaseFalso
+from bench.postgrest import Banco
+from utils import resiliencia, senhas
+from utils.config import BCRYPT_ROUNDS
+
+OBJETO = {"Accept": "application/vnd.pgrst.object+json"}
+
+
+@pytest.fixture
+def banco():
+    return Banco(gerar(Volumes(50, 200), senhas.contexto(BCRYPT_ROUNDS).hash(SENHA)))
+
+
+def _rest(banco, metodo, caminho, **kwargs):
+    async def chamar():
+        transporte = httpx.ASGITransport(app=SupabaseFalso(banco))
+        async with httpx.AsyncClient(transport=transporte, base_url="http://supabase.bench") as cliente:
+            return await cliente.request(metodo, f"/rest/v1/{caminho}", **kwargs)
+
+    return asyncio.run(chamar())
+
+
+# ------------------------
+# PostgREST falso
+# ------------------------
+def test_filtros_ordem_e_limite(banco):
+    response = _rest(banco, "GET", "reservas", params={
+        "id_anfitriao": "eq.3", "status": "in.(pendente,confirmada)",
+        "order": "data_inicio.desc", "limit": "5", "select": "id_reserva,data_inicio,status",
+    })
+
+    linhas = response.json()
+    assert response.status_code == 200
+    assert len(linhas) <= 5
+    assert all(set(linha) == {"id_reserva", "data_inicio", "status"} for linha in linhas)
+    assert all(linha["status"] in ("pendente", "confirmada") for linha in linhas)
+    assert [l["data_inicio"] for l in linhas] == sorted((l["data_inicio"] for l in linhas), reverse=True)
+
+
+def test_embed_e_anti_join(banco):
+    com_resposta = _rest(banco, "GET", "perguntas", params={"id_pergunta": "eq.2", "select": "id_pergunta,respostas(*)"})
+    pendentes = _rest(banco, "GET", "perguntas", params={"select": "id_pergunta,respostas(id_resposta)", "respostas": "is.null"})
+
+    assert com_resposta.json()[0]["respostas"][0]["id_pergunta"] == 2
+    # Só as perguntas de id par têm resposta
+    assert {linha["id_pergunta"] % 2 for linha in pendentes.json()} == {1}
+
+
+def test_contagem_e_objeto(banco):
+    pagina = _rest(banco, "GET", "pets", params={"limit": "10"}, headers={"Prefer": "count=exact"})
+    um = _rest(banco, "GET", "pets?id_pet=eq.7", headers=OBJETO)
+    nenhum = _rest(banco, "GET", "pets?id_pet=eq.999", headers=OBJETO)
+
+    assert pagina.status_code == 206
+    assert pagina.headers["content-range"] == "0-9/50"
+    assert um.json()["id_pet"] == 7
+    assert nenhum.status_code == 406
+
+
+def test_escritas(banco):
+    criado = _rest(banco, "POST", "pets", json={"id_tutor": 20, "nome": "Rex"}, headers={"Prefer": "return=representation"})
+    alterado = _rest(banco, "PATCH", "pets?id_pet=eq.51", json={"nome": "Bob"}, headers={"Prefer": "return=representation"})
+    removido = _rest(banco, "DELETE", "pets?id_pet=eq.51")
+
+    assert criado.status_code == 201 and criado.json()[0]["id_pet"] == 51
+    assert alterado.json()[0]["nome"] == "Bob"
+    assert removido.status_code == 204
+    assert len(banco.tabela("pets")) == 50
+
+
+# ------------------------
+# Cenários e execução
+# ------------------------
+def test_todas_as_rotas_tem_cenario():
+    assert rotas_sem_cenario(app) == []
+
+
+def test_todos_os_cenarios_respondem(banco):
+    resiliencia.reiniciar()
+    resultados = asyncio.run(executar(
+        app, CENARIOS, Contexto(Volumes(50, 200)), SupabaseFalso(banco), S3Falso(),
+        concorrencias=(2,), requisicoes=2, aquecimento=0,
+    ))
+
+    falhas = {nome: niveis["2"]["status"] for nome, niveis in resultados.items() if niveis["2"]["erros"]}
+    assert falhas == {}
+    assert set(resultados) == {cenario.nome for cenario in CENARIOS}
+
+
+def test_comparacao_com_baseline():
+    medicao = {"p95_ms": 10.0, "p99_ms": 12.0, "rps": 100.0, "erros": 0, "supabase_por_requisicao": 1.0}
+    base = {"resultados": {"GET /pets/": {"8": medicao}}}
+    pior = {"resultados": {"GET /pets/": {"8": {**medicao, "p95_ms": 13.0, "supabase_por_requisicao": 2.0}}}}
+
+    assert comparar(base, base) == []
+    assert len(comparar(pior, base)) == 1
+    assert "p95_ms" in comparar(pior, base)[0] and "supabase/req" in comparar(pior, base)[0]
+
+    saturado = {"resultados": {"GET /pets/": {"8": {**medicao, "recusadas": 50}}}}
+    assert comparar(saturado, saturado) == [], "Recusas (503) não contam como erro"
+    assert "recusadas 0 -> 50" in comparar(saturado, base)[0]
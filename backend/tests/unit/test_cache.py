@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from utils.cache import TTLCache, anfitrioes_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    anfitrioes_cache.clear()
+    # Contadores acumulados por outros testes que passam pelas rotas (ex.: test_bench)
+    anfitrioes_cache.hits = anfitrioes_cache.misses = 0
+    yield
+    anfitrioes_cache.clear()
+
+
+def _anfitriao(request):
+    if request.method == "GET":
+        return httpx.Response(200, json=[{"id_anfitriao": 1, "preco": 50.0}])
+    return httpx.Response(200, json=[{"id_anfitriao": 1, "preco": 60.0}])
+
+
+# ------------------------
+# TTLCache
+# ------------------------
+def test_lru_descarta_o_mais_antigo():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expira():
+    cache = TTLCache(maxsize=2, ttl=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_geracao_antiga_nao_repovoa():
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation
+    cache.clear()
+    cache.set("a", 1, generation)
+    assert cache.get("a") is None
+
+
+
+# ------------------------
+# GET /anfitrioes (read-through)
+# ------------------------
+def test_detalhe_servido_do_cache(client, fake_supabase):
+    fake_supabase.handler = _anfitriao
+
+    assert client.get("/anfitrioes/1").json()["preco"] == 50.0
+    assert client.get("/anfitrioes/1").json()["preco"] == 50.0
+
+    assert len(fake_supabase.calls) == 1
+    assert anfitrioes_cache.stats()["hits"] == 1
+
+
+def test_detalhe_filtra_pelo_id(client, fake_supabase):
+    fake_supabase.handler = _anfitriao
+
+    client.get("/anfitrioes/5")
+
+    params = fake_supabase.calls[0].url.params
+    assert params["id_anfitriao"] == "eq.5"
+    assert "usuarios(" in params["select"]
+
+
+def test_listagem_servida_do_cache(client, fake_supabase):
+    fake_supabase.handler = _anfitriao
+
+    client.get("/anfitrioes/")
+    client.get("/anfitrioes/")
+    client.get("/anfitrioes/", params={"limit": 5})
+
+    assert len(fake_supabase.calls) == 2, "Outra página é outra chave de cache"
+
+
+def test_escrita_invalida_cache(client, fake_supabase):
+    fake_supabase.handler = _anfitriao
+
+    client.get("/anfitrioes/1")
+    response = client.put("/anfitrioes/1", json={"preco": 60.0})
+    assert response.status_code == 200
+    client.get("/anfitrioes/1")
+
+    assert [r.method for r in fake_supabase.calls] == ["GET", "PATCH", "GET"]
+
+
+def test_health_expoe_contadores_do_cache(client):
+    body = client.get("/health").json()
+    assert "hits" in body["caches"]["anfitrioes"]
+    assert "misses" in body["caches"]["anfitrioes"]
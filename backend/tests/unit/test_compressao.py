@@ -0,0 +1,101 @@
+import asyncio
+import gzip
+import httpx
+import pytest
+from starlette.responses import StreamingResponse
+from utils import compressao
+from utils.cache import anfitrioes_cache
+from utils.compressao import CompressaoMiddleware, escolher_codificacao
+
+
+def _usuarios(n):
+    return [{"id_usuario": i, "nome": f"Usuário {i}", "cidade": "Recife"} for i in range(n)]
+
+
+# ------------------------
+# Negociação
+# ------------------------
+def test_escolha_pelo_accept_encoding(monkeypatch):
+    monkeypatch.setattr(compressao, "brotli", None)
+    assert escolher_codificacao("gzip, deflate, br") == "gzip"
+    assert escolher_codificacao("gzip;q=0, deflate") is None
+    assert escolher_codificacao("identity") is None
+    assert escolher_codificacao("*") == "gzip"
+
+
+def test_brotli_preferido_quando_disponivel():
+    pytest.importorskip("brotli")
+    assert escolher_codificacao("gzip, br") == "br"
+    assert escolher_codificacao("gzip, br;q=0.5") == "gzip"
+
+
+# ------------------------
+# CompressaoMiddleware
+# ------------------------
+def test_lista_grande_comprimida(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_usuarios(200))
+    antes = compressao.stats()["codificacoes"]["gzip"]["respostas"]
+
+    response = client.get("/usuarios/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.json()[0]["nome"] == "Usuário 0", "httpx descomprime o corpo"
+    assert response.headers["ETag"].startswith("W/")
+
+    metricas = compressao.stats()["codificacoes"]["gzip"]
+    assert metricas["respostas"] == antes + 1
+    assert metricas["taxa"] < 1
+
+
+def test_etag_fraco_ainda_gera_304(client, fake_supabase):
+    anfitrioes_cache.clear()
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_usuarios(200))
+    etag = client.get("/anfitrioes/", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    response = client.get("/anfitrioes/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert response.status_code == 304
+    anfitrioes_cache.clear()
+
+
+def test_corpo_pequeno_sem_compressao(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_usuarios(1))
+
+    response = client.get("/usuarios/", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_sem_accept_encoding(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_usuarios(200))
+
+    response = client.get("/usuarios/", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streaming_comprimido_parte_a_parte():
+    async def partes():
+        for i in range(3):
+            yield (f'{{"parte": {i}, "dados": "' + "x" * 2000 + '"}\n').encode()
+
+    app = CompressaoMiddleware(StreamingResponse(partes(), media_type="application/json"))
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", b"gzip")], "state": {}}
+    mensagens = []
+
+    async def receive():
+        # Cliente nunca desconecta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        mensagens.append(message)
+
+    asyncio.run(app(scope, receive, send))
+
+    corpos = [m for m in mensagens if m["type"] == "http.response.body"]
+    assert [m.get("more_body", False) for m in corpos][-2:] == [True, False]
+    assert len(corpos) >= 3, "Cada parte sai assim que chega, sem esperar o corpo inteiro"
+    assert corpos[0]["body"], "Flush a cada parte"
+    texto = gzip.decompress(b"".join(m["body"] for m in corpos)).decode()
+    assert texto.count('"parte"') == 3
@@ -0,0 +1,136 @@
+import asyncio
+import json
+from datetime import date
+import httpx
+from main import app
+from Reserva.disponibilidade import ocupacao_maxima
+
+
+class AgendaFalsa:
+    """Upstream com um anfitrião e a tabela de reservas em memória"""
+
+    def __init__(self, capacidade, reservas=None):
+        self.capacidade = capacidade
+        self.reservas = list(reservas or [])
+
+    def __call__(self, request):
+        if request.url.path.endswith("/anfitrioes"):
+            return httpx.Response(200, json=[{"capacidade_maxima": self.capacidade}])
+        if request.method == "POST":
+            nova = {"id_reserva": len(self.reservas) + 1, **json.loads(request.content)}
+            self.reservas.append(nova)
+            return httpx.Response(201, json=[nova])
+        return httpx.Response(200, json=self.reservas)
+
+
+def _reserva(inicio, fim):
+    return {"data_inicio": inicio, "data_fim": fim}
+
+
+def _payload(inicio, fim):
+    return {"id_tutor": 1, "id_anfitriao": 2, "data_inicio": inicio, "data_fim": fim}
+
+
+# ------------------------
+# ocupacao_maxima
+# ------------------------
+def test_ocupacao_conta_apenas_sobreposicao_real():
+    reservas = [
+        _reserva("2025-01-01", "2025-01-05"),
+        _reserva("2025-01-04", "2025-01-08"),
+        _reserva("2025-01-08", "2025-01-10"),  # entra no check-out da anterior
+    ]
+    assert ocupacao_maxima(reservas, date(2025, 1, 1), date(2025, 1, 10)) == 2
+    assert ocupacao_maxima(reservas, date(2025, 1, 6), date(2025, 1, 10)) == 1
+
+
+def test_reserva_de_um_dia_ocupa_o_dia():
+    reservas = [_reserva("2025-01-03", "2025-01-03")]
+    assert ocupacao_maxima(reservas, date(2025, 1, 3), date(2025, 1, 4)) == 1
+
+
+
+# ------------------------
+# POST /reservas
+# ------------------------
+def test_create_reserva_sem_vaga(client, fake_supabase):
+    fake_supabase.handler = AgendaFalsa(1, [_reserva("2025-01-01", "2025-01-05")])
+
+    response = client.post("/reservas/", json=_payload("2025-01-03", "2025-01-06"))
+
+    assert response.status_code == 409
+    assert [r.method for r in fake_supabase.calls] == ["GET", "GET"], "Nada é gravado"
+
+
+def test_create_reserva_consulta_so_o_intervalo(client, fake_supabase):
+    fake_supabase.handler = AgendaFalsa(2)
+
+    response = client.post("/reservas/", json=_payload("2025-01-03", "2025-01-06"))
+    assert response.status_code == 201
+
+    consulta = next(r for r in fake_supabase.calls if r.url.path.endswith("/reservas") and r.method == "GET")
+    assert consulta.url.params["data_inicio"] == "lt.2025-01-06"
+    assert consulta.url.params["data_fim"] == "gte.2025-01-03"
+    assert consulta.url.params["status"] == "in.(pendente,confirmada)"
+
+
+def test_recusa_do_banco_vira_409(client, fake_supabase):
+    # Outro worker ocupou a vaga entre a verificação e a gravação: o trigger recusa
+    agenda = AgendaFalsa(1)
+
+    def handler(request):
+        if request.method == "POST":
+            return httpx.Response(409, json={"code": "23P01", "message": "Anfitrião sem disponibilidade"})
+        if request.url.path.endswith("/anfitrioes"):
+            return httpx.Response(200, json=[{"id_anfitriao": 2, "capacidade_maxima": 1}])
+        return agenda(request)
+
+    fake_supabase.handler = handler
+
+    unica = client.post("/reservas/", json=_payload("2025-01-03", "2025-01-06"))
+    lote = client.post("/reservas/batch", json=[_payload("2025-01-03", "2025-01-06")])
+
+    assert unica.status_code == 409
+    assert unica.json()["detail"] == "Anfitrião sem disponibilidade para as datas informadas"
+    assert lote.status_code == 409
+
+
+def test_create_reserva_datas_invertidas(client):
+    response = client.post("/reservas/", json=_payload("2025-01-06", "2025-01-03"))
+    assert response.status_code == 400
+
+
+def test_reservas_concorrentes_nao_duplicam(fake_supabase):
+    agenda = AgendaFalsa(1)
+    fake_supabase.handler = agenda
+
+    async def cenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as api:
+            return await asyncio.gather(*[
+                api.post("/reservas/", json=_payload("2025-02-01", "2025-02-03"))
+                for _ in range(5)
+            ])
+
+    respostas = asyncio.run(cenario())
+
+    assert sorted(r.status_code for r in respostas) == [201, 409, 409, 409, 409]
+    assert len(agenda.reservas) == 1
+
+
+
+# ------------------------
+# GET /reservas/anfitriao/{id}/disponibilidade
+# ------------------------
+def test_get_disponibilidade(client, fake_supabase):
+    fake_supabase.handler = AgendaFalsa(2, [_reserva("2025-01-01", "2025-01-05")])
+
+    response = client.get(
+        "/reservas/anfitriao/2/disponibilidade",
+        params={"data_inicio": "2025-01-02", "data_fim": "2025-01-03"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["disponivel"] is True
+    assert body["ocupacao_maxima"] == 1
@@ -0,0 +1,104 @@
+import asyncio
+import gzip
+import httpx
+from starlette.responses import StreamingResponse
+from utils.cache import anfitrioes_cache
+from utils.compressao import CompressaoMiddleware
+from utils.http_cache import ETagMiddleware, etag_confere
+
+
+def _pets(nome):
+    return lambda request: httpx.Response(200, json=[{"id_pet": 1, "nome": nome}])
+
+
+# ------------------------
+# ETag / If-None-Match
+# ------------------------
+def test_mesmo_conteudo_retorna_304(client, fake_supabase):
+    fake_supabase.handler = _pets("Rex")
+
+    primeira = client.get("/pets/tutor/1")
+    etag = primeira.headers["ETag"]
+    segunda = client.get("/pets/tutor/1", headers={"If-None-Match": etag})
+
+    assert primeira.status_code == 200
+    assert segunda.status_code == 304
+    assert segunda.content == b""
+    assert segunda.headers["ETag"] == etag
+    assert segunda.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_conteudo_alterado_retorna_200(client, fake_supabase):
+    fake_supabase.handler = _pets("Rex")
+    etag = client.get("/pets/tutor/1").headers["ETag"]
+
+    fake_supabase.handler = _pets("Bob")
+    response = client.get("/pets/tutor/1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["nome"] == "Bob"
+
+
+def test_304_com_vary_da_compressao(client, fake_supabase):
+    usuarios = [{"id_usuario": i, "nome": f"Usuário {i}"} for i in range(200)]
+    fake_supabase.handler = lambda request: httpx.Response(200, json=usuarios)
+    etag = client.get("/usuarios/", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    response = client.get("/usuarios/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_corpo_grande_segue_em_streaming_sem_etag():
+    async def partes():
+        for i in range(3):
+            yield (f'{{"parte": {i}, "dados": "' + "x" * 2000 + '"}\n').encode()
+
+    resposta = StreamingResponse(partes(), media_type="application/json", headers={"Cache-Control": "private, no-cache"})
+    app = CompressaoMiddleware(ETagMiddleware(resposta, maximo=3000))
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", b"gzip")], "state": {}}
+    mensagens = []
+
+    async def receive():
+        # Cliente nunca desconecta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        mensagens.append(message)
+
+    asyncio.run(app(scope, receive, send))
+
+    inicio = dict(mensagens[0]["headers"])
+    corpos = [m for m in mensagens if m["type"] == "http.response.body"]
+    assert b"etag" not in inicio
+    assert inicio[b"content-encoding"] == b"gzip"
+    assert len(corpos) >= 2, "Passado o limite, as partes seguem sem esperar o fim"
+    assert gzip.decompress(b"".join(m["body"] for m in corpos)).decode().count('"parte"') == 3
+
+
+def test_listagem_de_anfitrioes_publica(client):
+    anfitrioes_cache.clear()
+    response = client.get("/anfitrioes/")
+    assert response.headers["Cache-Control"] == "public, max-age=30"
+    assert "ETag" in response.headers
+    anfitrioes_cache.clear()
+
+
+def test_escritas_e_erros_sem_etag(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(201, json=[{"id_pet": 1}])
+    criado = client.post("/pets/", json={"id_tutor": 1, "nome": "Rex", "especie": "cao"})
+
+    fake_supabase.handler = lambda request: httpx.Response(406, json={"code": "PGRST116"})
+    nao_encontrado = client.get("/usuarios/99")
+
+    assert "ETag" not in criado.headers
+    assert nao_encontrado.status_code == 404
+    assert "ETag" not in nao_encontrado.headers
+
+
+def test_if_none_match_com_lista_e_fraco():
+    assert etag_confere('"a", W/"b"', '"b"')
+    assert etag_confere("*", '"c"')
+    assert not etag_confere('"a"', '"b"')
@@ -0,0 +1,53 @@
+import httpx
+from utils.cache import anfitrioes_cache
+
+
+# ------------------------
+# GET /pets?ids=
+# ------------------------
+def test_ids_em_uma_consulta(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[
+        {"id_pet": 3, "nome": "Mia"}, {"id_pet": 1, "nome": "Rex"},
+    ])
+
+    response = client.get("/pets/", params={"ids": "1,2,3,1"})
+
+    assert len(fake_supabase.calls) == 1
+    assert fake_supabase.calls[0].url.params["id_pet"] == "in.(1,2,3)"
+    assert response.json() == {
+        "resultados": {"1": {"id_pet": 1, "nome": "Rex"}, "3": {"id_pet": 3, "nome": "Mia"}},
+        "nao_encontrados": [2],
+    }
+
+
+def test_ids_invalidos(client, fake_supabase):
+    assert client.get("/usuarios/", params={"ids": "1,a"}).status_code == 400
+    assert fake_supabase.calls == []
+
+
+def test_ids_com_fields_sem_chave(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"nome": "Ana", "id_usuario": 4}])
+
+    response = client.get("/usuarios/", params={"ids": "4", "fields": "nome"})
+
+    assert fake_supabase.calls[0].url.params["select"] == "nome,id_usuario"
+    assert response.json()["resultados"] == {"4": {"nome": "Ana"}}
+
+
+# ------------------------
+# GET /anfitrioes?ids=
+# ------------------------
+def test_anfitrioes_ids_usam_cache_por_id(client, fake_supabase):
+    anfitrioes_cache.clear()
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"id_anfitriao": 1, "preco": 50}])
+    client.get("/anfitrioes/1")
+
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"id_anfitriao": 2, "preco": 80}])
+    response = client.get("/anfitrioes/", params={"ids": "1,2"})
+
+    assert fake_supabase.calls[-1].url.params["id_anfitriao"] == "in.(2)", "Só busca o que não está em cache"
+    assert set(response.json()["resultados"]) == {"1", "2"}
+
+    client.get("/anfitrioes/", params={"ids": "1,2"})
+    assert len(fake_supabase.calls) == 2
+    anfitrioes_cache.clear()
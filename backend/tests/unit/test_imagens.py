@@ -0,0 +1,31 @@
+import io
+from PIL import Image
+from utils.imagens import gerar_variantes
+from utils.config import IMAGE_THUMB_SIZE, IMAGE_MEDIUM_SIZE
+from tests.unit.imagens import jpeg_com_exif, png
+
+
+# ------------------------
+# gerar_variantes
+# ------------------------
+def test_variantes_redimensionadas_e_sem_exif():
+    variantes = gerar_variantes(jpeg_com_exif(2000, 1500))
+
+    for nome, lado in (("thumb", IMAGE_THUMB_SIZE), ("medium", IMAGE_MEDIUM_SIZE)):
+        dados, extensao, content_type = variantes[nome]
+        imagem = Image.open(io.BytesIO(dados))
+        assert imagem.format == "WEBP"
+        assert max(imagem.size) == lado
+        assert not imagem.getexif()
+
+    dados, extensao, content_type = variantes["original"]
+    original = Image.open(io.BytesIO(dados))
+    assert (extensao, content_type) == ("jpg", "image/jpeg")
+    assert original.info.get("progressive") == 1
+    assert not original.getexif()
+    assert original.size == (1500, 2000), "Orientação do EXIF aplicada antes de remover"
+
+
+def test_png_transparente_vira_jpeg():
+    dados, _, _ = gerar_variantes(png())["original"]
+    assert Image.open(io.BytesIO(dados)).mode == "RGB"
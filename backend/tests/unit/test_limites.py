@@ -0,0 +1,102 @@
+import asyncio
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils.limites import Baldes, LimiteMiddleware, classificar, ip_do_cliente
+
+
+def _app(**opcoes):
+    app = FastAPI()
+
+    @app.get("/reservas/tutor/{id}")
+    async def reservas(id: int):
+        return []
+
+    @app.post("/usuarios/login")
+    async def login():
+        return {}
+
+    @app.get("/lenta")
+    async def lenta():
+        await asyncio.sleep(0.2)
+        return {}
+
+    return LimiteMiddleware(app, habilitado=True, **opcoes)
+
+
+# ------------------------
+# Rate limit
+# ------------------------
+def test_leitura_em_loop_recebe_429():
+    client = TestClient(_app(limites={"leitura": (60, 3), "login": (60, 3)}))
+
+    status = [client.get("/reservas/tutor/1").status_code for _ in range(4)]
+
+    assert status == [200, 200, 200, 429]
+    response = client.get("/reservas/tutor/1")
+    assert response.json()["detail"]
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_classes_tem_baldes_separados():
+    client = TestClient(_app(limites={"leitura": (60, 1), "login": (60, 1)}))
+
+    assert client.get("/reservas/tutor/1").status_code == 200
+    assert client.post("/usuarios/login").status_code == 200
+    assert client.post("/usuarios/login").status_code == 429
+    assert client.get("/reservas/tutor/1").status_code == 429
+
+
+def test_balde_reabastece_com_o_tempo():
+    baldes = Baldes({"login": (60, 1)})
+
+    assert baldes.consumir("login", "1.2.3.4", agora=0) == 0
+    assert baldes.consumir("login", "1.2.3.4", agora=0.5) == 0.5
+    assert baldes.consumir("login", "5.6.7.8", agora=0.5) == 0, "Outro cliente, outro balde"
+    assert baldes.consumir("login", "1.2.3.4", agora=1.5) == 0
+
+
+def test_clientes_limitados_em_memoria():
+    baldes = Baldes({"leitura": (60, 1)}, maximo=2)
+    for ip in ("a", "b", "c"):
+        baldes.consumir("leitura", ip, agora=0)
+
+    assert len(baldes._baldes) == 2
+
+
+# ------------------------
+# Controle de admissão
+# ------------------------
+def test_acima_da_capacidade_responde_503():
+    app = _app(limites={"leitura": (6000, 100)}, max_em_andamento=2)
+
+    async def disparar():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as cliente:
+            return await asyncio.gather(*(cliente.get("/lenta") for _ in range(3)))
+
+    respostas = asyncio.run(disparar())
+
+    assert sorted(response.status_code for response in respostas) == [200, 200, 503]
+    assert app.em_andamento == 0
+
+
+# ------------------------
+# Classificação / cliente
+# ------------------------
+def test_classificar():
+    assert classificar("GET", "/anfitrioes/") == "leitura"
+    assert classificar("POST", "/usuarios/login") == "login"
+    assert classificar("POST", "/usuarios/") == "login"
+    assert classificar("POST", "/anfitrioes/3/fotos-area") == "upload"
+    assert classificar("POST", "/upload/image") == "upload"
+    assert classificar("PATCH", "/reservas/1") == "escrita"
+    assert classificar("GET", "/health") is None
+    assert classificar("OPTIONS", "/anfitrioes/") is None
+
+
+def test_ip_atras_de_proxy():
+    scope = {"client": ("10.0.0.1", 123), "headers": [(b"x-forwarded-for", b"6.6.6.6, 200.1.1.1")]}
+
+    assert ip_do_cliente(scope, confiar_proxy=False) == "10.0.0.1"
+    assert ip_do_cliente(scope, confiar_proxy=True) == "200.1.1.1"
@@ -0,0 +1,162 @@
+import json
+import httpx
+import utils.lote as lote
+
+
+def _pet(nome):
+    return {"id_tutor": 1, "nome": nome, "especie": "cao"}
+
+
+def _reserva(id_anfitriao, inicio, fim):
+    return {"id_tutor": 1, "id_anfitriao": id_anfitriao, "data_inicio": inicio, "data_fim": fim}
+
+
+class AgendaFalsa:
+    """Anfitriões {id: capacidade} e reservas ativas já gravadas"""
+
+    def __init__(self, capacidades, reservas=None):
+        self.capacidades = capacidades
+        self.reservas = list(reservas or [])
+
+    def __call__(self, request):
+        if request.url.path.endswith("/anfitrioes"):
+            return httpx.Response(200, json=[
+                {"id_anfitriao": i, "capacidade_maxima": c} for i, c in self.capacidades.items()
+            ])
+        if request.method == "POST":
+            novas = json.loads(request.content)
+            return httpx.Response(201, json=[{"id_reserva": 100 + i, **r} for i, r in enumerate(novas)])
+        return httpx.Response(200, json=self.reservas)
+
+
+# ------------------------
+# POST /pets/batch
+# ------------------------
+def test_pets_em_uma_insercao(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(201, json=json.loads(request.content))
+
+    response = client.post("/pets/batch", json=[_pet("Rex"), _pet("Mia"), _pet("Bob")])
+
+    assert response.status_code == 201
+    assert [p["nome"] for p in response.json()] == ["Rex", "Mia", "Bob"]
+    assert len(fake_supabase.calls) == 1
+    assert len(json.loads(fake_supabase.calls[0].content)) == 3
+
+
+def test_lote_vazio_ou_grande_demais(client, fake_supabase, monkeypatch):
+    monkeypatch.setattr(lote, "MAX_ITENS_POR_LOTE", 2)
+
+    assert client.post("/pets/batch", json=[]).status_code == 400
+    assert client.post("/pets/batch", json=[_pet("a"), _pet("b"), _pet("c")]).status_code == 400
+    assert fake_supabase.calls == []
+
+
+def test_pet_invalido_rejeita_o_lote(client, fake_supabase):
+    response = client.post("/pets/batch", json=[_pet("Rex"), {"nome": "sem tutor"}])
+
+    assert response.status_code == 422
+    assert fake_supabase.calls == []
+
+
+# ------------------------
+# PATCH /anfitrioes/batch/status
+# ------------------------
+def test_aprovar_anfitrioes_em_um_patch(client, fake_supabase):
+    ids = list(range(1, 501))
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"id_anfitriao": i} for i in ids[:-1]])
+
+    response = client.patch("/anfitrioes/batch/status", json={"ids": ids, "status": "ativo"})
+
+    assert len(fake_supabase.calls) == 1
+    call = fake_supabase.calls[0]
+    assert call.method == "PATCH"
+    assert call.url.params["id_anfitriao"] == f"in.({','.join(map(str, ids))})"
+    assert json.loads(call.content) == {"status": "ativo"}
+
+    body = response.json()
+    assert body["atualizados"] == 499
+    assert body["resultados"][0] == {"id": 1, "status": "atualizado"}
+    assert body["resultados"][-1] == {"id": 500, "status": "nao_encontrado"}
+
+
+# ------------------------
+# POST /reservas/batch
+# ------------------------
+def test_reservas_em_lote_respeitam_capacidade(client, fake_supabase):
+    fake_supabase.handler = AgendaFalsa({2: 1}, [{"id_anfitriao": 2, "data_inicio": "2025-01-01", "data_fim": "2025-01-05"}])
+
+    response = client.post("/reservas/batch", json=[
+        _reserva(2, "2025-01-03", "2025-01-04"),  # cruza a reserva existente
+        _reserva(2, "2025-01-10", "2025-01-12"),
+        _reserva(2, "2025-01-11", "2025-01-13"),  # cruza a anterior do mesmo lote
+        _reserva(9, "2025-01-10", "2025-01-12"),  # anfitrião inexistente
+    ])
+
+    body = response.json()
+    assert [r["status"] for r in body["resultados"]] == [
+        "sem_disponibilidade", "criada", "sem_disponibilidade", "anfitriao_nao_encontrado",
+    ]
+    assert body["criadas"] == 1
+    assert body["resultados"][1]["reserva"]["data_inicio"] == "2025-01-10"
+
+    metodos = [call.method for call in fake_supabase.calls]
+    assert metodos.count("GET") == 2, "Capacidades e agenda de todo o lote em 2 consultas"
+    assert metodos.count("POST") == 1
+    assert len(json.loads(fake_supabase.calls[-1].content)) == 1
+
+
+def test_periodo_invalido_recusa_so_o_item(client, fake_supabase):
+    fake_supabase.handler = AgendaFalsa({2: 5})
+
+    response = client.post("/reservas/batch", json=[
+        _reserva(2, "2025-01-10", "2025-01-12"),
+        _reserva(2, "2025-01-12", "2025-01-10"),  # datas invertidas
+    ])
+
+    assert response.status_code == 201
+    body = response.json()
+    assert [r["status"] for r in body["resultados"]] == ["criada", "periodo_invalido"]
+    assert body["criadas"] == 1
+    assert len(json.loads(fake_supabase.calls[-1].content)) == 1
+
+
+# ------------------------
+# PATCH /reservas/batch/status
+# ------------------------
+def test_reativacao_em_lote_passa_pela_rn004(client, fake_supabase):
+    reservas = {
+        1: {"id_reserva": 1, "id_anfitriao": 2, "data_inicio": "2025-01-01", "data_fim": "2025-01-05", "status": "pendente"},
+        2: {"id_reserva": 2, "id_anfitriao": 2, "data_inicio": "2025-01-02", "data_fim": "2025-01-03", "status": "cancelada"},
+    }
+
+    def handler(request):
+        params = request.url.params
+        if request.url.path.endswith("/anfitrioes"):
+            return httpx.Response(200, json=[{"id_anfitriao": 2, "capacidade_maxima": 1}])
+        if request.method == "PATCH":
+            ids = params["id_reserva"][4:-1].split(",")
+            return httpx.Response(200, json=[{"id_reserva": int(i)} for i in ids])
+        if params.get("id_reserva", "").startswith("in."):
+            return httpx.Response(200, json=list(reservas.values()))
+        return httpx.Response(200, json=[reservas[1]])  # agenda: só a ativa
+
+    fake_supabase.handler = handler
+
+    response = client.patch("/reservas/batch/status", json={"ids": [1, 2, 3], "status": "confirmada"})
+
+    assert response.json()["resultados"] == [
+        {"id": 1, "status": "atualizado"},
+        {"id": 2, "status": "sem_disponibilidade"},
+        {"id": 3, "status": "atualizado"},
+    ]
+    patch = [call for call in fake_supabase.calls if call.method == "PATCH"][0]
+    assert patch.url.params["id_reserva"] == "in.(1,3)"
+
+
+def test_cancelamento_em_lote_sem_verificacao(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"id_reserva": 1}])
+
+    response = client.patch("/reservas/batch/status", json={"ids": [1, 2], "status": "cancelada"})
+
+    assert [call.method for call in fake_supabase.calls] == ["PATCH"]
+    assert response.json()["atualizados"] == 1
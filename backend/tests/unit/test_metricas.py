@@ -0,0 +1,83 @@
+import httpx
+from utils import metricas
+from utils.metricas import Histograma, alvo_supabase
+
+
+def _valor(texto, linha):
+    """Valor de uma série na saída do /metrics (0 se ainda não existe)"""
+    for atual in texto.splitlines():
+        if atual.startswith(linha + " "):
+            return float(atual.rsplit(" ", 1)[1])
+    return 0.0
+
+
+# ------------------------
+# GET /metrics
+# ------------------------
+def test_rota_e_upstream_por_template(client, fake_supabase):
+    serie_rota = 'http_requests_total{method="GET",route="/pets/{id}",status="200"}'
+    serie_upstream = 'supabase_request_duration_seconds_count{api="rest",table="pets",method="GET"}'
+    antes = client.get("/metrics").text
+    fake_supabase.handler = lambda request: httpx.Response(200, json={"id_pet": 1})
+
+    client.get("/pets/1")
+    client.get("/pets/2")
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert _valor(response.text, serie_rota) == _valor(antes, serie_rota) + 2
+    assert _valor(response.text, serie_upstream) == _valor(antes, serie_upstream) + 2
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert "supabase_pool_connections{state=\"idle\"}" in response.text
+    assert "password_hash_pending 0" in response.text
+
+
+def test_compressao_exportada_por_codificacao(client, fake_supabase):
+    entrada = 'http_compression_input_bytes_total{encoding="gzip"}'
+    saida = 'http_compression_output_bytes_total{encoding="gzip"}'
+    cpu = 'http_compression_cpu_seconds_total{encoding="gzip"}'
+    fake_supabase.handler = lambda request: httpx.Response(
+        200, json=[{"id_usuario": i, "nome": f"Usuário {i}"} for i in range(200)]
+    )
+    antes = client.get("/metrics").text
+
+    client.get("/usuarios/", headers={"Accept-Encoding": "gzip"})
+    texto = client.get("/metrics").text
+
+    bytes_entrada = _valor(texto, entrada) - _valor(antes, entrada)
+    bytes_saida = _valor(texto, saida) - _valor(antes, saida)
+    assert 0 < bytes_saida < bytes_entrada
+    assert _valor(texto, cpu) > _valor(antes, cpu)
+    assert "# TYPE http_compression_cpu_seconds_total counter" in texto
+
+
+def test_rota_inexistente_nao_cria_serie_por_caminho(client):
+    client.get("/nao/existe/123")
+
+    texto = client.get("/metrics").text
+    assert 'route="nao_encontrada",status="404"' in texto
+    assert "/nao/existe/123" not in texto
+
+
+# ------------------------
+# Histograma / rótulos
+# ------------------------
+def test_histograma_acumulado():
+    histograma = Histograma("teste_duracao_seconds", "teste", ("op",), buckets=(0.1, 1.0))
+    metricas._registradas.remove(histograma)
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor, "x")
+
+    assert histograma.linhas() == [
+        'teste_duracao_seconds_bucket{op="x",le="0.1"} 2',
+        'teste_duracao_seconds_bucket{op="x",le="1.0"} 3',
+        'teste_duracao_seconds_bucket{op="x",le="+Inf"} 4',
+        'teste_duracao_seconds_sum{op="x"} 3.65',
+        'teste_duracao_seconds_count{op="x"} 4',
+    ]
+
+
+def test_alvo_supabase():
+    assert alvo_supabase("https://x.supabase.co/rest/v1/usuarios?id=eq.1") == ("rest", "usuarios")
+    assert alvo_supabase("https://x.supabase.co/storage/v1/object/fotos/a/b.jpg") == ("storage", "fotos")
+    assert alvo_supabase("https://x.supabase.co/storage/v1/object/public/fotos/a.jpg") == ("storage", "fotos")
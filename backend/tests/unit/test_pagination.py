@@ -0,0 +1,82 @@
+import httpx
+from utils.pagination import encode_cursor, decode_cursor
+
+
+def _linhas(ids):
+    return [{"id_pet": i, "nome": f"Pet {i}"} for i in ids]
+
+
+# ------------------------
+# Cursor
+# ------------------------
+def test_cursor_ida_e_volta():
+    cursor = encode_cursor({"s": "nome", "d": "asc", "v": "Rex, o \"bravo\"", "k": 7})
+    assert decode_cursor(cursor) == {"s": "nome", "d": "asc", "v": "Rex, o \"bravo\"", "k": 7}
+
+
+def test_cursor_invalido(client):
+    response = client.get("/pets/", params={"cursor": "nao-e-um-cursor"})
+    assert response.status_code == 400
+
+
+
+# ------------------------
+# GET /pets?limit=
+# ------------------------
+def test_primeira_pagina_tem_next_cursor(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_linhas([1, 2, 3]))
+
+    response = client.get("/pets/", params={"limit": 2})
+    assert response.status_code == 200
+    assert [p["id_pet"] for p in response.json()] == [1, 2]
+    assert "X-Next-Cursor" in response.headers
+
+    upstream = fake_supabase.calls[0].url.params
+    assert upstream["limit"] == "3", "Busca limit + 1 para detectar a próxima página"
+    assert upstream["order"] == "id_pet.asc"
+
+
+def test_proxima_pagina_usa_keyset(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_linhas([1, 2, 3]))
+    cursor = client.get("/pets/", params={"limit": 2}).headers["X-Next-Cursor"]
+
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_linhas([3]))
+    response = client.get("/pets/", params={"limit": 2, "cursor": cursor})
+
+    assert [p["id_pet"] for p in response.json()] == [3]
+    assert "X-Next-Cursor" not in response.headers
+    assert fake_supabase.calls[-1].url.params["id_pet"] == "gt.2"
+
+
+def test_keyset_por_coluna_de_ordenacao(client, fake_supabase):
+    cursor = encode_cursor({"s": "nome", "d": "desc", "v": "Rex", "k": 9})
+
+    client.get("/pets/tutor/5", params={"sort": "nome", "direction": "desc", "cursor": cursor})
+
+    upstream = fake_supabase.calls[0].url.params
+    assert upstream["id_tutor"] == "eq.5"
+    assert upstream["order"] == "nome.desc.nullslast,id_pet.asc"
+    assert upstream["or"] == '(nome.lt."Rex",nome.is.null,and(nome.eq."Rex",id_pet.gt.9))'
+
+
+def test_cursor_de_outra_ordenacao(client):
+    cursor = encode_cursor({"s": "id_pet", "d": "asc", "v": 2, "k": 2})
+    response = client.get("/pets/", params={"sort": "nome", "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_ordenacao_nao_permitida(client):
+    response = client.get("/pets/", params={"sort": "observacoes"})
+    assert response.status_code == 400
+
+
+def test_total_count(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(
+        206, json=_linhas([1]), headers={"Content-Range": "0-0/42"}
+    )
+
+    response = client.get("/pets/", params={"limit": 1, "count": "exact"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "42"
+    assert fake_supabase.calls[0].headers["Prefer"] == "count=exact"
@@ -0,0 +1,101 @@
+import asyncio
+import time
+import httpx
+from utils.cache import anfitrioes_cache, resumo_avaliacoes_cache
+from Reserva.disponibilidade import periodos_lotados
+
+
+def _reserva(inicio, fim):
+    return {"data_inicio": inicio, "data_fim": fim}
+
+
+def _pergunta(id_pergunta, texto, respostas):
+    return {
+        "id_pergunta": id_pergunta, "id_tutor": 1, "id_anfitriao": 7, "pergunta": texto,
+        "data_envio": f"2030-01-0{id_pergunta}T10:00:00", "respostas": respostas,
+    }
+
+
+class SupabaseLento:
+    """Cada tabela responde depois de `atraso` segundos"""
+
+    def __init__(self, atraso):
+        self.atraso = atraso
+        self.em_paralelo = 0
+        self.maximo_em_paralelo = 0
+
+    async def __call__(self, request):
+        self.em_paralelo += 1
+        self.maximo_em_paralelo = max(self.maximo_em_paralelo, self.em_paralelo)
+        await asyncio.sleep(self.atraso)
+        self.em_paralelo -= 1
+
+        tabela = request.url.path.rsplit("/", 1)[-1]
+        if tabela == "anfitrioes":
+            return httpx.Response(200, json=[{"id_anfitriao": 7, "capacidade_maxima": 1}])
+        if tabela == "resumo_avaliacoes":
+            return httpx.Response(200, json=[{
+                "id_avaliado": 7, "total": 2, "soma": 9, "nota_1": 0, "nota_2": 0, "nota_3": 0, "nota_4": 1, "nota_5": 1,
+            }])
+        if tabela == "avaliacoes":
+            return httpx.Response(200, json=[{"id_avaliacao": 3, "nota": 5, "avaliador": {"nome": "Ana"}}])
+        if tabela == "perguntas":
+            return httpx.Response(200, json=[
+                _pergunta(9, "Aceita gatos?", [{"resposta": "Sim"}]),
+                _pergunta(8, "Tem quintal?", []),
+            ])
+        return httpx.Response(200, json=[_reserva("2030-01-01", "2030-01-05"), _reserva("2030-01-05", "2030-01-07")])
+
+
+# ------------------------
+# GET /anfitrioes/{id}/perfil
+# ------------------------
+def test_perfil_em_paralelo(client, fake_supabase):
+    anfitrioes_cache.clear()
+    resumo_avaliacoes_cache.clear()
+    upstream = SupabaseLento(0.2)
+    fake_supabase.handler = upstream
+
+    inicio = time.perf_counter()
+    response = client.get("/anfitrioes/7/perfil", params={"perguntas_limit": 1})
+    duracao = time.perf_counter() - inicio
+
+    assert response.status_code == 200
+    assert len(fake_supabase.calls) == 5
+    assert upstream.maximo_em_paralelo == 5
+    assert duracao < 0.6, "Latência da consulta mais lenta, não a soma"
+
+    body = response.json()
+    assert body["anfitriao"]["id_anfitriao"] == 7
+    assert body["resumo_avaliacoes"]["media"] == 4.5
+    assert body["avaliacoes"][0]["avaliador"]["nome"] == "Ana"
+    assert body["perguntas"]["itens"] == [{
+        "id_pergunta": 9, "id_tutor": 1, "id_anfitriao": 7,
+        "pergunta": "Aceita gatos?", "data_envio": "2030-01-09T10:00:00", "resposta": {"resposta": "Sim"},
+    }]
+    assert body["perguntas"]["next_cursor"]
+    assert body["periodos_lotados"] == [{"data_inicio": "2030-01-01", "data_fim": "2030-01-07"}]
+    anfitrioes_cache.clear()
+    resumo_avaliacoes_cache.clear()
+
+
+def test_perfil_anfitriao_inexistente(client, fake_supabase):
+    anfitrioes_cache.clear()
+    response = client.get("/anfitrioes/99/perfil")
+    assert response.status_code == 404
+
+
+# ------------------------
+# periodos_lotados
+# ------------------------
+def test_periodos_lotados_so_com_capacidade_cheia():
+    reservas = [
+        _reserva("2030-01-01", "2030-01-05"),
+        _reserva("2030-01-03", "2030-01-08"),
+        _reserva("2030-01-10", "2030-01-12"),
+    ]
+    assert periodos_lotados(reservas, 2) == [{"data_inicio": "2030-01-03", "data_fim": "2030-01-05"}]
+    assert periodos_lotados(reservas, 1) == [
+        {"data_inicio": "2030-01-01", "data_fim": "2030-01-08"},
+        {"data_inicio": "2030-01-10", "data_fim": "2030-01-12"},
+    ]
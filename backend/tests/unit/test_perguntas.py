@@ -0,0 +1,91 @@
+import httpx
+
+
+def _pergunta(id_pergunta, id_anfitriao=2, respostas=()):
+    return {
+        "id_pergunta": id_pergunta, "id_tutor": 5, "id_anfitriao": id_anfitriao,
+        "pergunta": f"Pergunta {id_pergunta}", "data_envio": f"2030-01-0{id_pergunta}T10:00:00",
+        "respostas": list(respostas),
+    }
+
+
+# ------------------------
+# GET /perguntas/anfitriao/{id}
+# ------------------------
+def test_lista_paginada_por_data_envio(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[
+        _pergunta(1, respostas=[{"id_resposta": 4, "resposta": "Sim"}]),
+        _pergunta(2),
+        _pergunta(3),
+    ])
+
+    response = client.get("/perguntas/anfitriao/2", params={"limit": 2})
+
+    params = fake_supabase.calls[0].url.params
+    assert params["order"] == "data_envio.asc.nullslast,id_pergunta.asc"
+    assert params["respostas.limit"] == "1", "Só a primeira resposta sai do PostgREST"
+    assert "respostas" not in params
+    assert response.headers["X-Next-Cursor"]
+
+    body = response.json()
+    assert [pergunta["id_pergunta"] for pergunta in body] == [1, 2]
+    assert body[0]["resposta"] == {"id_resposta": 4, "resposta": "Sim"}
+    assert body[1]["resposta"] is None
+    assert "respostas" not in body[0]
+
+
+def test_lista_so_sem_resposta(client, fake_supabase):
+    client.get("/perguntas/anfitriao/2", params={"sem_resposta": True})
+
+    assert fake_supabase.calls[0].url.params["respostas"] == "is.null"
+
+
+def test_cursor_invalido_400(client, fake_supabase):
+    response = client.get("/perguntas/anfitriao/2", params={"cursor": "x"})
+
+    assert response.status_code == 400
+    assert fake_supabase.calls == []
+
+
+# ------------------------
+# GET /perguntas/anfitriao/pendentes
+# ------------------------
+def test_pendentes_por_anfitriao(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[
+        {"id_anfitriao": 2, "pendentes": 1500},
+        {"id_anfitriao": 3, "pendentes": 1},
+    ])
+
+    response = client.get("/perguntas/anfitriao/pendentes", params={"ids": "2,3,4"})
+
+    assert len(fake_supabase.calls) == 1, "Uma leitura para todos os anfitriões"
+    call = fake_supabase.calls[0]
+    assert call.url.path.endswith("/perguntas_pendentes")
+    assert call.url.params["id_anfitriao"] == "in.(2,3,4)"
+    assert response.json() == {"2": 1500, "3": 1, "4": 0}, "Sem linha na view: nenhuma pendente"
+
+
+def test_pendentes_erro_do_supabase(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(400, text="erro")
+
+    response = client.get("/perguntas/anfitriao/pendentes", params={"ids": "2"})
+
+    assert response.status_code == 400
+
+
+# ------------------------
+# GET /perguntas/{id}
+# ------------------------
+def test_pergunta_por_id(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=_pergunta(1))
+
+    response = client.get("/perguntas/1")
+
+    assert response.json()["resposta"] is None
+    assert fake_supabase.calls[0].url.params["respostas.limit"] == "1"
+
+
+def test_pergunta_inexistente_404(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(406, json={"code": "PGRST116"})
+
+    assert client.get("/perguntas/99").status_code == 404
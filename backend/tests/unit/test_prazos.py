@@ -0,0 +1,97 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from utils import prazos, tracing
+from utils.prazos import PrazoMiddleware, prazo
+
+
+@pytest.fixture
+def orcamento_curto(monkeypatch):
+    monkeypatch.setitem(prazos.ORCAMENTOS, "leitura", 0.1)
+
+
+def _lento(segundos):
+    async def handler(request):
+        await asyncio.sleep(segundos)
+        return httpx.Response(200, json={"id_pet": 1})
+    return handler
+
+
+def test_504_quando_orcamento_acaba(client, fake_supabase, orcamento_curto):
+    fake_supabase.handler = _lento(1)
+
+    inicio = time.perf_counter()
+    response = client.get("/pets/1")
+
+    assert response.status_code == 504
+    assert time.perf_counter() - inicio < 0.8
+    corpo = response.json()
+    assert corpo["orcamento_ms"] == 100.0
+    assert corpo["decorrido_ms"] >= 100.0
+    assert [(span["tipo"], span["status"]) for span in corpo["etapas"]] == [("supabase_rest", "cancelada")]
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+def test_timeout_do_upstream_limitado_ao_orcamento(client, fake_supabase, orcamento_curto):
+    fake_supabase.handler = lambda request: httpx.Response(200, json={"id_pet": 1})
+
+    assert client.get("/pets/1").status_code == 200
+    timeout = fake_supabase.calls[0].extensions["timeout"]
+    assert 0 < timeout["read"] <= 0.1 + prazos.FOLGA
+
+
+def test_dentro_do_orcamento_nao_muda_resposta(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json={"id_pet": 1})
+
+    response = client.get("/pets/1")
+
+    assert response.status_code == 200
+    assert response.json()["id_pet"] == 1
+
+
+def test_prazo_declarado_pela_rota():
+    app = FastAPI()
+
+    @app.get("/curta", dependencies=[Depends(prazo(0.05))])
+    async def curta():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    @app.get("/padrao")
+    async def padrao():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    client = TestClient(PrazoMiddleware(app))
+
+    response = client.get("/curta")
+    assert response.status_code == 504
+    assert response.json()["orcamento_ms"] == 50.0
+    assert client.get("/padrao").status_code == 200
+
+
+def test_504_sem_amostragem_traz_as_etapas(monkeypatch):
+    app = FastAPI()
+    registrados = []
+
+    @app.get("/lenta")
+    async def lenta():
+        registrados.append(tracing.trace_atual())
+        tracing.registrar("supabase_rest", "GET usuarios", time.perf_counter(), status="200")
+        await asyncio.sleep(0.2)
+
+    monkeypatch.setitem(prazos.ORCAMENTOS, "leitura", 0.05)
+    response = TestClient(PrazoMiddleware(app)).get("/lenta")
+
+    assert response.status_code == 504
+    assert [span["nome"] for span in response.json()["etapas"]] == ["GET usuarios"]
+    assert registrados == [None], "Sem trace: nada de log nem Server-Timing"
+    assert "server-timing" not in response.headers
+
+
+def test_restante_fora_de_requisicao():
+    assert prazos.restante() is None
+    assert prazos.restante(3) == 3
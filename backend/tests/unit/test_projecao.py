@@ -0,0 +1,147 @@
+import httpx
+import pytest
+
+
+# ------------------------
+# ?fields=
+# ------------------------
+def test_usuarios_nunca_trazem_senha_hash(client, fake_supabase):
+    client.get("/usuarios/")
+    client.get("/usuarios/1")
+
+    for call in fake_supabase.calls:
+        assert "senha_hash" not in call.url.params["select"]
+
+
+def test_campo_proibido_rejeitado(client, fake_supabase):
+    response = client.get("/usuarios/", params={"fields": "nome,senha_hash"})
+
+    assert response.status_code == 400
+    assert fake_supabase.calls == []
+
+
+def test_campo_invalido_rejeitado(client, fake_supabase):
+    response = client.get("/pets/", params={"fields": "nome,usuarios(*)"})
+
+    assert response.status_code == 400
+    assert fake_supabase.calls == []
+
+
+def test_colunas_do_cursor_pedidas_e_removidas(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[
+        {"nome": "Rex", "especie": "cao", "id_pet": 1},
+        {"nome": "Mia", "especie": "gato", "id_pet": 2},
+    ])
+
+    response = client.get("/pets/", params={"fields": "nome", "sort": "especie", "limit": 1})
+
+    assert fake_supabase.calls[0].url.params["select"] == "nome,id_pet,especie"
+    assert response.json() == [{"nome": "Rex"}]
+    assert "X-Next-Cursor" in response.headers, "Cursor montado antes de remover as colunas"
+
+
+def test_anfitrioes_sem_join(client, fake_supabase):
+    client.get("/anfitrioes/", params={"fields": "*"})
+    client.get("/anfitrioes/", params={"fields": "id_anfitriao,preco,usuarios"})
+
+    selects = [call.url.params["select"] for call in fake_supabase.calls]
+    assert selects[0] == "*"
+    assert selects[1].startswith("id_anfitriao,preco,usuarios(id_usuario,nome")
+
+
+def test_busca_por_cidade_sem_colunas_do_usuario(client, fake_supabase):
+    client.get("/anfitrioes/search", params={"cidade": "Recife", "fields": "id_anfitriao,preco"})
+
+    upstream = fake_supabase.calls[0].url.params
+    assert upstream["select"] == "id_anfitriao,preco,usuarios!inner()"
+    assert upstream["usuarios.cidade"] == "ilike.Recife"
+
+
+def test_login_busca_so_colunas_necessarias(client, fake_supabase):
+    client.post("/usuarios/login", json={"email": "ana@exemplo.com", "senha": "x"})
+
+    upstream = fake_supabase.calls[0].url.params
+    assert upstream["select"] == "id_usuario,nome,email,tipo,telefone,senha_hash"
+    assert upstream["email"] == "eq.ana@exemplo.com"
+
+
+# ------------------------
+# ?return=minimal
+# ------------------------
+def test_escrita_minimal_sem_corpo(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(201)
+
+    response = client.post("/pets/", params={"return": "minimal"}, json={
+        "id_tutor": 1, "nome": "Rex", "especie": "cao",
+    })
+
+    assert response.status_code == 201
+    assert response.content == b""
+    assert fake_supabase.calls[0].headers["Prefer"] == "return=minimal"
+    assert "select" not in fake_supabase.calls[0].url.params
+
+
+def test_escrita_representation_com_fields(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"id_pet": 3}])
+
+    response = client.put("/pets/3", params={"fields": "id_pet"}, json={"nome": "Rex"})
+
+    assert response.json() == [{"id_pet": 3}]
+    assert fake_supabase.calls[0].headers["Prefer"] == "return=representation"
+    assert fake_supabase.calls[0].url.params["select"] == "id_pet"
+
+
+# ------------------------
+# Filtro das escritas por id
+# ------------------------
+ATUALIZACOES = [
+    ("/usuarios/5", {"nome": "Ana"}, "id_usuario"),
+    ("/pets/5", {"nome": "Rex"}, "id_pet"),
+    ("/anfitrioes/5", {"preco": 80.0}, "id_anfitriao"),
+    ("/reservas/5", {"data_inicio": None, "data_fim": None, "status": "cancelada"}, "id_reserva"),
+    ("/avaliacoes/5", {"comentario": "Ótimo"}, "id_avaliacao"),
+]
+
+
+def _escrita(request):
+    if request.headers.get("Prefer") == "return=minimal":
+        return httpx.Response(204)
+    return httpx.Response(200, json=[{"id": 5}])
+
+
+@pytest.mark.parametrize("retorno", ["representation", "minimal"])
+@pytest.mark.parametrize("rota, corpo, coluna", ATUALIZACOES)
+def test_put_envia_filtro_do_id(client, fake_supabase, rota, corpo, coluna, retorno):
+    fake_supabase.handler = _escrita
+
+    response = client.put(rota, params={"return": retorno}, json=corpo)
+
+    assert response.status_code in (200, 204)
+    patch = [call for call in fake_supabase.calls if call.method == "PATCH"]
+    assert len(patch) == 1
+    assert patch[0].url.params[coluna] == "eq.5"
+    assert ("select" in patch[0].url.params) == (retorno == "representation")
+
+
+@pytest.mark.parametrize("rota, coluna", [(rota, coluna) for rota, _, coluna in ATUALIZACOES])
+def test_delete_envia_filtro_do_id(client, fake_supabase, rota, coluna):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[])
+
+    response = client.delete(rota)
+
+    assert response.status_code == 204
+    assert [call.method for call in fake_supabase.calls] == ["DELETE"]
+    assert fake_supabase.calls[0].url.params[coluna] == "eq.5"
+
+
+@pytest.mark.parametrize("rota, coluna", [
+    ("/anfitrioes/batch/status", "id_anfitriao"),
+    ("/reservas/batch/status", "id_reserva"),
+])
+def test_patch_em_lote_envia_filtro_dos_ids(client, fake_supabase, rota, coluna):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[])
+
+    client.patch(rota, json={"ids": [5, 6], "status": "cancelada"})
+
+    patch = [call for call in fake_supabase.calls if call.method == "PATCH"]
+    assert patch[0].url.params[coluna] == "in.(5,6)"
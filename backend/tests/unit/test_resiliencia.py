@@ -0,0 +1,105 @@
+import asyncio
+import httpx
+import pytest
+from utils import resiliencia, supabase_client
+from utils.resiliencia import Disjuntor
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(resiliencia, "backoff", lambda tentativa: 0)
+
+
+def _sequencia(*respostas):
+    """Handler que devolve as respostas na ordem (exceções são levantadas)"""
+    fila = list(respostas)
+
+    def handler(request):
+        resposta = fila.pop(0) if len(fila) > 1 else fila[0]
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+    return handler
+
+
+# ------------------------
+# Retentativas
+# ------------------------
+def test_get_repetido_apos_503(client, fake_supabase):
+    fake_supabase.handler = _sequencia(httpx.Response(503), httpx.Response(200, json={"id_pet": 1}))
+    antes = resiliencia.RETENTATIVAS._valores.get(("rest", "pets"), 0)
+
+    response = client.get("/pets/1")
+
+    assert response.status_code == 200
+    assert len(fake_supabase.calls) == 2
+    assert resiliencia.RETENTATIVAS._valores[("rest", "pets")] == antes + 1
+
+
+def test_get_repetido_apos_erro_de_conexao(client, fake_supabase):
+    fake_supabase.handler = _sequencia(httpx.ConnectError("recusada"), httpx.Response(200, json={"id_pet": 1}))
+
+    assert client.get("/pets/1").status_code == 200
+    assert len(fake_supabase.calls) == 2
+
+
+def test_escrita_nao_repetida(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(503)
+
+    client.delete("/pets/1")
+
+    assert len(fake_supabase.calls) == 1
+
+
+# ------------------------
+# Circuit breaker
+# ------------------------
+def test_circuito_abre_e_recusa_sem_chamar_upstream(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(503)
+    client.get("/pets/1")
+    client.get("/pets/2")
+    chamadas = len(fake_supabase.calls)
+
+    response = client.get("/pets/3")
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert len(fake_supabase.calls) == chamadas
+    assert 'supabase_circuit_state{api="rest",table="pets"} 2' in client.get("/metrics").text
+    assert client.get("/health").json()["circuitos_abertos"]["rest/pets"]["estado"] == "aberto"
+
+
+def test_meio_aberto_deixa_passar_um_teste():
+    disjuntor = Disjuntor(("rest", "pets"), falhas=1, aberto=0)
+    disjuntor.falha()
+
+    disjuntor.verificar()
+    with pytest.raises(Exception):
+        disjuntor.verificar()
+
+    disjuntor.sucesso()
+    disjuntor.verificar()
+    assert disjuntor.estado == "fechado"
+
+
+# ------------------------
+# Hedge
+# ------------------------
+def test_hedge_apos_p95(client, fake_supabase, monkeypatch):
+    monkeypatch.setattr(supabase_client, "SUPABASE_HEDGE", True)
+    for _ in range(50):
+        resiliencia.latencias(("rest", "pets")).observar(0.01)
+    chamadas = []
+
+    async def handler(request):
+        chamadas.append(request)
+        if len(chamadas) == 1:
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={"id_pet": len(chamadas)})
+
+    fake_supabase.handler = handler
+
+    response = client.get("/pets/1")
+
+    assert response.json() == {"id_pet": 2}, "A segunda requisição respondeu primeiro"
+    assert resiliencia.HEDGES._valores[("rest", "pets")] >= 1
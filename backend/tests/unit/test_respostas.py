@@ -0,0 +1,74 @@
+import httpx
+import pytest
+from utils.cache import anfitrioes_cache
+
+CORPO = b'{"id_pet":1,"nome":"Rex","observacoes":"sem  espa\\u00e7os"}'
+
+
+# ------------------------
+# Repasse do PostgREST
+# ------------------------
+def test_registro_repassado_byte_a_byte(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, content=CORPO)
+
+    response = client.get("/pets/1")
+
+    assert response.content == CORPO, "Sem decodificar e re-serializar"
+    assert response.headers["content-type"] == "application/json"
+    assert fake_supabase.calls[0].headers["Accept"] == "application/vnd.pgrst.object+json"
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert "ETag" in response.headers
+
+
+@pytest.mark.parametrize("rota,filtro", [
+    ("/usuarios/4", "id_usuario"),
+    ("/pets/4", "id_pet"),
+    ("/reservas/4", "id_reserva"),
+    ("/avaliacoes/4", "id_avaliacao"),
+])
+def test_registro_filtra_pelo_id(client, fake_supabase, rota, filtro):
+    fake_supabase.handler = lambda request: httpx.Response(200, content=CORPO)
+
+    client.get(rota)
+
+    params = fake_supabase.calls[0].url.params
+    assert params[filtro] == "eq.4"
+    assert "select" in params
+
+
+def test_registro_inexistente(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(406, json={"code": "PGRST116"})
+
+    response = client.get("/reservas/5")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Reserva não encontrada"
+
+
+def test_escrita_repassada(client, fake_supabase):
+    corpo = b'[{"id_pet":3,"nome":"Rex"}]'
+    fake_supabase.handler = lambda request: httpx.Response(201, content=corpo)
+
+    response = client.post("/pets/", json={"id_tutor": 1, "nome": "Rex", "especie": "cao"})
+
+    assert response.status_code == 201
+    assert response.content == corpo
+
+
+# ------------------------
+# Listas serializadas com orjson
+# ------------------------
+def test_pagina_em_cache_guarda_corpo_serializado(client, fake_supabase):
+    anfitrioes_cache.clear()
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"id_anfitriao": i} for i in range(3)])
+
+    primeira = client.get("/anfitrioes/", params={"limit": 2})
+    segunda = client.get("/anfitrioes/", params={"limit": 2})
+
+    assert len(fake_supabase.calls) == 1
+    assert primeira.content == segunda.content == b'[{"id_anfitriao":0},{"id_anfitriao":1}]'
+    assert segunda.headers["X-Next-Cursor"] == primeira.headers["X-Next-Cursor"]
+
+    corpo, _ = next(iter(anfitrioes_cache._data.values()))[1]
+    assert isinstance(corpo, bytes)
+    anfitrioes_cache.clear()
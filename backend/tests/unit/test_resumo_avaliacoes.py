@@ -0,0 +1,113 @@
+import json
+import httpx
+import pytest
+from utils.cache import resumo_avaliacoes_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    resumo_avaliacoes_cache.clear()
+
+
+class ResumosFalsos:
+    """resumo_avaliacoes como o trigger deixa; escritas em avaliacoes só respondem"""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def __call__(self, request):
+        if request.url.path.endswith("/resumo_avaliacoes"):
+            return httpx.Response(200, json=self.linhas)
+        if request.method == "POST":
+            return httpx.Response(201, json=[{"id_avaliacao": 99, **json.loads(request.content)}])
+        if request.method == "DELETE":
+            return httpx.Response(200, json=[{"id_avaliado": 7}])
+        return httpx.Response(200, json=[{"id_avaliacao": 1, **json.loads(request.content)}])
+
+    def leituras(self, calls):
+        return [r for r in calls if r.url.path.endswith("/resumo_avaliacoes")]
+
+
+def _resumo(id_avaliado, *notas):
+    linha = {"id_avaliado": id_avaliado, "total": len(notas), "soma": sum(notas)}
+    linha.update({f"nota_{nota}": notas.count(nota) for nota in range(1, 6)})
+    return linha
+
+
+# ------------------------
+# GET /avaliacoes/avaliado/{id}/resumo
+# ------------------------
+def test_resumo_lido_da_tabela(client, fake_supabase):
+    fake_supabase.handler = ResumosFalsos([_resumo(7, 5, 4, 4)])
+
+    body = client.get("/avaliacoes/avaliado/7/resumo").json()
+    client.get("/avaliacoes/avaliado/7/resumo")
+
+    assert body["total"] == 3
+    assert body["media"] == 4.33
+    assert body["histograma"] == {"1": 0, "2": 0, "3": 0, "4": 2, "5": 1}
+    assert len(fake_supabase.calls) == 1, "Cache em memória na frente da linha"
+    assert fake_supabase.calls[0].url.params["id_avaliado"] == "in.(7)"
+
+
+def test_resumo_sem_avaliacoes(client):
+    body = client.get("/avaliacoes/avaliado/8/resumo").json()
+    assert body["total"] == 0
+    assert body["media"] is None
+
+
+@pytest.mark.parametrize("escrita", [
+    lambda client: client.post("/avaliacoes/", json={
+        "id_reserva": 1, "id_avaliador": 3, "id_avaliado": 7, "nota": 4, "comentario": None,
+    }),
+    lambda client: client.put("/avaliacoes/1", json={"nota": 5, "comentario": None}),
+    lambda client: client.delete("/avaliacoes/99"),
+])
+def test_escritas_descartam_o_resumo(client, fake_supabase, escrita):
+    falso = ResumosFalsos([_resumo(7, 2)])
+    fake_supabase.handler = falso
+    client.get("/avaliacoes/avaliado/7/resumo")
+
+    escrita(client)
+    falso.linhas = [_resumo(7, 2, 4)]
+
+    assert client.get("/avaliacoes/avaliado/7/resumo").json()["media"] == 3.0
+    assert len(falso.leituras(fake_supabase.calls)) == 2, "Relido do banco, já atualizado pelo trigger"
+
+
+def test_put_sem_nota_mantem_o_resumo(client, fake_supabase):
+    falso = ResumosFalsos([_resumo(7, 2)])
+    fake_supabase.handler = falso
+    client.get("/avaliacoes/avaliado/7/resumo")
+
+    client.put("/avaliacoes/1", json={"nota": None, "comentario": "Ótimo"})
+    client.get("/avaliacoes/avaliado/7/resumo")
+
+    assert len(falso.leituras(fake_supabase.calls)) == 1
+
+
+def test_put_nao_le_a_avaliacao_anterior(client, fake_supabase):
+    fake_supabase.handler = ResumosFalsos([])
+
+    client.put("/avaliacoes/1", json={"nota": 5, "comentario": None})
+
+    assert [r.method for r in fake_supabase.calls] == ["PATCH"]
+
+
+# ------------------------
+# GET /avaliacoes/avaliado/resumo?ids=
+# ------------------------
+def test_resumo_em_lote(client, fake_supabase):
+    fake_supabase.handler = ResumosFalsos([_resumo(1, 5), _resumo(2, 3)])
+
+    body = client.get("/avaliacoes/avaliado/resumo", params={"ids": "1,2,3"}).json()
+
+    assert body["1"]["media"] == 5.0
+    assert body["2"]["media"] == 3.0
+    assert body["3"]["total"] == 0
+    assert fake_supabase.calls[0].url.params["id_avaliado"] == "in.(1,2,3)"
+
+
+def test_resumo_em_lote_ids_invalidos(client):
+    response = client.get("/avaliacoes/avaliado/resumo", params={"ids": "1,a"})
+    assert response.status_code == 400
@@ -0,0 +1,116 @@
+import json
+import os
+import httpx
+from concurrent.futures.process import BrokenProcessPool
+import utils.senhas as senhas
+from utils.senhas import contexto
+
+
+def _usuario(senha_hash):
+    return {"id_usuario": 5, "nome": "Ana", "email": "ana@exemplo.com", "senha_hash": senha_hash}
+
+
+def _login(client, senha="segredo"):
+    return client.post("/usuarios/login", json={"email": "ana@exemplo.com", "senha": senha})
+
+
+def _patches(fake_supabase):
+    return [json.loads(call.content) for call in fake_supabase.calls if call.method == "PATCH"]
+
+
+# ------------------------
+# POST /usuarios/login
+# ------------------------
+def test_login_com_custo_atual_nao_regrava(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[_usuario(contexto(4).hash("segredo"))])
+
+    assert _login(client).status_code == 200
+    assert _patches(fake_supabase) == []
+
+
+def test_login_regrava_hash_com_custo_antigo(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[_usuario(contexto(5).hash("segredo"))])
+
+    assert _login(client).status_code == 200
+
+    patches = _patches(fake_supabase)
+    assert len(patches) == 1
+    assert patches[0]["senha_hash"].startswith("$2b$04$"), "Hash regravado com BCRYPT_ROUNDS"
+    assert contexto(4).verify("segredo", patches[0]["senha_hash"])
+
+
+def test_login_senha_errada(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[_usuario(contexto(5).hash("segredo"))])
+
+    assert _login(client, senha="outra").status_code == 401
+    assert _patches(fake_supabase) == [], "Senha errada nunca regrava o hash"
+
+
+def test_login_hash_invalido(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[_usuario("texto-puro")])
+
+    assert _login(client).status_code == 401
+
+
+def test_fila_cheia_retorna_503(client, fake_supabase, monkeypatch):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[_usuario(contexto(4).hash("segredo"))])
+    monkeypatch.setattr(senhas, "_pendentes", senhas.HASH_MAX_PENDING)
+
+    response = _login(client)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_espera_alem_do_prazo_retorna_503(client, fake_supabase, monkeypatch):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[_usuario(contexto(4).hash("segredo"))])
+    # Cada hash leva 10 s: nem o primeiro da fila cabe no prazo do login
+    monkeypatch.setattr(senhas, "_custo", 10.0)
+
+    response = _login(client)
+
+    assert response.status_code == 503
+    assert senhas.stats()["operacoes"]["verificar"]["rejeitadas"] >= 1
+
+
+def test_worker_morto_retorna_503_e_recria_pool(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[_usuario(contexto(4).hash("segredo"))])
+    pool = senhas._pool_senhas()
+    assert isinstance(pool.submit(os._exit, 1).exception(), BrokenProcessPool)
+
+    response = _login(client)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert senhas._pool is None
+
+    assert _login(client).status_code == 200
+    assert senhas._pool is not pool
+
+
+def test_espera_estimada_pelos_workers(monkeypatch):
+    monkeypatch.setattr(senhas, "_custo", 0.25)
+    monkeypatch.setattr(senhas, "HASH_WORKERS", 2)
+    monkeypatch.setattr(senhas, "_pendentes", 5)
+
+    # 6 operações em 2 processos: 3 rodadas de 250 ms
+    assert senhas.espera_estimada() == 0.75
+
+
+# ------------------------
+# POST /usuarios/
+# ------------------------
+def test_cadastro_grava_hash(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(201, json=[json.loads(request.content)])
+
+    response = client.post("/usuarios/", json={
+        "nome": "Ana", "email": "ana@exemplo.com", "senha_hash": "segredo",
+        "data_cadastro": None, "logradouro": None, "numero": None, "bairro": None,
+        "cidade": None, "uf": None, "cep": None, "complemento": None,
+    })
+
+    assert response.status_code == 201
+    gravado = json.loads(fake_supabase.calls[0].content)["senha_hash"]
+    assert gravado != "segredo"
+    assert contexto(4).verify("segredo", gravado)
+    assert senhas.stats()["operacoes"]["hash"]["chamadas"] >= 1
@@ -0,0 +1,131 @@
+import asyncio
+import httpx
+from main import app
+from utils.cache import anfitrioes_cache
+from utils.supabase_client import supabase, HEADERS
+
+
+class SupabaseLento:
+    """Responde depois de `atraso` segundos, contando as chamadas por método"""
+
+    def __init__(self, atraso=0.1):
+        self.atraso = atraso
+        self.metodos = []
+
+    async def __call__(self, request):
+        self.metodos.append(request.method)
+        await asyncio.sleep(self.atraso)
+        return httpx.Response(200, json=[{"id_pet": 1, "id_anfitriao": 1}])
+
+
+def _em_paralelo(*chamadas):
+    async def executar():
+        return await asyncio.gather(*(chamada() for chamada in chamadas))
+    return asyncio.run(executar())
+
+
+# ------------------------
+# SupabaseClient.request
+# ------------------------
+def test_gets_identicos_compartilham_uma_chamada(fake_supabase):
+    upstream = SupabaseLento()
+    fake_supabase.handler = upstream
+    url = "http://supabase.test/rest/v1/pets"
+
+    respostas = _em_paralelo(*[
+        lambda: supabase.get(url, params={"id_pet": "eq.1"}, headers=HEADERS) for _ in range(20)
+    ])
+
+    assert upstream.metodos == ["GET"]
+    assert all(response.json() == [{"id_pet": 1, "id_anfitriao": 1}] for response in respostas)
+    assert supabase.single_flight.stats()["pico_por_tabela"]["rest/pets"] >= 20
+    assert supabase.single_flight.stats()["em_voo"] == 0
+
+
+def test_credenciais_diferentes_nao_compartilham(fake_supabase):
+    upstream = SupabaseLento()
+    fake_supabase.handler = upstream
+    url = "http://supabase.test/rest/v1/pets"
+    outro_usuario = {**HEADERS, "Authorization": "Bearer token-do-usuario"}
+
+    _em_paralelo(
+        lambda: supabase.get(url, headers=HEADERS),
+        lambda: supabase.get(url, headers=outro_usuario),
+        lambda: supabase.get(url, params={"id_pet": "eq.2"}, headers=HEADERS),
+    )
+
+    assert upstream.metodos == ["GET", "GET", "GET"]
+
+
+def test_ultimo_cancelado_cancela_a_chamada(fake_supabase):
+    upstream = SupabaseLento(atraso=1)
+    fake_supabase.handler = upstream
+    url = "http://supabase.test/rest/v1/pets"
+
+    async def executar():
+        tarefa = asyncio.ensure_future(supabase.get(url, headers=HEADERS))
+        await asyncio.sleep(0.05)
+        tarefa.cancel()
+        try:
+            await tarefa
+        except asyncio.CancelledError:
+            pass
+        return supabase.single_flight.stats()["em_voo"]
+
+    assert asyncio.run(executar()) == 0
+    assert upstream.metodos == ["GET"]
+
+
+def test_health_so_mostra_contagens(fake_supabase):
+    fake_supabase.handler = SupabaseLento(atraso=0.5)
+    url = "http://supabase.test/rest/v1/usuarios"
+
+    async def executar():
+        tarefa = asyncio.ensure_future(supabase.get(url, params={"email": "eq.ana@exemplo.com"}, headers=HEADERS))
+        await asyncio.sleep(0.05)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as cliente:
+            response = await cliente.get("/health")
+        await tarefa
+        return response
+
+    response = asyncio.run(executar())
+
+    assert "ana@exemplo.com" not in response.text
+    assert HEADERS["apikey"] not in response.text
+    assert response.json()["single_flight"]["por_tabela"]["rest/usuarios"] == {"em_voo": 1, "aguardando": 1}
+
+
+def test_leitura_depois_da_escrita_nao_usa_get_anterior(fake_supabase):
+    upstream = SupabaseLento()
+    fake_supabase.handler = upstream
+    url = "http://supabase.test/rest/v1/pets"
+
+    async def ler_depois_da_escrita():
+        await asyncio.sleep(0.02)
+        await supabase.patch(url, json={"nome": "Rex"}, headers=HEADERS)
+        return await supabase.get(url, headers=HEADERS)
+
+    _em_paralelo(lambda: supabase.get(url, headers=HEADERS), ler_depois_da_escrita)
+
+    assert upstream.metodos == ["GET", "PATCH", "GET"]
+
+
+# ------------------------
+# Rotas
+# ------------------------
+def test_rotas_de_anfitriao_concorrentes(fake_supabase):
+    anfitrioes_cache.clear()
+    upstream = SupabaseLento()
+    fake_supabase.handler = upstream
+
+    async def cliente_get():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as cliente:
+            return await cliente.get("/anfitrioes/1")
+
+    respostas = _em_paralelo(*[cliente_get for _ in range(10)])
+
+    assert all(response.status_code == 200 for response in respostas)
+    assert upstream.metodos == ["GET"]
+    anfitrioes_cache.clear()
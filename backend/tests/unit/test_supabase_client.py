@@ -0,0 +1,52 @@
+import asyncio
+import httpx
+import pytest
+from utils.supabase_client import supabase, HEADERS
+
+
+# ------------------------
+# Cliente compartilhado
+# ------------------------
+def test_routers_usam_cliente_compartilhado(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(200, json=[{"id_pet": 1}])
+
+    client.get("/pets/")
+    client.get("/pets/1")
+
+    assert len(fake_supabase.calls) == 2
+    for request in fake_supabase.calls:
+        assert request.headers["apikey"] == HEADERS["apikey"]
+
+
+def test_contadores_do_pool(client, fake_supabase):
+    antes = supabase.requests_total
+
+    client.get("/pets/")
+
+    assert supabase.requests_total == antes + 1
+    assert supabase.in_flight == 0
+
+
+@pytest.mark.parametrize("params", [{"select": "id_pet"}, {}])
+def test_params_nao_apagam_filtros_da_url(fake_supabase, params):
+    # {} é o Retorno.params() das escritas com return=minimal
+    url = "http://supabase.test/rest/v1/pets?id_pet=eq.7"
+
+    asyncio.run(supabase.patch(url, params=params, json={"nome": "Rex"}, headers=HEADERS))
+
+    enviados = fake_supabase.calls[0].url.params
+    assert enviados["id_pet"] == "eq.7"
+    assert dict(enviados) == {"id_pet": "eq.7", **params}
+
+
+# ------------------------
+# GET /health
+# ------------------------
+def test_health_expoe_estatisticas_do_pool(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["status"] == "ok"
+    for chave in ("connections", "idle", "active", "requests_total", "in_flight"):
+        assert chave in body["supabase_pool"]
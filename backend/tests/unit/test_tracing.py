@@ -0,0 +1,72 @@
+import json
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils import tracing
+from utils.tracing import TracingMiddleware
+
+
+def _server_timing(response):
+    """{tipo: (desc, dur)} do header Server-Timing"""
+    itens = {}
+    for item in response.headers["Server-Timing"].split(","):
+        nome, *parametros = [parte.strip() for parte in item.split(";")]
+        valores = dict(parametro.split("=", 1) for parametro in parametros)
+        itens[nome] = (valores.get("desc", "").strip('"'), float(valores["dur"]))
+    return itens
+
+
+# ------------------------
+# Server-Timing
+# ------------------------
+def test_cadastro_separa_bcrypt_e_supabase(client, fake_supabase):
+    fake_supabase.handler = lambda request: httpx.Response(201, json=[json.loads(request.content)])
+
+    response = client.post("/usuarios/", json={
+        "nome": "Ana", "email": "ana@exemplo.com", "senha_hash": "segredo",
+        "data_cadastro": None, "logradouro": None, "numero": None, "bairro": None,
+        "cidade": None, "uf": None, "cep": None, "complemento": None,
+    })
+
+    itens = _server_timing(response)
+    assert response.status_code == 201
+    assert itens["bcrypt"][0] == "1x"
+    assert itens["supabase_rest"][0] == "1x"
+    assert itens["total"][1] >= itens["bcrypt"][1]
+    assert response.headers["X-Trace-Id"]
+
+
+def test_spans_no_log(client, fake_supabase, caplog):
+    fake_supabase.handler = lambda request: httpx.Response(200, json={"id_pet": 1})
+    tracing.logger.addHandler(caplog.handler)
+    try:
+        response = client.get("/pets/1")
+    finally:
+        tracing.logger.removeHandler(caplog.handler)
+
+    registro = json.loads(caplog.records[-1].getMessage())
+    assert registro["trace_id"] == response.headers["X-Trace-Id"]
+    assert registro["route"] == "/pets/{id}"
+    assert registro["status"] == 200
+    assert registro["spans"] == [{
+        "tipo": "supabase_rest",
+        "nome": "GET /rest/v1/pets",
+        "inicio_ms": registro["spans"][0]["inicio_ms"],
+        "duracao_ms": registro["spans"][0]["duracao_ms"],
+        "status": "200",
+        "bytes": len(b'{"id_pet":1}'),
+    }]
+
+
+def test_fora_da_amostragem_sem_header():
+    app = FastAPI()
+
+    @app.get("/")
+    async def raiz():
+        tracing.registrar("s3", "put_object", 0.0)
+        return {"trace": tracing.trace_atual() is not None}
+
+    response = TestClient(TracingMiddleware(app, taxa=0)).get("/")
+
+    assert response.json() == {"trace": False}
+    assert "Server-Timing" not in response.headers
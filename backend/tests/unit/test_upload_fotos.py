@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+import httpx
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from utils import imagens
+from utils.config import STORAGE_UPLOAD_CONCURRENCY, UPLOAD_MAX_BYTES
+from tests.unit.imagens import png
+
+
+class StorageFalso:
+    """Storage com latência: mede quantos uploads ficam em paralelo"""
+
+    def __init__(self, falhar_em=None):
+        self.em_andamento = 0
+        self.maximo = 0
+        self.falhar_em = falhar_em
+        self.uploads = 0
+
+    async def __call__(self, request):
+        if request.method == "POST" and "/storage/" in request.url.path:
+            self.uploads += 1
+            numero = self.uploads
+            self.em_andamento += 1
+            self.maximo = max(self.maximo, self.em_andamento)
+            await asyncio.sleep(0.01)
+            self.em_andamento -= 1
+            if numero == self.falhar_em:
+                return httpx.Response(500, text="falhou")
+            return httpx.Response(200, json={"Key": "ok"})
+        return httpx.Response(200, json=[])
+
+
+def _arquivos(n):
+    return [("arquivos", (f"foto{i}.png", png(), "image/png")) for i in range(n)]
+
+
+# ------------------------
+# POST /pets/{id}/fotos
+# ------------------------
+def test_uploads_em_paralelo_limitados(client, fake_supabase):
+    storage = StorageFalso()
+    fake_supabase.handler = storage
+
+    response = client.post("/pets/3/fotos", files=_arquivos(3))
+
+    assert response.status_code == 200
+    assert len(response.json()["fotos_urls"]) == 3
+    assert storage.uploads == 9, "thumb + medium + original por foto"
+    assert 1 < storage.maximo <= STORAGE_UPLOAD_CONCURRENCY
+    assert fake_supabase.calls[-1].method == "PATCH"
+
+
+def test_falha_remove_enviados_e_nao_atualiza(client, fake_supabase):
+    fake_supabase.handler = StorageFalso(falhar_em=2)
+
+    response = client.post("/anfitrioes/3/fotos-area", files=_arquivos(2))
+
+    assert response.status_code == 500
+    metodos = [r.method for r in fake_supabase.calls]
+    assert "PATCH" not in metodos
+    assert metodos[-1] == "DELETE"
+
+    removidos = json.loads(fake_supabase.calls[-1].content)["prefixes"]
+    assert len(removidos) == 5
+    assert all(caminho.startswith("fotos/3/area_3_") for caminho in removidos)
+
+
+def test_foto_grande_ou_de_outro_tipo_recusada(client, fake_supabase):
+    storage = StorageFalso()
+    fake_supabase.handler = storage
+    grande = b"\x89PNG\r\n\x1a\n" + b"0" * UPLOAD_MAX_BYTES
+
+    response = client.post("/pets/3/fotos", files=[("arquivos", ("grande.png", grande, "image/png"))])
+    gif = client.post("/usuarios/3/foto-perfil", files={"arquivo": ("foto.png", b"GIF89a" + b"0" * 100, "image/png")})
+
+    assert response.status_code == 400
+    assert "muito grande" in response.json()["detail"]
+    assert gif.status_code == 400
+    assert storage.uploads == 0
+
+
+def test_worker_de_imagem_morto_recria_pool(client, fake_supabase):
+    fake_supabase.handler = StorageFalso()
+    pool = imagens._pool_imagens()
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os._exit, 1).result()
+
+    quebrado = client.post("/pets/3/fotos", files=_arquivos(1))
+
+    assert quebrado.status_code == 503
+    assert quebrado.headers["Retry-After"] == "1"
+    assert imagens._pool is None
+
+    response = client.post("/pets/3/fotos", files=_arquivos(1))
+
+    assert response.status_code == 200
+    assert imagens._pool is not None and imagens._pool is not pool
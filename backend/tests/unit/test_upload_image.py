@@ -0,0 +1,69 @@
+import pytest
+import Upload.upload_routes as upload_routes
+from tests.unit.imagens import png
+
+PARTE = 5 * 1024 * 1024
+
+
+class S3Falso:
+    def __init__(self):
+        self.chamadas = []
+
+    def __getattr__(self, nome):
+        def chamada(**kwargs):
+            self.chamadas.append((nome, kwargs))
+            return {}
+        return chamada
+
+    def nomes(self):
+        return [nome for nome, _ in self.chamadas]
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    falso = S3Falso()
+    monkeypatch.setattr(upload_routes, "s3", falso)
+    monkeypatch.setattr(upload_routes, "AWS_BUCKET_NAME", "bucket-teste")
+    return falso
+
+
+def _enviar(client, conteudo, content_type="image/png"):
+    return client.post("/upload/image", files={"file": ("foto.png", conteudo, content_type)})
+
+
+# ------------------------
+# POST /upload/image
+# ------------------------
+def test_imagem_gera_variantes_com_put_object(client, s3):
+    response = _enviar(client, png())
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["filename"].endswith(".jpg")
+    assert set(body["variantes"]) == {"thumb", "medium", "original"}
+    assert s3.nomes() == ["put_object"] * 3
+
+    content_types = sorted(kwargs["ContentType"] for _, kwargs in s3.chamadas)
+    assert content_types == ["image/jpeg", "image/webp", "image/webp"]
+
+
+def test_tipo_detectado_pelo_conteudo(client, s3):
+    response = _enviar(client, b"GIF89a" + b"0" * 100, content_type="image/png")
+
+    assert response.status_code == 400
+    assert s3.chamadas == []
+
+
+def test_arquivo_grande_rejeitado_durante_leitura(client, s3):
+    response = _enviar(client, b"\x89PNG\r\n\x1a\n" + b"0" * PARTE)
+
+    assert response.status_code == 400
+    assert s3.chamadas == []
+
+
+def test_imagem_corrompida(client, s3):
+    response = _enviar(client, b"\x89PNG\r\n\x1a\n" + b"0" * 100)
+
+    assert response.status_code == 400
+    assert s3.chamadas == []
+
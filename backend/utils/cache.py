@@ -0,0 +1,93 @@
+import time
+from collections import OrderedDict
+from utils.config import (
+    ANFITRIOES_CACHE_SIZE,
+    ANFITRIOES_CACHE_TTL,
+    RESUMO_AVALIACOES_CACHE_SIZE,
+    RESUMO_AVALIACOES_CACHE_TTL,
+)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache em memória (por processo) com expiração por TTL e descarte LRU
+    quando atinge `maxsize`. Conta hits, misses e descartes para monitoramento.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Incrementa a cada clear(): uma leitura iniciada antes de uma escrita
+        # não pode repovoar o cache com dados antigos
+        self.generation = 0
+
+    def get(self, key, default=None):
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, generation: int = None):
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def peek(self, key):
+        """Lê sem contar hit/miss nem renovar a posição LRU (usado em escritas)"""
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def discard(self, key):
+        """Invalida uma chave; leituras em andamento não a repovoam"""
+        self._data.pop(key, None)
+        self.generation += 1
+        self.invalidations += 1
+
+    def clear(self):
+        """Invalida tudo (usado pelas rotas de escrita)"""
+        self._data.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Listagens e detalhe de anfitriões (join anfitrioes + usuarios)
+anfitrioes_cache = TTLCache(maxsize=ANFITRIOES_CACHE_SIZE, ttl=ANFITRIOES_CACHE_TTL)
+
+# Resumo de notas (total, soma, média, histograma) por usuário avaliado
+resumo_avaliacoes_cache = TTLCache(maxsize=RESUMO_AVALIACOES_CACHE_SIZE, ttl=RESUMO_AVALIACOES_CACHE_TTL)
@@ -0,0 +1,198 @@
+import time
+import zlib
+from fastapi import Depends, Request
+from starlette.datastructures import Headers, MutableHeaders
+from utils import metricas as prometheus
+from utils.config import (
+    COMPRESSAO_MIN_BYTES,
+    COMPRESSAO_GZIP_NIVEL,
+    COMPRESSAO_BR_NIVEL,
+    COMPRESSAO_LISTAS_GZIP_NIVEL,
+    COMPRESSAO_LISTAS_BR_NIVEL,
+)
+
+# brotli é opcional: sem o pacote, só gzip é negociado
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tipos que valem a pena comprimir (imagens já vêm comprimidas)
+TIPOS_COMPRIMIVEIS = ("application/json", "text/")
+
+
+def _metricas_vazias() -> dict:
+    return {"respostas": 0, "bytes_entrada": 0, "bytes_saida": 0, "cpu_ms": 0.0}
+
+
+_metricas = {"br": _metricas_vazias(), "gzip": _metricas_vazias()}
+
+
+def compressao(gzip: int, br: int):
+    """Dependency que define os níveis de compressão da rota (via request.state)"""
+    def definir(request: Request):
+        request.state.compressao = {"gzip": gzip, "br": br}
+    return definir
+
+
+# Uso: @router.get("/", dependencies=CACHE_PUBLICO + COMPRESSAO_LISTAS)
+COMPRESSAO_LISTAS = [Depends(compressao(COMPRESSAO_LISTAS_GZIP_NIVEL, COMPRESSAO_LISTAS_BR_NIVEL))]
+
+
+def escolher_codificacao(accept_encoding: str):
+    """br quando disponível e aceito, senão gzip; respeita q=0"""
+    aceitas = {}
+    for item in accept_encoding.split(","):
+        partes = [parte.strip() for parte in item.split(";")]
+        nome = partes[0].lower()
+        q = 1.0
+        for parametro in partes[1:]:
+            if parametro.startswith("q="):
+                try:
+                    q = float(parametro[2:])
+                except ValueError:
+                    q = 0.0
+        if nome:
+            aceitas[nome] = q
+
+    candidatas = ("br", "gzip") if brotli is not None else ("gzip",)
+    melhor = None
+    for nome in candidatas:
+        q = aceitas.get(nome, aceitas.get("*", 0.0))
+        if q > 0 and (melhor is None or q > melhor[1]):
+            melhor = (nome, q)
+    return melhor[0] if melhor else None
+
+
+class Compressor:
+    """Compressão incremental de um corpo (gzip ou br), medindo bytes e CPU"""
+
+    def __init__(self, codificacao: str, nivel: int):
+        self.codificacao = codificacao
+        self.bytes_entrada = 0
+        self.bytes_saida = 0
+        self.cpu = 0.0
+        if codificacao == "br":
+            self._br = brotli.Compressor(quality=nivel)
+        else:
+            self._gzip = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+
+    def comprimir(self, dados: bytes, final: bool) -> bytes:
+        inicio = time.thread_time()
+        if self.codificacao == "br":
+            saida = self._br.process(dados) + (self._br.finish() if final else self._br.flush())
+        else:
+            modo = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+            saida = self._gzip.compress(dados) + self._gzip.flush(modo)
+        self.cpu += time.thread_time() - inicio
+
+        self.bytes_entrada += len(dados)
+        self.bytes_saida += len(saida)
+        if final:
+            metricas = _metricas[self.codificacao]
+            metricas["respostas"] += 1
+            metricas["bytes_entrada"] += self.bytes_entrada
+            metricas["bytes_saida"] += self.bytes_saida
+            metricas["cpu_ms"] += self.cpu * 1000
+            prometheus.COMPRESSAO_BYTES_ENTRADA.inc(self.codificacao, valor=self.bytes_entrada)
+            prometheus.COMPRESSAO_BYTES_SAIDA.inc(self.codificacao, valor=self.bytes_saida)
+            prometheus.COMPRESSAO_CPU.inc(self.codificacao, valor=self.cpu)
+        return saida
+
+
+def _comprimivel(message: dict, headers: Headers) -> bool:
+    if message["status"] in (204, 304) or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(TIPOS_COMPRIMIVEIS)
+
+
+class CompressaoMiddleware:
+    """
+    Middleware ASGI de compressão gzip/brotli negociada pelo Accept-Encoding.
+
+    - Corpos menores que COMPRESSAO_MIN_BYTES saem sem compressão
+    - Níveis por rota via dependency `compressao` (default: COMPRESSAO_*_NIVEL)
+    - Respostas em várias partes (more_body) são comprimidas parte a parte,
+      com flush a cada uma, sem acumular o corpo inteiro em memória
+    - O ETag vira fraco (W/): o corpo comprimido não é byte a byte o original
+    """
+
+    def __init__(self, app, minimo: int = COMPRESSAO_MIN_BYTES):
+        self.app = app
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        codificacao = escolher_codificacao(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compressor = None
+
+        async def enviar(message):
+            nonlocal inicio, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                tamanho = headers.get("content-length")
+                if not _comprimivel(message, headers) or (tamanho is not None and int(tamanho) < self.minimo):
+                    await send(message)
+                    return
+                inicio = message
+                return
+
+            if message["type"] != "http.response.body" or inicio is None:
+                await send(message)
+                return
+
+            corpo = message.get("body", b"")
+            mais = message.get("more_body", False)
+
+            if compressor is None:
+                if not mais and len(corpo) < self.minimo:
+                    # Corpo sem Content-Length que terminou pequeno
+                    await send(inicio)
+                    await send(message)
+                    inicio = None
+                    return
+
+                niveis = scope.get("state", {}).get("compressao") or {
+                    "gzip": COMPRESSAO_GZIP_NIVEL,
+                    "br": COMPRESSAO_BR_NIVEL,
+                }
+                compressor = Compressor(codificacao, niveis[codificacao])
+
+                headers = MutableHeaders(raw=list(inicio["headers"]))
+                del headers["content-length"]
+                headers["Content-Encoding"] = codificacao
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                await send({**inicio, "headers": headers.raw})
+
+            dados = compressor.comprimir(corpo, final=not mais)
+            await send({"type": "http.response.body", "body": dados, "more_body": mais})
+
+        await self.app(scope, receive, enviar)
+
+
+def stats() -> dict:
+    """Taxa de compressão e CPU gasto por codificação, para o /health"""
+    return {
+        "brotli_disponivel": brotli is not None,
+        "minimo_bytes": COMPRESSAO_MIN_BYTES,
+        "codificacoes": {
+            codificacao: {
+                **metricas,
+                "taxa": round(metricas["bytes_saida"] / metricas["bytes_entrada"], 4)
+                if metricas["bytes_entrada"] else None,
+            }
+            for codificacao, metricas in _metricas.items()
+        },
+    }
@@ -1,10 +1,122 @@
 from dotenv import load_dotenv
-from os import getenv
-from passlib.context import CryptContext
+from os import cpu_count, getenv
 
 load_dotenv()
 
 SUPABASE_URL = getenv('SUPABASE_URL')
 SUPABASE_KEY = getenv('SUPABASE_KEY')
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pool de conexões HTTP com o Supabase (utils/supabase_client.py)
+SUPABASE_HTTP2 = getenv('SUPABASE_HTTP2', 'true').lower() == 'true'
+SUPABASE_MAX_CONNECTIONS = int(getenv('SUPABASE_MAX_CONNECTIONS', '100'))
+SUPABASE_MAX_KEEPALIVE = int(getenv('SUPABASE_MAX_KEEPALIVE', '20'))
+SUPABASE_KEEPALIVE_EXPIRY = float(getenv('SUPABASE_KEEPALIVE_EXPIRY', '30'))
+SUPABASE_CONNECT_TIMEOUT = float(getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+SUPABASE_READ_TIMEOUT = float(getenv('SUPABASE_READ_TIMEOUT', '15'))
+SUPABASE_WRITE_TIMEOUT = float(getenv('SUPABASE_WRITE_TIMEOUT', '15'))
+SUPABASE_POOL_TIMEOUT = float(getenv('SUPABASE_POOL_TIMEOUT', '5'))
+
+# Paginação por cursor das rotas de listagem (utils/pagination.py)
+PAGINATION_DEFAULT_LIMIT = int(getenv('PAGINATION_DEFAULT_LIMIT', '100'))
+PAGINATION_MAX_LIMIT = int(getenv('PAGINATION_MAX_LIMIT', '500'))
+
+# Cache de leitura dos anfitriões (utils/cache.py)
+ANFITRIOES_CACHE_SIZE = int(getenv('ANFITRIOES_CACHE_SIZE', '512'))
+ANFITRIOES_CACHE_TTL = float(getenv('ANFITRIOES_CACHE_TTL', '60'))
+
+# Resumo de avaliações por usuário avaliado (Avaliacao/resumo.py): cópia em memória da
+# tabela resumo_avaliacoes; outros workers veem uma avaliação nova em até TTL segundos
+RESUMO_AVALIACOES_CACHE_SIZE = int(getenv('RESUMO_AVALIACOES_CACHE_SIZE', '10000'))
+RESUMO_AVALIACOES_CACHE_TTL = float(getenv('RESUMO_AVALIACOES_CACHE_TTL', '30'))
+
+# Máximo de IDs aceitos em consultas em lote (?ids=1,2,3)
+MAX_IDS_POR_CONSULTA = int(getenv('MAX_IDS_POR_CONSULTA', '100'))
+
+# Máximo de itens por requisição nas rotas em lote (/batch)
+MAX_ITENS_POR_LOTE = int(getenv('MAX_ITENS_POR_LOTE', '1000'))
+
+# Perfil do anfitrião (Anfitriao/perfil.py): últimas avaliações e perguntas por página
+PERFIL_AVALIACOES = int(getenv('PERFIL_AVALIACOES', '5'))
+PERFIL_PERGUNTAS = int(getenv('PERFIL_PERGUNTAS', '10'))
+
+# Cache-Control das rotas de leitura; respostas com ele ganham ETag/304 (utils/http_cache.py)
+CACHE_CONTROL_PUBLICO = getenv('CACHE_CONTROL_PUBLICO', 'public, max-age=30')
+CACHE_CONTROL_PRIVADO = getenv('CACHE_CONTROL_PRIVADO', 'private, no-cache')
+# Maior corpo que o ETagMiddleware acumula para calcular o hash; acima disso a
+# resposta segue em streaming (e comprimida parte a parte), sem ETag
+ETAG_MAX_BYTES = int(getenv('ETAG_MAX_BYTES', str(256 * 1024)))
+
+# Compressão gzip/brotli das respostas (utils/compressao.py). Listas grandes usam
+# níveis menores: o custo de CPU cresce com o tamanho do corpo
+COMPRESSAO_MIN_BYTES = int(getenv('COMPRESSAO_MIN_BYTES', '1024'))
+COMPRESSAO_GZIP_NIVEL = int(getenv('COMPRESSAO_GZIP_NIVEL', '6'))
+COMPRESSAO_BR_NIVEL = int(getenv('COMPRESSAO_BR_NIVEL', '5'))
+COMPRESSAO_LISTAS_GZIP_NIVEL = int(getenv('COMPRESSAO_LISTAS_GZIP_NIVEL', '4'))
+COMPRESSAO_LISTAS_BR_NIVEL = int(getenv('COMPRESSAO_LISTAS_BR_NIVEL', '4'))
+
+# Leitura dos arquivos enviados (utils/imagens.py `ler_validando`): tamanho máximo e
+# tamanho de cada bloco lido; vale para o S3 e para o Supabase Storage
+UPLOAD_MAX_BYTES = int(getenv('UPLOAD_MAX_BYTES', str(5 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(getenv('UPLOAD_CHUNK_SIZE', str(64 * 1024)))
+
+# Uploads simultâneos para o Supabase Storage por requisição (utils/storage.py)
+STORAGE_UPLOAD_CONCURRENCY = int(getenv('STORAGE_UPLOAD_CONCURRENCY', '4'))
+
+# Variantes de imagem geradas no upload (utils/imagens.py)
+IMAGE_WORKERS = int(getenv('IMAGE_WORKERS', '2'))
+IMAGE_MAX_PIXELS = int(getenv('IMAGE_MAX_PIXELS', str(40_000_000)))
+IMAGE_THUMB_SIZE = int(getenv('IMAGE_THUMB_SIZE', '320'))
+IMAGE_MEDIUM_SIZE = int(getenv('IMAGE_MEDIUM_SIZE', '1024'))
+IMAGE_ORIGINAL_MAX_SIZE = int(getenv('IMAGE_ORIGINAL_MAX_SIZE', '2560'))
+IMAGE_QUALITY = int(getenv('IMAGE_QUALITY', '82'))
+
+# Hash de senhas com bcrypt em processos dedicados (utils/senhas.py)
+BCRYPT_ROUNDS = int(getenv('BCRYPT_ROUNDS', '12'))
+# Não passa do número de CPUs: processos a mais não aumentam a vazão e fazem a
+# espera estimada (fila / workers) prometer um tempo que o bcrypt não cumpre
+HASH_WORKERS = int(getenv('HASH_WORKERS', str(min(2, cpu_count() or 1))))
+# Teto da fila; abaixo dele a fila também é recusada quando a espera estimada passa do prazo da rota
+HASH_MAX_PENDING = int(getenv('HASH_MAX_PENDING', '64'))
+
+# Fração das requisições com trace (Server-Timing + spans no log), de 0 a 1 (utils/tracing.py)
+TRACE_SAMPLE_RATE = float(getenv('TRACE_SAMPLE_RATE', '0.1'))
+
+# Resiliência das chamadas ao Supabase (utils/resiliencia.py): retentativas com
+# backoff exponencial + jitter nos GETs, hedge opcional após o p95 da tabela e
+# circuit breaker por tabela/bucket
+SUPABASE_RETRIES = int(getenv('SUPABASE_RETRIES', '2'))
+SUPABASE_RETRY_BASE = float(getenv('SUPABASE_RETRY_BASE', '0.05'))
+SUPABASE_RETRY_MAX = float(getenv('SUPABASE_RETRY_MAX', '1'))
+SUPABASE_HEDGE = getenv('SUPABASE_HEDGE', 'false').lower() == 'true'
+SUPABASE_HEDGE_MIN_AMOSTRAS = int(getenv('SUPABASE_HEDGE_MIN_AMOSTRAS', '20'))
+SUPABASE_BREAKER_FALHAS = int(getenv('SUPABASE_BREAKER_FALHAS', '5'))
+SUPABASE_BREAKER_ABERTO = float(getenv('SUPABASE_BREAKER_ABERTO', '10'))
+
+# GETs idênticos concorrentes compartilham uma única chamada ao Supabase (utils/single_flight.py)
+SUPABASE_SINGLE_FLIGHT = getenv('SUPABASE_SINGLE_FLIGHT', 'true').lower() == 'true'
+
+# Rate limiting por cliente (token bucket) e controle de admissão (utils/limites.py).
+# Cada classe de rota tem seu balde: requisições por minuto e rajada máxima
+RATE_LIMIT_ENABLED = getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_LOGIN_POR_MINUTO = float(getenv('RATE_LIMIT_LOGIN_POR_MINUTO', '10'))
+RATE_LIMIT_LOGIN_RAJADA = int(getenv('RATE_LIMIT_LOGIN_RAJADA', '5'))
+RATE_LIMIT_UPLOAD_POR_MINUTO = float(getenv('RATE_LIMIT_UPLOAD_POR_MINUTO', '30'))
+RATE_LIMIT_UPLOAD_RAJADA = int(getenv('RATE_LIMIT_UPLOAD_RAJADA', '10'))
+RATE_LIMIT_LEITURA_POR_MINUTO = float(getenv('RATE_LIMIT_LEITURA_POR_MINUTO', '600'))
+RATE_LIMIT_LEITURA_RAJADA = int(getenv('RATE_LIMIT_LEITURA_RAJADA', '100'))
+RATE_LIMIT_ESCRITA_POR_MINUTO = float(getenv('RATE_LIMIT_ESCRITA_POR_MINUTO', '120'))
+RATE_LIMIT_ESCRITA_RAJADA = int(getenv('RATE_LIMIT_ESCRITA_RAJADA', '30'))
+# Clientes (IP x classe) mantidos em memória; os mais antigos são descartados
+RATE_LIMIT_MAX_CLIENTES = int(getenv('RATE_LIMIT_MAX_CLIENTES', '10000'))
+# Atrás de um proxy confiável: usa o último IP do X-Forwarded-For
+RATE_LIMIT_PROXY = getenv('RATE_LIMIT_PROXY', 'false').lower() == 'true'
+# Requisições simultâneas antes de responder 503 (em vez de enfileirar)
+ADMISSAO_MAX_EM_ANDAMENTO = int(getenv('ADMISSAO_MAX_EM_ANDAMENTO', '256'))
+
+# Orçamento de latência por classe de rota, em segundos (utils/prazos.py). O que
+# sobra do orçamento vira o timeout de cada chamada ao Supabase, S3 e bcrypt
+PRAZO_LEITURA = float(getenv('PRAZO_LEITURA', '5'))
+PRAZO_ESCRITA = float(getenv('PRAZO_ESCRITA', '10'))
+PRAZO_LOGIN = float(getenv('PRAZO_LOGIN', '5'))
+PRAZO_UPLOAD = float(getenv('PRAZO_UPLOAD', '60'))
+PRAZO_LOTE = float(getenv('PRAZO_LOTE', '30'))
@@ -0,0 +1,125 @@
+import hashlib
+from fastapi import Depends, Request
+from starlette.datastructures import Headers, MutableHeaders
+from utils.compressao import TIPOS_COMPRIMIVEIS
+from utils.config import CACHE_CONTROL_PUBLICO, CACHE_CONTROL_PRIVADO, COMPRESSAO_MIN_BYTES, ETAG_MAX_BYTES
+
+
+def cache_control(politica: str):
+    """
+    Dependency que define o Cache-Control da rota. A política fica no
+    request.state e é aplicada pelo ETagMiddleware, inclusive quando a rota
+    devolve um Response pronto (repasse do PostgREST), que não recebe os
+    headers definidos por dependencies. Respostas GET com Cache-Control
+    passam a ter ETag e 304.
+    """
+    def definir(request: Request):
+        request.state.cache_control = politica
+    return definir
+
+
+# Uso: @router.get("/", dependencies=CACHE_PUBLICO)
+# Público: listagens de anfitriões (podem ficar em caches intermediários)
+CACHE_PUBLICO = [Depends(cache_control(CACHE_CONTROL_PUBLICO))]
+# Privado: dados de usuário (só o app guarda, sempre revalidando com o ETag)
+CACHE_PRIVADO = [Depends(cache_control(CACHE_CONTROL_PRIVADO))]
+
+
+def gerar_etag(corpo: bytes) -> str:
+    """ETag forte: hash do corpo exato da resposta"""
+    return f'"{hashlib.sha256(corpo).hexdigest()[:32]}"'
+
+
+def etag_confere(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110): ignora o prefixo W/"""
+    if if_none_match.strip() == "*":
+        return True
+    candidatos = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidatos)
+
+
+class ETagMiddleware:
+    """
+    Middleware ASGI para GET/HEAD com Cache-Control definido pela rota:
+    calcula o ETag do corpo e responde 304 Not Modified (sem corpo) quando
+    o cliente manda o mesmo ETag em If-None-Match.
+
+    Só corpos até ETAG_MAX_BYTES são acumulados para o hash; maiores seguem
+    em streaming sem ETag, para não segurar a compressão parte a parte do
+    CompressaoMiddleware até o fim da resposta.
+    """
+
+    def __init__(self, app, maximo: int = ETAG_MAX_BYTES):
+        self.app = app
+        self.maximo = maximo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        inicio = None
+        partes = []
+        tamanho = 0
+
+        async def enviar(message):
+            nonlocal inicio, tamanho
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                politica = scope.get("state", {}).get("cache_control")
+                if politica and message["status"] == 200 and "cache-control" not in headers:
+                    novos = MutableHeaders(raw=list(message["headers"]))
+                    novos["Cache-Control"] = politica
+                    message = {**message, "headers": novos.raw}
+                    headers = Headers(raw=novos.raw)
+                cacheavel = (
+                    message["status"] == 200
+                    and "cache-control" in headers
+                    and "etag" not in headers
+                    and "no-store" not in headers["cache-control"]
+                )
+                declarado = headers.get("content-length")
+                if not cacheavel or (declarado is not None and int(declarado) > self.maximo):
+                    await send(message)
+                    return
+                inicio = message
+                return
+
+            if inicio is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            corpo = message.get("body", b"")
+            mais = message.get("more_body", False)
+            partes.append(corpo)
+            tamanho += len(corpo)
+            if tamanho > self.maximo:
+                # Corpo grande em partes: segue em streaming, sem ETag
+                await send(inicio)
+                await send({"type": "http.response.body", "body": b"".join(partes), "more_body": mais})
+                inicio = None
+                partes.clear()
+                return
+            if mais:
+                return
+
+            corpo = b"".join(partes)
+            etag = gerar_etag(corpo)
+            headers = MutableHeaders(raw=list(inicio["headers"]))
+            headers["ETag"] = etag
+
+            if if_none_match and etag_confere(if_none_match, etag):
+                # O 200 equivalente sairia comprimido: o 304 leva o mesmo Vary
+                if len(corpo) >= COMPRESSAO_MIN_BYTES and headers.get("content-type", "").startswith(TIPOS_COMPRIMIVEIS):
+                    headers.add_vary_header("Accept-Encoding")
+                del headers["content-length"]
+                del headers["content-type"]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send({**inicio, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": corpo})
+
+        await self.app(scope, receive, enviar)
@@ -0,0 +1,73 @@
+from typing import Optional
+from fastapi import HTTPException
+from utils.cache import TTLCache
+from utils.config import MAX_IDS_POR_CONSULTA
+from utils.projecao import colunas_do_select
+from utils.supabase_client import supabase, HEADERS
+
+
+def parse_ids(ids: str) -> list:
+    """Converte "1,2,3" em [1, 2, 3] (sem repetições, na ordem informada)"""
+    try:
+        valores = [int(parte) for parte in ids.split(",") if parte.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids deve ser uma lista de inteiros separados por vírgula")
+
+    valores = list(dict.fromkeys(valores))
+    if not valores:
+        raise HTTPException(status_code=400, detail="Informe ao menos um id")
+    if len(valores) > MAX_IDS_POR_CONSULTA:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_IDS_POR_CONSULTA} ids por consulta")
+    return valores
+
+
+def in_filter(ids: list) -> str:
+    """Filtro PostgREST id=in.(...)"""
+    return f"in.({','.join(str(i) for i in ids)})"
+
+
+async def buscar_por_ids(
+    url: str,
+    pk: str,
+    ids: list,
+    select: str,
+    cache: Optional[TTLCache] = None,
+) -> dict:
+    """
+    Busca vários registros com uma única consulta pk=in.(...) em vez de uma
+    requisição por id. Com `cache`, usa as mesmas chaves da rota por id
+    ("id", id, select) e só consulta os que faltam.
+    Retorna {"resultados": {id: registro}, "nao_encontrados": [ids]}.
+    """
+    encontrados = {}
+    faltando = []
+    for id_item in ids:
+        cached = cache.get(("id", id_item, select)) if cache is not None else None
+        if cached is None:
+            faltando.append(id_item)
+        else:
+            encontrados[id_item] = cached
+
+    if faltando:
+        generation = cache.generation if cache is not None else None
+
+        # A chave primária é necessária para indexar o resultado
+        colunas = colunas_do_select(select)
+        incluir_pk = "*" not in colunas and pk not in colunas
+        params = {pk: in_filter(faltando), "select": f"{select},{pk}" if incluir_pk else select}
+
+        response = await supabase.get(url, params=params, headers=HEADERS)
+
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        for registro in response.json():
+            id_item = registro.pop(pk) if incluir_pk else registro[pk]
+            encontrados[id_item] = registro
+            if cache is not None:
+                cache.set(("id", id_item, select), registro, generation)
+
+    return {
+        "resultados": {str(id_item): encontrados[id_item] for id_item in ids if id_item in encontrados},
+        "nao_encontrados": [id_item for id_item in ids if id_item not in encontrados],
+    }
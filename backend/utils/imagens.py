@@ -0,0 +1,153 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException, UploadFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+from utils import prazos, tracing
+from utils.config import (
+    IMAGE_WORKERS,
+    IMAGE_MAX_PIXELS,
+    IMAGE_THUMB_SIZE,
+    IMAGE_MEDIUM_SIZE,
+    IMAGE_ORIGINAL_MAX_SIZE,
+    IMAGE_QUALITY,
+    UPLOAD_MAX_BYTES,
+    UPLOAD_CHUNK_SIZE,
+)
+
+# Protege contra "decompression bombs" nos processos de redimensionamento
+Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+
+# Variantes geradas por upload: nome -> (lado máximo em px, formato, extensão, content-type)
+VARIANTES = {
+    "thumb": (IMAGE_THUMB_SIZE, "WEBP", "webp", "image/webp"),
+    "medium": (IMAGE_MEDIUM_SIZE, "WEBP", "webp", "image/webp"),
+    "original": (IMAGE_ORIGINAL_MAX_SIZE, "JPEG", "jpg", "image/jpeg"),
+}
+
+MENSAGEM_TAMANHO = f"Arquivo muito grande (máximo {UPLOAD_MAX_BYTES // (1024 * 1024)}MB)"
+
+# Assinaturas (magic bytes) aceitas -> (content-type, extensão)
+ASSINATURAS = (
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+)
+
+_pool = None
+
+
+def _pool_imagens() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+def encerrar_pool():
+    """Encerra os processos de imagem (chamado no shutdown da aplicação)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _descartar_pool(pool: ProcessPoolExecutor):
+    """
+    Um worker morreu (OOM, segfault no decoder): o executor fica quebrado e
+    recusa tudo. Descarta o pool para a próxima chamada criar outro, a não
+    ser que outra requisição já tenha feito isso.
+    """
+    global _pool
+    pool.shutdown(wait=False, cancel_futures=True)
+    if _pool is pool:
+        _pool = None
+
+
+def detectar_imagem(inicio: bytes):
+    """Identifica PNG/JPG pelo conteúdo, não pelo content-type enviado pelo cliente"""
+    for assinatura, content_type, extensao in ASSINATURAS:
+        if inicio.startswith(assinatura):
+            return content_type, extensao
+    return None
+
+
+async def ler_validando(arquivo: UploadFile) -> bytes:
+    """
+    Lê o arquivo em blocos de UPLOAD_CHUNK_SIZE: o tipo é validado no
+    primeiro bloco (magic bytes) e o tamanho máximo durante a leitura, sem
+    nunca carregar mais que UPLOAD_MAX_BYTES em memória. O arquivo inteiro
+    fica em memória porque o Pillow precisa dele para gerar as variantes.
+    """
+    primeiro_chunk = await arquivo.read(UPLOAD_CHUNK_SIZE)
+    if detectar_imagem(primeiro_chunk) is None:
+        raise HTTPException(status_code=400, detail="Apenas arquivos PNG e JPG são permitidos")
+
+    buffer = bytearray(primeiro_chunk)
+    while True:
+        chunk = await arquivo.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=400, detail=MENSAGEM_TAMANHO)
+    return bytes(buffer)
+
+
+def _sem_transparencia(imagem: Image.Image) -> Image.Image:
+    if imagem.mode in ("RGBA", "LA") or (imagem.mode == "P" and "transparency" in imagem.info):
+        fundo = Image.new("RGB", imagem.size, (255, 255, 255))
+        fundo.paste(imagem.convert("RGBA"), mask=imagem.convert("RGBA").split()[-1])
+        return fundo
+    return imagem.convert("RGB")
+
+
+def gerar_variantes(conteudo: bytes) -> dict:
+    """
+    Roda no ProcessPoolExecutor (CPU-bound). Aplica a orientação do EXIF e
+    gera thumb/medium em WebP e o original em JPEG progressivo, todos sem
+    metadados (EXIF/GPS). Retorna {variante: (bytes, extensão, content-type)}.
+    """
+    with Image.open(io.BytesIO(conteudo)) as imagem:
+        imagem.load()
+        base = _sem_transparencia(ImageOps.exif_transpose(imagem))
+
+    variantes = {}
+    for nome, (lado, formato, extensao, content_type) in VARIANTES.items():
+        copia = base.copy()
+        copia.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+
+        saida = io.BytesIO()
+        if formato == "JPEG":
+            copia.save(saida, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+        else:
+            copia.save(saida, "WEBP", quality=IMAGE_QUALITY, method=4)
+        variantes[nome] = (saida.getvalue(), extensao, content_type)
+
+    return variantes
+
+
+async def processar_imagem(conteudo: bytes) -> dict:
+    """
+    Gera as variantes fora dos workers da API; 400 se não for uma imagem
+    válida, 503 se o pool quebrou (o próximo upload já usa um novo)
+    """
+    loop = asyncio.get_running_loop()
+    inicio = time.perf_counter()
+    pool = _pool_imagens()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(pool, gerar_variantes, conteudo), prazos.restante()
+        )
+    except BrokenProcessPool:
+        _descartar_pool(pool)
+        raise HTTPException(
+            status_code=503,
+            detail="Processamento de imagens indisponível, tente novamente",
+            headers={"Retry-After": "1"},
+        )
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise HTTPException(status_code=400, detail="Arquivo de imagem inválido")
+    finally:
+        tracing.registrar("imagens", "gerar_variantes", inicio, bytes=len(conteudo))
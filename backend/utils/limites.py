@@ -0,0 +1,168 @@
+import math
+import re
+import time
+from collections import OrderedDict
+import orjson
+from starlette.datastructures import Headers
+from utils import metricas
+from utils.config import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_LOGIN_POR_MINUTO,
+    RATE_LIMIT_LOGIN_RAJADA,
+    RATE_LIMIT_UPLOAD_POR_MINUTO,
+    RATE_LIMIT_UPLOAD_RAJADA,
+    RATE_LIMIT_LEITURA_POR_MINUTO,
+    RATE_LIMIT_LEITURA_RAJADA,
+    RATE_LIMIT_ESCRITA_POR_MINUTO,
+    RATE_LIMIT_ESCRITA_RAJADA,
+    RATE_LIMIT_MAX_CLIENTES,
+    RATE_LIMIT_PROXY,
+    ADMISSAO_MAX_EM_ANDAMENTO,
+)
+
+# Classe de rota -> (requisições por minuto, rajada)
+LIMITES = {
+    "login": (RATE_LIMIT_LOGIN_POR_MINUTO, RATE_LIMIT_LOGIN_RAJADA),
+    "upload": (RATE_LIMIT_UPLOAD_POR_MINUTO, RATE_LIMIT_UPLOAD_RAJADA),
+    "leitura": (RATE_LIMIT_LEITURA_POR_MINUTO, RATE_LIMIT_LEITURA_RAJADA),
+    "escrita": (RATE_LIMIT_ESCRITA_POR_MINUTO, RATE_LIMIT_ESCRITA_RAJADA),
+}
+
+# Fora do limite: monitoramento e preflight de CORS
+ISENTAS = ("/health", "/metrics")
+# bcrypt: login e cadastro de usuário
+ROTAS_SENHA = ("/usuarios/login", "/usuarios/")
+_UPLOAD = re.compile(r"^/upload/|/(fotos|fotos-area|foto-perfil)$")
+
+REJEITADAS = metricas.Contador(
+    "http_requests_rejected_total", "Requisições recusadas pelo rate limit (429) ou por capacidade (503)",
+    ("class", "reason"),
+)
+ADMITIDAS = metricas.Gauge("http_requests_admitted_in_flight", "Requisições admitidas em andamento")
+
+
+def classificar(method: str, path: str):
+    """Classe de limite da rota, ou None se isenta"""
+    if method == "OPTIONS" or path in ISENTAS:
+        return None
+    if method in ("GET", "HEAD"):
+        return "leitura"
+    if method == "POST" and path in ROTAS_SENHA:
+        return "login"
+    if _UPLOAD.search(path):
+        return "upload"
+    return "escrita"
+
+
+def ip_do_cliente(scope: dict, confiar_proxy: bool = RATE_LIMIT_PROXY) -> str:
+    """
+    IP da conexão. Atrás de um proxy confiável, o último item do
+    X-Forwarded-For (o que o próprio proxy acrescentou; os anteriores vêm
+    do cliente e podem ser forjados)
+    """
+    if confiar_proxy:
+        encaminhado = Headers(scope=scope).get("x-forwarded-for")
+        if encaminhado:
+            return encaminhado.rsplit(",", 1)[-1].strip()
+    cliente = scope.get("client")
+    return cliente[0] if cliente else "desconhecido"
+
+
+class Baldes:
+    """
+    Token buckets por (classe, cliente), limitados a `maximo` entradas (LRU).
+    Sem locks: só é usado na thread do event loop.
+    """
+
+    def __init__(self, limites: dict, maximo: int = RATE_LIMIT_MAX_CLIENTES):
+        # classe -> (tokens por segundo, capacidade)
+        self.limites = {classe: (por_minuto / 60, rajada) for classe, (por_minuto, rajada) in limites.items()}
+        self.maximo = maximo
+        self._baldes = OrderedDict()
+
+    def consumir(self, classe: str, cliente: str, agora: float = None) -> float:
+        """0 se a requisição pode passar; senão, segundos até haver um token"""
+        taxa, capacidade = self.limites[classe]
+        agora = time.monotonic() if agora is None else agora
+        chave = (classe, cliente)
+
+        balde = self._baldes.get(chave)
+        if balde is None:
+            balde = [float(capacidade), agora]
+            self._baldes[chave] = balde
+            if len(self._baldes) > self.maximo:
+                self._baldes.popitem(last=False)
+        else:
+            self._baldes.move_to_end(chave)
+            balde[0] = min(capacidade, balde[0] + (agora - balde[1]) * taxa)
+            balde[1] = agora
+
+        if balde[0] >= 1:
+            balde[0] -= 1
+            return 0.0
+        return (1 - balde[0]) / taxa if taxa > 0 else 60.0
+
+
+async def _recusar(send, status: int, detalhe: str, retry_after: float):
+    corpo = orjson.dumps({"detail": detalhe})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(corpo)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": corpo})
+
+
+class LimiteMiddleware:
+    """
+    Middleware ASGI de proteção:
+
+    - rate limit por IP e classe de rota (login, upload, leitura, escrita),
+      com token bucket: 429 + Retry-After quando o balde esvazia
+    - controle de admissão: acima de `max_em_andamento` requisições
+      simultâneas responde 503 + Retry-After em vez de enfileirar
+    """
+
+    def __init__(
+        self,
+        app,
+        limites: dict = None,
+        max_em_andamento: int = ADMISSAO_MAX_EM_ANDAMENTO,
+        habilitado: bool = RATE_LIMIT_ENABLED,
+        confiar_proxy: bool = RATE_LIMIT_PROXY,
+    ):
+        self.app = app
+        self.baldes = Baldes(limites or LIMITES)
+        self.max_em_andamento = max_em_andamento
+        self.habilitado = habilitado
+        self.confiar_proxy = confiar_proxy
+        self.em_andamento = 0
+
+    async def __call__(self, scope, receive, send):
+        classe = classificar(scope.get("method", ""), scope.get("path", "")) if scope["type"] == "http" else None
+        if not self.habilitado or classe is None:
+            await self.app(scope, receive, send)
+            return
+
+        espera = self.baldes.consumir(classe, ip_do_cliente(scope, self.confiar_proxy))
+        if espera:
+            REJEITADAS.inc(classe, "rate_limit")
+            await _recusar(send, 429, "Muitas requisições, tente novamente mais tarde", espera)
+            return
+
+        if self.em_andamento >= self.max_em_andamento:
+            REJEITADAS.inc(classe, "capacidade")
+            await _recusar(send, 503, "Servidor ocupado, tente novamente em instantes", 1)
+            return
+
+        self.em_andamento += 1
+        ADMITIDAS.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.em_andamento -= 1
+            ADMITIDAS.dec()
@@ -0,0 +1,26 @@
+from fastapi import HTTPException
+from utils.config import MAX_ITENS_POR_LOTE
+
+
+def verificar_lote(itens: list):
+    """400 para lote vazio ou acima de MAX_ITENS_POR_LOTE"""
+    if not itens:
+        raise HTTPException(status_code=400, detail="Informe ao menos um item")
+    if len(itens) > MAX_ITENS_POR_LOTE:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_ITENS_POR_LOTE} itens por lote")
+
+
+def resultados_por_id(ids: list, atualizados: set, motivos: dict = None) -> dict:
+    """
+    Resultado de uma atualização em lote, na ordem dos ids recebidos:
+    "atualizado", o motivo registrado em `motivos` ou "nao_encontrado".
+    """
+    motivos = motivos or {}
+    resultados = []
+    for id_item in ids:
+        if id_item in atualizados:
+            status = "atualizado"
+        else:
+            status = motivos.get(id_item, "nao_encontrado")
+        resultados.append({"id": id_item, "status": status})
+    return {"atualizados": len(atualizados), "resultados": resultados}
@@ -0,0 +1,232 @@
+"""
+Métricas no formato texto do Prometheus (exposto em /metrics).
+
+Sem locks: todas as observações acontecem na thread do event loop (as
+chamadas ao boto3 e ao bcrypt são medidas em volta do `await`, não dentro
+do threadpool/processo), então incrementar um dict é seguro e custa só
+uma busca e uma soma por requisição.
+"""
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets em segundos (os mesmos defaults do cliente oficial do Prometheus)
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# bcrypt: dezenas a centenas de ms por operação
+BUCKETS_HASH = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+
+_registradas = []
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(nomes: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        _registradas.append(self)
+
+    def cabecalho(self) -> list:
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+    def linhas(self) -> list:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    """Valor que só cresce, por combinação de rótulos"""
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = ()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores = {}
+
+    def inc(self, *rotulos, valor: float = 1):
+        self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def linhas(self) -> list:
+        return [
+            f"{self.nome}{_rotulos(self.rotulos, rotulos)} {_numero(valor)}"
+            for rotulos, valor in self._valores.items()
+        ]
+
+
+class Gauge(Contador):
+    """Valor que sobe e desce (ex.: requisições em andamento)"""
+    tipo = "gauge"
+
+    def dec(self, *rotulos, valor: float = 1):
+        self.inc(*rotulos, valor=-valor)
+
+
+class GaugeFuncao(_Metrica):
+    """
+    Gauge lido na hora da coleta: `funcao` devolve um número ou
+    {(rótulos,): número} — para estado que já existe em outro lugar
+    (pool de conexões, fila de hash)
+    """
+    tipo = "gauge"
+
+    def __init__(self, nome: str, descricao: str, funcao, rotulos: tuple = ()):
+        super().__init__(nome, descricao, rotulos)
+        self.funcao = funcao
+
+    def linhas(self) -> list:
+        valores = self.funcao()
+        if not isinstance(valores, dict):
+            valores = {(): valores}
+        return [
+            f"{self.nome}{_rotulos(self.rotulos, rotulos)} {_numero(valor)}"
+            for rotulos, valor in valores.items()
+        ]
+
+
+class Histograma(_Metrica):
+    """
+    Distribuição de durações. Cada observação incrementa só o seu bucket;
+    os valores acumulados (le=...) são calculados na coleta.
+    """
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple = (), buckets: tuple = BUCKETS_PADRAO):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observar(self, valor: float, *rotulos):
+        serie = self._series.get(rotulos)
+        if serie is None:
+            # [contagem por bucket (+Inf no fim), soma]
+            serie = self._series[rotulos] = [[0] * (len(self.buckets) + 1), 0.0]
+        serie[0][bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+
+    def linhas(self) -> list:
+        linhas = []
+        for rotulos, (contagens, soma) in self._series.items():
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                le = f'le="{_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, rotulos, le)} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, rotulos)} {_numero(soma)}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, rotulos)} {acumulado}")
+        return linhas
+
+
+def exportar() -> str:
+    """Todas as métricas registradas, no formato texto do Prometheus"""
+    linhas = []
+    for metrica in _registradas:
+        linhas.extend(metrica.cabecalho())
+        linhas.extend(metrica.linhas())
+    return "\n".join(linhas) + "\n"
+
+
+# ------------------------
+# Métricas da aplicação
+# ------------------------
+HTTP_REQUISICOES = Contador(
+    "http_requests_total", "Requisições atendidas por rota e status", ("method", "route", "status")
+)
+HTTP_DURACAO = Histograma(
+    "http_request_duration_seconds", "Latência das requisições por rota", ("method", "route")
+)
+HTTP_EM_ANDAMENTO = Gauge("http_requests_in_flight", "Requisições sendo atendidas agora")
+
+SUPABASE_REQUISICOES = Contador(
+    "supabase_requests_total", "Chamadas ao Supabase por API, tabela/bucket, verbo e status",
+    ("api", "table", "method", "status"),
+)
+SUPABASE_DURACAO = Histograma(
+    "supabase_request_duration_seconds", "Latência das chamadas ao Supabase (REST e Storage)",
+    ("api", "table", "method"),
+)
+
+S3_DURACAO = Histograma("s3_request_duration_seconds", "Latência das chamadas ao S3 por operação", ("operation",))
+
+HASH_DURACAO = Histograma(
+    "password_hash_duration_seconds", "Tempo de hash/verificação de senha (fila + bcrypt)",
+    ("operation",), buckets=BUCKETS_HASH,
+)
+
+UPLOAD_BYTES = Contador("upload_bytes_total", "Bytes de imagem enviados por destino", ("destination",))
+
+COMPRESSAO_BYTES_ENTRADA = Contador(
+    "http_compression_input_bytes_total", "Bytes de resposta antes da compressão", ("encoding",)
+)
+COMPRESSAO_BYTES_SAIDA = Contador(
+    "http_compression_output_bytes_total", "Bytes de resposta depois da compressão", ("encoding",)
+)
+COMPRESSAO_CPU = Contador(
+    "http_compression_cpu_seconds_total", "Tempo de CPU gasto comprimindo respostas", ("encoding",)
+)
+
+
+def alvo_supabase(url: str) -> tuple:
+    """
+    (api, tabela ou bucket) de uma URL do Supabase, para rótulos de baixa
+    cardinalidade: /rest/v1/usuarios -> ("rest", "usuarios");
+    /storage/v1/object/public/fotos/a.jpg -> ("storage", "fotos")
+    """
+    partes = urlsplit(url).path.strip("/").split("/")
+    api = partes[0] if partes else ""
+    if api == "storage":
+        recursos = [parte for parte in partes[3:] if parte != "public"]
+        return api, recursos[0] if recursos else ""
+    return api, partes[2] if len(partes) > 2 else ""
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI (o mais externo) que conta as requisições e mede a
+    latência por rota. O rótulo é o template da rota (/usuarios/{id}), não o
+    caminho, para não criar uma série por ID.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        inicio = time.perf_counter()
+
+        async def enviar(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_EM_ANDAMENTO.inc()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            HTTP_EM_ANDAMENTO.dec()
+            rota = scope.get("route")
+            template = getattr(rota, "path", "nao_encontrada")
+            HTTP_DURACAO.observar(time.perf_counter() - inicio, scope["method"], template)
+            HTTP_REQUISICOES.inc(scope["method"], template, str(status))
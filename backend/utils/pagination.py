@@ -0,0 +1,211 @@
+import base64
+import json
+import orjson
+from typing import Literal, Optional
+from fastapi import HTTPException, Query, Response
+from utils.cache import TTLCache
+from utils.config import PAGINATION_DEFAULT_LIMIT, PAGINATION_MAX_LIMIT
+from utils.projecao import colunas_do_select
+from utils.respostas import carregar, resposta_json
+from utils.supabase_client import supabase, HEADERS
+
+
+class Pagina:
+    """
+    Parâmetros de paginação por cursor (keyset) aceitos pelas rotas de listagem.
+
+    - limit: quantidade máxima de registros na página
+    - cursor: valor opaco devolvido no header X-Next-Cursor da página anterior
+    - sort / direction: coluna de ordenação (default: chave primária)
+    - count: exact | planned | estimated para devolver X-Total-Count
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(PAGINATION_DEFAULT_LIMIT, ge=1, le=PAGINATION_MAX_LIMIT),
+        cursor: Optional[str] = Query(None),
+        sort: Optional[str] = Query(None),
+        direction: Literal["asc", "desc"] = Query("asc"),
+        count: Optional[Literal["exact", "planned", "estimated"]] = Query(None),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.sort = sort
+        self.direction = direction
+        self.count = count
+
+
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(data, dict) or "k" not in data:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return data
+
+
+def _quote(value) -> str:
+    """Valor entre aspas para filtros lógicos do PostgREST (or=/and=)"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset_params(pagina: Pagina, pk: str, ordenaveis: tuple) -> dict:
+    """
+    Monta os parâmetros do PostgREST para a página: order, limit e o filtro
+    keyset a partir do cursor. Desempate sempre pela chave primária (asc).
+    """
+    sort = pagina.sort or pk
+    if sort != pk and sort not in ordenaveis:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ordenação inválida: use {', '.join((pk,) + tuple(ordenaveis))}",
+        )
+
+    params = {"limit": str(pagina.limit + 1)}  # +1 para saber se há próxima página
+
+    if sort == pk:
+        params["order"] = f"{pk}.{pagina.direction}"
+    else:
+        params["order"] = f"{sort}.{pagina.direction}.nullslast,{pk}.asc"
+
+    if pagina.cursor:
+        cursor = decode_cursor(pagina.cursor)
+        if cursor.get("s") != sort or cursor.get("d") != pagina.direction:
+            raise HTTPException(status_code=400, detail="Cursor não corresponde à ordenação")
+
+        op = "gt" if pagina.direction == "asc" else "lt"
+        if sort == pk:
+            params[pk] = f"{op}.{cursor['k']}"
+        elif cursor.get("v") is None:
+            # Já estamos no bloco de nulls (sempre no fim): só avança pela chave
+            params[sort] = "is.null"
+            params[pk] = f"gt.{cursor['k']}"
+        else:
+            v = _quote(cursor["v"])
+            params["or"] = (
+                f"({sort}.{op}.{v},{sort}.is.null,"
+                f"and({sort}.eq.{v},{pk}.gt.{cursor['k']}))"
+            )
+
+    return params
+
+
+def total_from_content_range(content_range: Optional[str]) -> Optional[str]:
+    # Formato do PostgREST: "0-99/1234" (ou "*/1234" quando vazio)
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1]
+    return None if total == "*" else total
+
+
+def _query_da_pagina(pagina: Pagina, pk: str, ordenaveis: tuple, params: Optional[dict]) -> tuple:
+    """
+    Parâmetros da página e colunas extras: se o select não traz a
+    chave/coluna de ordenação (necessárias para o cursor), elas são pedidas
+    e depois removidas das linhas devolvidas.
+    """
+    query = dict(params or {})
+    query.update(keyset_params(pagina, pk, ordenaveis))
+
+    sort = pagina.sort or pk
+    extras = []
+    if "select" in query:
+        colunas = colunas_do_select(query["select"])
+        if "*" not in colunas:
+            extras = [coluna for coluna in dict.fromkeys((pk, sort)) if coluna not in colunas]
+            if extras:
+                query["select"] = ",".join(colunas + extras)
+
+    return query, extras
+
+
+async def _buscar(url: str, query: dict, extras: list, pagina: Pagina, pk: str) -> tuple:
+    headers = HEADERS
+    if pagina.count:
+        headers = {**HEADERS, "Prefer": f"count={pagina.count}"}
+
+    response = await supabase.get(url, params=query, headers=headers)
+
+    if response.status_code not in (200, 206):
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    rows = carregar(response)
+    page_headers = {}
+
+    if len(rows) > pagina.limit:
+        rows = rows[:pagina.limit]
+        last = rows[-1]
+        sort = pagina.sort or pk
+        page_headers["X-Next-Cursor"] = encode_cursor({
+            "s": sort,
+            "d": pagina.direction,
+            "v": last.get(sort),
+            "k": last.get(pk),
+        })
+
+    if pagina.count:
+        total = total_from_content_range(response.headers.get("content-range"))
+        if total is not None:
+            page_headers["X-Total-Count"] = total
+
+    if extras:
+        rows = [{k: v for k, v in row.items() if k not in extras} for row in rows]
+
+    return rows, page_headers
+
+
+async def buscar_pagina(
+    url: str,
+    pagina: Pagina,
+    pk: str,
+    ordenaveis: tuple,
+    params: Optional[dict] = None,
+) -> tuple:
+    """
+    Busca uma página no PostgREST. Retorna (linhas, headers da página), com
+    X-Next-Cursor e X-Total-Count quando houver.
+    """
+    query, extras = _query_da_pagina(pagina, pk, ordenaveis, params)
+    return await _buscar(url, query, extras, pagina, pk)
+
+
+async def fetch_page(
+    url: str,
+    pagina: Pagina,
+    pk: str,
+    ordenaveis: tuple,
+    params: Optional[dict] = None,
+    cache: Optional[TTLCache] = None,
+) -> Response:
+    """
+    Busca uma página no PostgREST e responde com as linhas da página e os
+    headers X-Next-Cursor e X-Total-Count. A lista é serializada uma única
+    vez com orjson; com `cache`, o corpo já serializado é servido/guardado
+    nele (um hit não re-serializa nada).
+    """
+    query, extras = _query_da_pagina(pagina, pk, ordenaveis, params)
+
+    cache_key = None
+    if cache is not None:
+        generation = cache.generation
+        cache_key = (url, tuple(sorted(query.items())), pagina.count)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            corpo, page_headers = cached
+            return resposta_json(corpo, headers=page_headers)
+
+    rows, page_headers = await _buscar(url, query, extras, pagina, pk)
+    corpo = orjson.dumps(rows)
+
+    if cache is not None:
+        cache.set(cache_key, (corpo, page_headers), generation)
+
+    return resposta_json(corpo, headers=page_headers)
@@ -0,0 +1,143 @@
+"""
+Orçamento de latência (deadline) por requisição.
+
+O PrazoMiddleware abre um asyncio.timeout com o orçamento da classe da
+rota (leitura, escrita, login, upload); rotas podem declarar o seu com a
+dependency `prazo(segundos)`. Cada etapa externa usa `restante()` como
+timeout, e quando o orçamento acaba o trabalho em andamento é cancelado e
+o cliente recebe 504 com as etapas medidas até ali. As etapas são
+registradas em toda requisição com prazo; a amostragem do TracingMiddleware
+decide só o log e o Server-Timing.
+"""
+import asyncio
+import contextvars
+import orjson
+from fastapi import Depends
+from utils import metricas, tracing
+from utils.limites import classificar
+from utils.config import PRAZO_LEITURA, PRAZO_ESCRITA, PRAZO_LOGIN, PRAZO_UPLOAD, PRAZO_LOTE
+
+# Classe de rota (utils/limites.py) -> orçamento em segundos
+ORCAMENTOS = {
+    "leitura": PRAZO_LEITURA,
+    "escrita": PRAZO_ESCRITA,
+    "login": PRAZO_LOGIN,
+    "upload": PRAZO_UPLOAD,
+}
+
+ESGOTADOS = metricas.Contador(
+    "http_requests_deadline_exceeded_total", "Requisições encerradas com 504 por falta de orçamento", ("route",)
+)
+
+# Folga dos timeouts das etapas sobre o orçamento: quem corta no prazo é o
+# asyncio.timeout do middleware (504); o timeout da etapa é só a garantia
+# caso o cancelamento não chegue (ex.: um `except Exception` viraria 500)
+FOLGA = 0.05
+
+_prazo_atual = contextvars.ContextVar("prazo_atual", default=None)
+
+
+class Prazo:
+    def __init__(self, orcamento: float, timeout: asyncio.Timeout, etapas: tracing.Etapas):
+        self._loop = asyncio.get_running_loop()
+        self._timeout = timeout
+        self.etapas = etapas
+        self.inicio = self._loop.time()
+        self.redefinir(orcamento)
+
+    def redefinir(self, orcamento: float):
+        """Novo orçamento, contado a partir do início da requisição"""
+        self.orcamento = orcamento
+        self._timeout.reschedule(self.inicio + orcamento)
+
+    def restante(self) -> float:
+        return max(0.0, self.inicio + self.orcamento - self._loop.time())
+
+    def decorrido(self) -> float:
+        return self._loop.time() - self.inicio
+
+
+def restante(maximo: float = None):
+    """
+    Timeout de uma etapa: o que sobra do orçamento mais a FOLGA (limitado
+    a `maximo`). Fora de uma requisição com prazo devolve `maximo` (None =
+    sem limite).
+    """
+    prazo = _prazo_atual.get()
+    if prazo is None:
+        return maximo
+    sobra = prazo.restante() + FOLGA
+    return sobra if maximo is None else min(maximo, sobra)
+
+
+def prazo(segundos: float):
+    """Dependency que declara o orçamento da rota (substitui o da classe)"""
+    async def definir():
+        atual = _prazo_atual.get()
+        if atual is not None:
+            atual.redefinir(segundos)
+    return definir
+
+
+# Uso: @router.post("/batch", dependencies=PRAZO_LOTES)
+PRAZO_LOTES = [Depends(prazo(PRAZO_LOTE))]
+
+
+class PrazoMiddleware:
+    """
+    Middleware ASGI que aplica o orçamento de ponta a ponta. Se ele acaba
+    antes de a resposta começar, responde 504 com orçamento, tempo
+    decorrido e as etapas (spans) até o corte; depois de iniciada, a
+    resposta é apenas interrompida.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        classe = classificar(scope.get("method", ""), scope.get("path", "")) if scope["type"] == "http" else None
+        if classe is None:
+            await self.app(scope, receive, send)
+            return
+
+        respondendo = False
+        # Numa requisição amostrada (TracingMiddleware, por fora) as etapas são o próprio trace
+        etapas = tracing.trace_atual() or tracing.Etapas()
+
+        async def enviar(message):
+            nonlocal respondendo
+            if message["type"] == "http.response.start":
+                respondendo = True
+            await send(message)
+
+        atual = None
+        try:
+            async with asyncio.timeout(None) as timeout:
+                atual = Prazo(ORCAMENTOS[classe], timeout, etapas)
+                token = _prazo_atual.set(atual)
+                token_etapas = tracing.acompanhar(etapas)
+                try:
+                    await self.app(scope, receive, enviar)
+                finally:
+                    tracing.parar(token_etapas)
+                    _prazo_atual.reset(token)
+            return
+        except Exception:
+            # TimeoutError do próprio orçamento, ou o timeout de uma etapa
+            # (httpx, wait_for) que estourou junto com ele
+            if atual is None or (atual.restante() > 0 and not timeout.expired()):
+                raise
+
+        ESGOTADOS.inc(getattr(scope.get("route"), "path", "nao_encontrada"))
+        if respondendo:
+            return
+
+        corpo = orjson.dumps({
+            "detail": "Tempo limite da requisição esgotado",
+            "orcamento_ms": round(atual.orcamento * 1000, 1),
+            "decorrido_ms": round(atual.decorrido() * 1000, 1),
+            "etapas": atual.etapas.spans,
+        })
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(corpo)).encode())]
+        await send({"type": "http.response.start", "status": 504, "headers": headers})
+        await send({"type": "http.response.body", "body": corpo})
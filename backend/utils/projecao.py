@@ -0,0 +1,97 @@
+import re
+from typing import Literal, Optional
+from fastapi import HTTPException, Query, Response
+from utils.respostas import repassar
+from utils.supabase_client import HEADERS, HEADERS_MINIMAL
+
+# Nome de coluna aceito em ?fields= (o PostgREST valida se ela existe)
+_COLUNA = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class Projecao:
+    """
+    Dependency que traduz ?fields=a,b,c no `select` do PostgREST.
+
+    - padrao: select usado quando ?fields= não é informado
+    - proibidos: colunas que nunca saem da API (ex.: senha_hash)
+    - embeds: nomes aceitos em ?fields= que viram recursos embutidos,
+      ex.: {"usuarios": "usuarios(id_usuario,nome)"}
+    """
+
+    def __init__(self, padrao: str, proibidos: tuple = (), embeds: Optional[dict] = None):
+        self.padrao = padrao
+        self.proibidos = proibidos
+        self.embeds = embeds or {}
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(None, description="Colunas separadas por vírgula (ex.: id,nome)"),
+    ) -> str:
+        if not fields:
+            return self.padrao
+
+        colunas = []
+        for campo in (parte.strip() for parte in fields.split(",")):
+            if not campo:
+                continue
+            if campo in self.embeds:
+                colunas.append(self.embeds[campo])
+            elif campo == "*" and not self.proibidos:
+                colunas.append(campo)
+            elif _COLUNA.match(campo) and campo not in self.proibidos:
+                colunas.append(campo)
+            else:
+                raise HTTPException(status_code=400, detail=f"Campo inválido em fields: {campo}")
+
+        if not colunas:
+            return self.padrao
+        return ",".join(dict.fromkeys(colunas))
+
+
+def colunas_do_select(select: str) -> list:
+    """Colunas de primeiro nível de um select (ignora o conteúdo dos embeds)"""
+    colunas, atual, nivel = [], "", 0
+    for char in select:
+        if char == "(":
+            nivel += 1
+        elif char == ")":
+            nivel -= 1
+        if char == "," and nivel == 0:
+            colunas.append(atual)
+            atual = ""
+        else:
+            atual += char
+    colunas.append(atual)
+    return [coluna.strip() for coluna in colunas if coluna.strip()]
+
+
+class Retorno:
+    """
+    ?return=representation|minimal nas rotas de escrita. Com minimal o
+    PostgREST não devolve a linha gravada e a rota responde sem corpo.
+    """
+
+    def __init__(
+        self,
+        retorno: Literal["representation", "minimal"] = Query("representation", alias="return"),
+    ):
+        self.minimal = retorno == "minimal"
+
+    @property
+    def headers(self) -> dict:
+        return HEADERS_MINIMAL if self.minimal else HEADERS
+
+    def params(self, select: str) -> dict:
+        """
+        select só faz sentido quando a linha volta na resposta. O filtro da
+        linha vai junto nos params (`{"id_x": f"eq.{id}", **retorno.params(select)}`),
+        nunca na URL: com params= o httpx descarta a query da URL, e com
+        minimal ({}) a escrita sairia sem filtro nenhum.
+        """
+        return {} if self.minimal else {"select": select}
+
+    def resposta(self, response):
+        if self.minimal:
+            return Response(status_code=response.status_code)
+        # Linha gravada repassada como veio do PostgREST (sem re-serializar)
+        return repassar(response)
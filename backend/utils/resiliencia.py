@@ -0,0 +1,152 @@
+import math
+import random
+import time
+from collections import deque
+from fastapi import HTTPException
+from utils import metricas
+from utils.config import (
+    SUPABASE_RETRY_BASE,
+    SUPABASE_RETRY_MAX,
+    SUPABASE_HEDGE_MIN_AMOSTRAS,
+    SUPABASE_BREAKER_FALHAS,
+    SUPABASE_BREAKER_ABERTO,
+)
+
+# Status do upstream que valem nova tentativa (falhas transitórias do gateway)
+STATUS_RETENTAVEIS = (502, 503, 504)
+
+FECHADO, MEIO_ABERTO, ABERTO = "fechado", "meio_aberto", "aberto"
+# Valor do gauge supabase_circuit_state
+_ESTADOS = {FECHADO: 0, MEIO_ABERTO: 1, ABERTO: 2}
+
+RETENTATIVAS = metricas.Contador(
+    "supabase_retries_total", "Novas tentativas de GET ao Supabase", ("api", "table")
+)
+HEDGES = metricas.Contador(
+    "supabase_hedges_total", "Segundas requisições (hedge) disparadas após o p95", ("api", "table")
+)
+REJEITADAS = metricas.Contador(
+    "supabase_circuit_rejected_total", "Chamadas recusadas com o circuito aberto", ("api", "table")
+)
+
+
+def backoff(tentativa: int) -> float:
+    """Espera antes da tentativa seguinte: exponencial com jitter completo"""
+    return random.uniform(0, min(SUPABASE_RETRY_MAX, SUPABASE_RETRY_BASE * 2 ** tentativa))
+
+
+class Disjuntor:
+    """
+    Circuit breaker de uma tabela/bucket.
+
+    - fechado: tudo passa; SUPABASE_BREAKER_FALHAS falhas seguidas abrem
+    - aberto: recusa com 503 por SUPABASE_BREAKER_ABERTO segundos
+    - meio_aberto: deixa passar uma chamada de teste; sucesso fecha,
+      falha abre de novo
+    """
+
+    def __init__(self, alvo: tuple, falhas: int = SUPABASE_BREAKER_FALHAS, aberto: float = SUPABASE_BREAKER_ABERTO):
+        self.alvo = alvo
+        self.limite = falhas
+        self.tempo_aberto = aberto
+        self.estado = FECHADO
+        self.falhas = 0
+        self.aberto_em = 0.0
+        self.teste_em_andamento = False
+
+    def verificar(self):
+        """Chamado antes de cada tentativa; 503 se o circuito está aberto"""
+        if self.estado == FECHADO:
+            return
+        if self.estado == ABERTO and time.monotonic() - self.aberto_em >= self.tempo_aberto:
+            self.estado = MEIO_ABERTO
+        if self.estado == MEIO_ABERTO and not self.teste_em_andamento:
+            self.teste_em_andamento = True
+            return
+
+        REJEITADAS.inc(*self.alvo)
+        restante = max(1, math.ceil(self.tempo_aberto - (time.monotonic() - self.aberto_em)))
+        raise HTTPException(
+            status_code=503,
+            detail="Serviço de dados indisponível, tente novamente em instantes",
+            headers={"Retry-After": str(restante)},
+        )
+
+    def sucesso(self):
+        self.estado = FECHADO
+        self.falhas = 0
+        self.teste_em_andamento = False
+
+    def falha(self):
+        self.falhas += 1
+        self.teste_em_andamento = False
+        if self.estado == MEIO_ABERTO or self.falhas >= self.limite:
+            self.estado = ABERTO
+            self.aberto_em = time.monotonic()
+
+    def liberar(self):
+        """Chamada de teste cancelada sem resultado: a próxima pode testar"""
+        self.teste_em_andamento = False
+
+
+class JanelaLatencias:
+    """Últimas latências de sucesso de uma tabela, para o atraso do hedge (p95)"""
+
+    def __init__(self, tamanho: int = 200):
+        self._valores = deque(maxlen=tamanho)
+        self._p95 = None
+        self._novas = 0
+
+    def observar(self, segundos: float):
+        self._valores.append(segundos)
+        self._novas += 1
+
+    def p95(self):
+        """None até ter SUPABASE_HEDGE_MIN_AMOSTRAS; recalculado a cada 20 observações"""
+        if len(self._valores) < SUPABASE_HEDGE_MIN_AMOSTRAS:
+            return None
+        if self._p95 is None or self._novas >= 20:
+            ordenados = sorted(self._valores)
+            self._p95 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))]
+            self._novas = 0
+        return self._p95
+
+
+_disjuntores = {}
+_latencias = {}
+
+
+def disjuntor(alvo: tuple) -> Disjuntor:
+    atual = _disjuntores.get(alvo)
+    if atual is None:
+        atual = _disjuntores[alvo] = Disjuntor(alvo)
+    return atual
+
+
+def latencias(alvo: tuple) -> JanelaLatencias:
+    atual = _latencias.get(alvo)
+    if atual is None:
+        atual = _latencias[alvo] = JanelaLatencias()
+    return atual
+
+
+def reiniciar():
+    """Fecha todos os circuitos e esquece as latências (testes)"""
+    _disjuntores.clear()
+    _latencias.clear()
+
+
+def stats() -> dict:
+    """Circuitos que não estão fechados, para o /health"""
+    return {
+        f"{api}/{tabela}": {"estado": d.estado, "falhas": d.falhas}
+        for (api, tabela), d in _disjuntores.items()
+        if d.estado != FECHADO
+    }
+
+
+metricas.GaugeFuncao(
+    "supabase_circuit_state", "Estado do circuit breaker (0 fechado, 1 meio aberto, 2 aberto)",
+    lambda: {alvo: _ESTADOS[d.estado] for alvo, d in _disjuntores.items()},
+    ("api", "table"),
+)
@@ -0,0 +1,43 @@
+import httpx
+import orjson
+from fastapi import HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from utils.supabase_client import supabase, HEADERS
+
+# Pede ao PostgREST um objeto em vez de lista (406 quando não há exatamente 1 linha)
+HEADERS_OBJETO = {**HEADERS, "Accept": "application/vnd.pgrst.object+json"}
+
+
+def resposta_json(corpo: bytes, status_code: int = 200, headers: dict = None) -> Response:
+    """Resposta com JSON já serializado (sem jsonable_encoder/json.dumps do FastAPI)"""
+    return Response(content=corpo, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def repassar(upstream: httpx.Response) -> Response:
+    """Repassa os bytes do PostgREST ao cliente, sem decodificar e re-serializar o JSON"""
+    return resposta_json(upstream.content, upstream.status_code)
+
+
+def json_rapido(conteudo, status_code: int = 200, headers: dict = None) -> ORJSONResponse:
+    """Para respostas transformadas na API: serializa com orjson"""
+    return ORJSONResponse(conteudo, status_code=status_code, headers=headers)
+
+
+def carregar(upstream: httpx.Response):
+    """Decodifica o corpo do PostgREST com orjson"""
+    return orjson.loads(upstream.content)
+
+
+async def buscar_um(url: str, params: dict, nao_encontrado: str) -> httpx.Response:
+    """
+    GET de um único registro já como objeto JSON, pronto para `repassar`.
+    404 com a mensagem `nao_encontrado` quando o registro não existe.
+    """
+    response = await supabase.get(url, params=params, headers=HEADERS_OBJETO)
+
+    if response.status_code == 406:
+        raise HTTPException(status_code=404, detail=nao_encontrado)
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    return response
@@ -0,0 +1,184 @@
+import asyncio
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from utils import metricas as prometheus
+from utils import prazos, tracing
+from utils.config import BCRYPT_ROUNDS, HASH_WORKERS, HASH_MAX_PENDING
+
+_pool = None
+_pendentes = 0
+# Média móvel (exponencial) do tempo de execução de uma operação no pool, em segundos
+_custo = None
+
+
+def _metricas_vazias() -> dict:
+    return {
+        "chamadas": 0,
+        "erros": 0,
+        "rejeitadas": 0,
+        "tempo_total_ms": 0.0,
+        "tempo_max_ms": 0.0,
+        "tempo_execucao_ms": 0.0,
+    }
+
+
+_metricas = {"hash": _metricas_vazias(), "verificar": _metricas_vazias()}
+
+
+@lru_cache(maxsize=None)
+def contexto(rounds: int) -> CryptContext:
+    """
+    Contexto bcrypt com custo fixo: hashes com outro custo (maior ou menor)
+    são marcados para atualização no próximo login.
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(senha: str, rounds: int) -> tuple:
+    inicio = time.perf_counter()
+    resultado = contexto(rounds).hash(senha)
+    return resultado, time.perf_counter() - inicio
+
+
+def _verificar(senha: str, senha_hash: str, rounds: int) -> tuple:
+    """(senha confere, novo hash ou None) — novo hash quando o custo mudou"""
+    inicio = time.perf_counter()
+    resultado = contexto(rounds).verify_and_update(senha, senha_hash)
+    return resultado, time.perf_counter() - inicio
+
+
+def _pool_senhas() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+    return _pool
+
+
+def encerrar_pool():
+    """Encerra os processos de hash (chamado no shutdown da aplicação)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _descartar_pool(pool: ProcessPoolExecutor):
+    """Pool com um worker morto recusa tudo: a próxima operação cria outro"""
+    global _pool
+    pool.shutdown(wait=False, cancel_futures=True)
+    if _pool is pool:
+        _pool = None
+
+
+def _ocupado() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Servidor ocupado, tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
+
+
+def espera_estimada() -> float:
+    """
+    Tempo até uma nova operação terminar: as já pendentes mais ela,
+    divididas entre os HASH_WORKERS processos, vezes o custo médio. 0
+    enquanto não há medição.
+    """
+    if _custo is None:
+        return 0.0
+    return math.ceil((_pendentes + 1) / HASH_WORKERS) * _custo
+
+
+async def _executar(operacao: str, funcao, *args):
+    """
+    Envia a operação para o pool de processos (bcrypt não disputa o GIL nem
+    o threadpool das rotas). A requisição é recusada na hora com 503 quando
+    a fila passa de HASH_MAX_PENDING ou quando a espera estimada não cabe
+    no que resta do orçamento dela (utils/prazos.py): esperar só acabaria
+    em 504. Um worker morto também vira 503, e o pool é recriado.
+    """
+    global _pendentes, _custo
+    metricas = _metricas[operacao]
+    orcamento = prazos.restante()
+    if _pendentes >= HASH_MAX_PENDING or (orcamento is not None and espera_estimada() > orcamento):
+        metricas["rejeitadas"] += 1
+        raise _ocupado()
+
+    _pendentes += 1
+    inicio = time.perf_counter()
+    pool = _pool_senhas()
+    try:
+        loop = asyncio.get_running_loop()
+        resultado, execucao = await asyncio.wait_for(
+            loop.run_in_executor(pool, funcao, *args), prazos.restante()
+        )
+    except BrokenProcessPool:
+        metricas["erros"] += 1
+        _descartar_pool(pool)
+        raise _ocupado()
+    except Exception:
+        metricas["erros"] += 1
+        raise
+    finally:
+        _pendentes -= 1
+        tracing.registrar("bcrypt", operacao, inicio)
+
+    total = time.perf_counter() - inicio
+    _custo = execucao if _custo is None else 0.8 * _custo + 0.2 * execucao
+    prometheus.HASH_DURACAO.observar(total, operacao)
+    total_ms = total * 1000
+    metricas["chamadas"] += 1
+    metricas["tempo_total_ms"] += total_ms
+    metricas["tempo_max_ms"] = max(metricas["tempo_max_ms"], total_ms)
+    metricas["tempo_execucao_ms"] += execucao * 1000
+    return resultado
+
+
+async def gerar_hash(senha: str) -> str:
+    return await _executar("hash", _hash, senha, BCRYPT_ROUNDS)
+
+
+async def verificar_senha(senha: str, senha_hash: str) -> tuple:
+    """
+    Retorna (senha confere, novo hash). O novo hash só vem preenchido quando
+    o hash guardado foi gerado com um custo diferente de BCRYPT_ROUNDS.
+    """
+    try:
+        return await _executar("verificar", _verificar, senha, senha_hash, BCRYPT_ROUNDS)
+    except ValueError:
+        # Hash guardado em formato desconhecido
+        return False, None
+
+
+prometheus.GaugeFuncao("password_hash_pending", "Operações de hash na fila ou executando", lambda: _pendentes)
+
+
+def stats() -> dict:
+    """Fila e tempos (espera + execução) do pool de hash, para o /health"""
+    return {
+        "workers": HASH_WORKERS,
+        "rounds": BCRYPT_ROUNDS,
+        "pendentes": _pendentes,
+        "max_pendentes": HASH_MAX_PENDING,
+        "custo_medio_ms": round(_custo * 1000, 2) if _custo is not None else None,
+        "espera_estimada_ms": round(espera_estimada() * 1000, 2),
+        "operacoes": {
+            operacao: {
+                **metricas,
+                "tempo_medio_ms": round(metricas["tempo_total_ms"] / metricas["chamadas"], 2)
+                if metricas["chamadas"] else None,
+            }
+            for operacao, metricas in _metricas.items()
+        },
+    }
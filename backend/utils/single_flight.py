@@ -0,0 +1,100 @@
+import asyncio
+from utils import metricas
+
+LIDERES = metricas.Contador(
+    "supabase_singleflight_leaders_total", "GETs que foram ao Supabase (primeiro de cada chave)", ("api", "table")
+)
+COMPARTILHADAS = metricas.Contador(
+    "supabase_singleflight_shared_total", "GETs atendidos por uma chamada idêntica já em andamento", ("api", "table")
+)
+
+
+def chave_get(url: str, kwargs: dict):
+    """
+    Chave de um GET: URL, params e todos os headers (inclusive Authorization
+    e apikey, então requisições com credenciais diferentes nunca se juntam).
+    None quando a chamada tem algo além de params/headers.
+    """
+    if set(kwargs) - {"params", "headers"}:
+        return None
+    params = kwargs.get("params") or {}
+    headers = kwargs.get("headers") or {}
+    if isinstance(params, dict):
+        params = tuple(sorted((str(k), str(v)) for k, v in params.items()))
+    else:
+        params = tuple(params)
+    return url, params, tuple(sorted(headers.items()))
+
+
+class SingleFlight:
+    """
+    Junta chamadas idênticas concorrentes: a primeira (líder) executa e as
+    que chegam enquanto ela está em andamento recebem o mesmo resultado (ou
+    a mesma exceção). A chamada roda numa task protegida por shield: se o
+    cliente do líder desconectar, os demais ainda recebem a resposta; se
+    ninguém mais aguarda, ela é cancelada.
+    """
+
+    def __init__(self):
+        self._em_voo = {}
+        self.pico = {}
+
+    async def executar(self, chave, alvo: tuple, fabrica) -> tuple:
+        """(resultado, compartilhado): compartilhado é False para o líder"""
+        registro = self._em_voo.get(chave)
+        compartilhado = registro is not None
+        if not compartilhado:
+            futuro = asyncio.ensure_future(fabrica())
+            registro = self._em_voo[chave] = {"futuro": futuro, "alvo": alvo, "aguardando": 0}
+            futuro.add_done_callback(lambda concluido: self._terminar(chave, registro, concluido))
+            LIDERES.inc(*alvo)
+        else:
+            COMPARTILHADAS.inc(*alvo)
+
+        registro["aguardando"] += 1
+        self.pico[alvo] = max(self.pico.get(alvo, 0), registro["aguardando"])
+        try:
+            return await asyncio.shield(registro["futuro"]), compartilhado
+        except asyncio.CancelledError:
+            if registro["aguardando"] == 1 and not registro["futuro"].done():
+                # Último interessado cancelado (prazo esgotado, cliente saiu):
+                # cancela a chamada e espera ela registrar métricas e span
+                if self._em_voo.get(chave) is registro:
+                    del self._em_voo[chave]
+                registro["futuro"].cancel()
+                await asyncio.wait([registro["futuro"]])
+            raise
+        finally:
+            registro["aguardando"] -= 1
+
+    def _terminar(self, chave, registro, futuro):
+        if self._em_voo.get(chave) is registro:
+            del self._em_voo[chave]
+        if not futuro.cancelled():
+            # Evita "exception was never retrieved" quando ninguém mais aguarda
+            futuro.exception()
+
+    def desanexar(self):
+        """
+        Chamado nas escritas: leituras que chegarem depois não se juntam a
+        GETs iniciados antes, que podem trazer o estado anterior à escrita
+        """
+        self._em_voo.clear()
+
+    def stats(self) -> dict:
+        """
+        Chamadas em andamento e requisições aguardando por tabela, e pico por
+        tabela. Só contagens: params e headers das chaves (e-mails, tokens)
+        nunca saem daqui.
+        """
+        por_tabela = {}
+        for registro in self._em_voo.values():
+            api, tabela = registro["alvo"]
+            contagem = por_tabela.setdefault(f"{api}/{tabela}", {"em_voo": 0, "aguardando": 0})
+            contagem["em_voo"] += 1
+            contagem["aguardando"] += registro["aguardando"]
+        return {
+            "em_voo": len(self._em_voo),
+            "por_tabela": por_tabela,
+            "pico_por_tabela": {f"{api}/{tabela}": pico for (api, tabela), pico in self.pico.items()},
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+from typing import List
+from fastapi import HTTPException, UploadFile
+from utils.config import SUPABASE_URL, STORAGE_UPLOAD_CONCURRENCY
+from utils import metricas
+from utils.imagens import ler_validando, processar_imagem
+from utils.supabase_client import supabase, HEADERS, storage_headers
+
+
+def public_url(bucket: str, caminho: str) -> str:
+    # Formato da URL pública (bucket público):
+    # {SUPABASE_URL}/storage/v1/object/public/<nome_bucket>/<caminho>
+    return f"{SUPABASE_URL}/storage/v1/object/public/{bucket}/{caminho}"
+
+
+def public_urls(bucket: str, caminhos: dict) -> dict:
+    """{variante: caminho} -> {variante: URL pública}"""
+    return {variante: public_url(bucket, caminho) for variante, caminho in caminhos.items()}
+
+
+async def remover_objetos(bucket: str, caminhos: List[str]):
+    """Remove objetos do bucket (melhor esforço: usado para desfazer uploads)"""
+    if not caminhos:
+        return
+    url = f"{SUPABASE_URL}/storage/v1/object/{bucket}"
+    try:
+        await supabase.request("DELETE", url, json={"prefixes": caminhos}, headers=HEADERS)
+    except Exception:
+        pass
+
+
+async def upload_objetos(bucket: str, objetos: List[tuple]):
+    """
+    Envia (caminho, conteudo, content_type) para o Supabase Storage em
+    paralelo, no máximo STORAGE_UPLOAD_CONCURRENCY ao mesmo tempo. Se algum
+    falhar, os que já subiram são removidos e o erro é propagado — nada
+    fica órfão no bucket.
+    """
+    semaforo = asyncio.Semaphore(STORAGE_UPLOAD_CONCURRENCY)
+    enviados = []
+
+    async def enviar(caminho: str, conteudo: bytes, content_type: str):
+        async with semaforo:
+            storage_url = f"{SUPABASE_URL}/storage/v1/object/{bucket}/{caminho}"
+            response = await supabase.post(
+                storage_url,
+                headers=storage_headers(content_type),
+                content=conteudo,
+            )
+
+        if response.status_code not in (200, 201):
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Erro ao fazer upload da imagem: {response.text}",
+            )
+        enviados.append(caminho)
+        metricas.UPLOAD_BYTES.inc("supabase_storage", valor=len(conteudo))
+
+    resultados = await asyncio.gather(*(enviar(*objeto) for objeto in objetos), return_exceptions=True)
+
+    erros = [r for r in resultados if isinstance(r, BaseException)]
+    if erros:
+        await remover_objetos(bucket, enviados)
+        raise erros[0]
+
+
+async def upload_imagens(bucket: str, pasta: str, prefixo: str, arquivos: List[UploadFile]) -> List[dict]:
+    """
+    Gera as variantes (thumb, medium, original) de cada imagem no pool de
+    processos e envia todas para o bucket. Retorna, na ordem recebida,
+    um dict {variante: caminho} por arquivo. Cada arquivo é lido com o
+    mesmo limite de tamanho e checagem de tipo do upload para o S3.
+    """
+    conteudos = [await ler_validando(arquivo) for arquivo in arquivos]
+    processadas = await asyncio.gather(*(processar_imagem(conteudo) for conteudo in conteudos))
+
+    objetos = []
+    caminhos = []
+    for variantes in processadas:
+        base = f"{pasta}/{prefixo}_{uuid.uuid4().hex}"
+        caminhos_imagem = {}
+        for nome, (dados, extensao, content_type) in variantes.items():
+            caminho = f"{base}.{extensao}" if nome == "original" else f"{base}_{nome}.{extensao}"
+            caminhos_imagem[nome] = caminho
+            objetos.append((caminho, dados, content_type))
+        caminhos.append(caminhos_imagem)
+
+    await upload_objetos(bucket, objetos)
+    return caminhos
+
+
+def todos_os_caminhos(caminhos: List[dict]) -> List[str]:
+    """Achata [{variante: caminho}] para desfazer o upload de todas as variantes"""
+    return [caminho for variantes in caminhos for caminho in variantes.values()]
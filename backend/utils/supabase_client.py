@@ -0,0 +1,283 @@
+import asyncio
+import time
+import httpx
+from utils import metricas, prazos, resiliencia, tracing
+from utils.single_flight import SingleFlight, chave_get
+from utils.config import (
+    SUPABASE_KEY,
+    SUPABASE_HTTP2,
+    SUPABASE_MAX_CONNECTIONS,
+    SUPABASE_MAX_KEEPALIVE,
+    SUPABASE_KEEPALIVE_EXPIRY,
+    SUPABASE_CONNECT_TIMEOUT,
+    SUPABASE_READ_TIMEOUT,
+    SUPABASE_WRITE_TIMEOUT,
+    SUPABASE_POOL_TIMEOUT,
+    SUPABASE_RETRIES,
+    SUPABASE_HEDGE,
+    SUPABASE_SINGLE_FLIGHT,
+)
+
+# Headers padrão para a API REST (PostgREST) do Supabase
+HEADERS = {
+    "apikey": SUPABASE_KEY,
+    "Authorization": f"Bearer {SUPABASE_KEY}",
+    "Content-Type": "application/json",
+    "Prefer": "return=representation"
+}
+
+# Escritas cujo retorno não é usado: o PostgREST não devolve a linha gravada
+HEADERS_MINIMAL = {**HEADERS, "Prefer": "return=minimal"}
+
+
+def storage_headers(content_type: str) -> dict:
+    """Headers para upload de objetos no Supabase Storage"""
+    return {
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "Content-Type": content_type,
+    }
+
+
+class SupabaseClient:
+    """
+    Cliente HTTP assíncrono compartilhado por todos os routers.
+
+    Mantém um único httpx.AsyncClient (keep-alive + HTTP/2) para que as
+    chamadas ao Supabase reaproveitem conexões em vez de abrir TCP+TLS a
+    cada requisição. A interface (get/post/patch/delete) segue a do
+    `requests`, então os handlers só trocam `requests.x(...)` por
+    `await supabase.x(...)`.
+    """
+
+    def __init__(self):
+        self._client = None
+        self.requests_total = 0
+        self.in_flight = 0
+        self.single_flight = SingleFlight()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=SUPABASE_HTTP2,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=SUPABASE_CONNECT_TIMEOUT,
+                read=SUPABASE_READ_TIMEOUT,
+                write=SUPABASE_WRITE_TIMEOUT,
+                pool=SUPABASE_POOL_TIMEOUT,
+            ),
+        )
+
+    async def start(self):
+        """Abre o pool de conexões (chamado no lifespan da aplicação)"""
+        if self._client is None:
+            self._client = self._build_client()
+
+    async def close(self):
+        """Fecha o pool de conexões (chamado no shutdown da aplicação)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Criação preguiçosa: o TestClient sem `with` não dispara o lifespan
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        GETs idênticos concorrentes (mesma URL, params e headers/credenciais)
+        compartilham uma única chamada ao Supabase (SUPABASE_SINGLE_FLIGHT).
+        Escritas desligam os GETs em andamento dos que chegarem depois.
+        """
+        if "params" in kwargs and "?" in url:
+            # O httpx substitui a query da URL pelos params, mesmo vazios ({}
+            # nas escritas com return=minimal): junta os dois para não perder
+            # os filtros (ex.: ?id_reserva=eq.1 + select)
+            url = str(httpx.URL(url).copy_merge_params(kwargs.pop("params")))
+
+        chave = chave_get(url, kwargs) if method == "GET" and SUPABASE_SINGLE_FLIGHT else None
+        if chave is not None:
+            alvo = metricas.alvo_supabase(url)
+            inicio = time.perf_counter()
+            response, compartilhada = await self.single_flight.executar(
+                chave, alvo, lambda: self._request(method, url, kwargs)
+            )
+            if compartilhada:
+                # O span da chamada em si fica no trace de quem a iniciou
+                tracing.registrar("supabase_compartilhada", f"{method} /{alvo[0]}/v1/{alvo[1]}", inicio)
+            return response
+
+        if method in ("GET", "HEAD"):
+            return await self._request(method, url, kwargs)
+
+        self.single_flight.desanexar()
+        try:
+            return await self._request(method, url, kwargs)
+        finally:
+            self.single_flight.desanexar()
+
+    async def _request(self, method: str, url: str, kwargs: dict) -> httpx.Response:
+        """
+        Chamada ao Supabase protegida pelo circuit breaker da tabela/bucket.
+        GET/HEAD (idempotentes) ganham retentativas com backoff e, com
+        SUPABASE_HEDGE, uma segunda requisição se a primeira passar do p95.
+        """
+        self.requests_total += 1
+        self.in_flight += 1
+        alvo = metricas.alvo_supabase(url)
+        disjuntor = resiliencia.disjuntor(alvo)
+        try:
+            disjuntor.verificar()
+            if method not in ("GET", "HEAD"):
+                return await self._enviar(method, url, alvo, kwargs)
+
+            tentativa = 0
+            while True:
+                erro = None
+                try:
+                    response = await self._com_hedge(method, url, alvo, kwargs)
+                    if response.status_code not in resiliencia.STATUS_RETENTAVEIS:
+                        return response
+                except httpx.TransportError as e:
+                    erro = e
+
+                # Repete só se ainda há tentativas e orçamento (prazo da requisição) para esperar
+                espera = resiliencia.backoff(tentativa)
+                if tentativa == SUPABASE_RETRIES or prazos.restante(espera) < espera:
+                    if erro is not None:
+                        raise erro
+                    return response
+
+                tentativa += 1
+                resiliencia.RETENTATIVAS.inc(*alvo)
+                await asyncio.sleep(espera)
+                disjuntor.verificar()
+        finally:
+            self.in_flight -= 1
+
+    async def _com_hedge(self, method: str, url: str, alvo: tuple, kwargs: dict) -> httpx.Response:
+        """
+        Sem resposta até o p95 recente da tabela, dispara uma segunda
+        requisição igual e fica com a primeira que responder
+        """
+        atraso = resiliencia.latencias(alvo).p95() if SUPABASE_HEDGE else None
+        if atraso is None:
+            return await self._enviar(method, url, alvo, kwargs)
+
+        primeira = asyncio.ensure_future(self._enviar(method, url, alvo, kwargs))
+        tarefas = {primeira}
+        try:
+            feitas, tarefas = await asyncio.wait(tarefas, timeout=atraso)
+            if feitas:
+                return primeira.result()
+
+            resiliencia.HEDGES.inc(*alvo)
+            tarefas.add(asyncio.ensure_future(self._enviar(method, url, alvo, kwargs)))
+            erro = None
+            while tarefas:
+                feitas, tarefas = await asyncio.wait(tarefas, return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in feitas:
+                    if tarefa.exception() is None:
+                        return tarefa.result()
+                    erro = tarefa.exception()
+            raise erro
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+    async def _enviar(self, method: str, url: str, alvo: tuple, kwargs: dict) -> httpx.Response:
+        """Uma tentativa: métricas, span do trace e resultado no circuit breaker"""
+        api, tabela = alvo
+        disjuntor = resiliencia.disjuntor(alvo)
+        status = "erro"
+        tamanho = 0
+        inicio = time.perf_counter()
+        if "timeout" not in kwargs and prazos.restante() is not None:
+            # O que sobra do orçamento da requisição limita cada fase
+            kwargs = {**kwargs, "timeout": httpx.Timeout(
+                connect=prazos.restante(SUPABASE_CONNECT_TIMEOUT),
+                read=prazos.restante(SUPABASE_READ_TIMEOUT),
+                write=prazos.restante(SUPABASE_WRITE_TIMEOUT),
+                pool=prazos.restante(SUPABASE_POOL_TIMEOUT),
+            )}
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+            tamanho = len(response.content)
+        except Exception:
+            disjuntor.falha()
+            raise
+        except asyncio.CancelledError:
+            # Hedge perdedor ou requisição abandonada: não é falha do upstream
+            status = "cancelada"
+            disjuntor.liberar()
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            metricas.SUPABASE_DURACAO.observar(duracao, api, tabela, method)
+            metricas.SUPABASE_REQUISICOES.inc(api, tabela, method, status)
+            tracing.registrar(
+                f"supabase_{api}", f"{method} /{api}/v1/{tabela}", inicio, status=status, bytes=tamanho
+            )
+
+        if response.status_code >= 500:
+            disjuntor.falha()
+        else:
+            disjuntor.sucesso()
+            resiliencia.latencias(alvo).observar(duracao)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    def pool_stats(self) -> dict:
+        """Estatísticas do pool de conexões para monitoramento"""
+        stats = {
+            "http2": SUPABASE_HTTP2,
+            "max_connections": SUPABASE_MAX_CONNECTIONS,
+            "max_keepalive_connections": SUPABASE_MAX_KEEPALIVE,
+            "requests_total": self.requests_total,
+            "in_flight": self.in_flight,
+            "connections": 0,
+            "idle": 0,
+            "active": 0,
+        }
+        if self._client is None:
+            return stats
+
+        # httpx não expõe o pool publicamente; lê o httpcore.AsyncConnectionPool
+        pool = getattr(self._client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        stats["connections"] = len(connections)
+        stats["idle"] = idle
+        stats["active"] = len(connections) - idle
+        return stats
+
+
+supabase = SupabaseClient()
+
+metricas.GaugeFuncao(
+    "supabase_requests_in_flight", "Chamadas ao Supabase em andamento", lambda: supabase.in_flight
+)
+metricas.GaugeFuncao(
+    "supabase_pool_connections", "Conexões do pool com o Supabase por estado",
+    lambda: {(estado,): supabase.pool_stats()[estado] for estado in ("idle", "active")},
+    ("state",),
+)
@@ -0,0 +1,145 @@
+"""
+Trace por requisição das chamadas externas (Supabase REST/Storage, S3,
+bcrypt, geração de imagens).
+
+Cada ponto de chamada registra um span com `registrar(...)`; numa
+requisição amostrada os spans vão para o header Server-Timing (somados por
+tipo) e para uma linha JSON no logger "lardocepet.tracing". Toda requisição
+com prazo (utils/prazos.py) também guarda os spans em `Etapas`, amostrada ou
+não, para o corpo do 504. Fora disso `registrar` não faz nada além de ler
+os ContextVars.
+"""
+import contextvars
+import logging
+import random
+import time
+import uuid
+import orjson
+from starlette.datastructures import MutableHeaders
+from utils.config import TRACE_SAMPLE_RATE
+
+logger = logging.getLogger("lardocepet.tracing")
+if not logger.handlers:
+    # Uma linha JSON por requisição, independente da configuração de log do uvicorn
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Trace da requisição atual; as tasks criadas por asyncio.gather herdam o mesmo objeto
+_trace_atual = contextvars.ContextVar("trace_atual", default=None)
+# Etapas da requisição com prazo (amostrada ou não); numa amostrada é o próprio Trace
+_etapas_atuais = contextvars.ContextVar("etapas_atuais", default=None)
+
+
+class Etapas:
+    """Spans de uma requisição, com início relativo ao começo dela"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.spans = []
+
+    def adicionar(self, tipo: str, nome: str, inicio: float, fim: float, atributos: dict):
+        self.spans.append({
+            "tipo": tipo,
+            "nome": nome,
+            "inicio_ms": round((inicio - self.inicio) * 1000, 2),
+            "duracao_ms": round((fim - inicio) * 1000, 2),
+            **atributos,
+        })
+
+
+class Trace(Etapas):
+    def __init__(self):
+        super().__init__()
+        self.id = uuid.uuid4().hex[:16]
+
+    def server_timing(self) -> str:
+        """
+        Um item por tipo (soma das durações e quantidade de chamadas) mais o
+        total da requisição. Chamadas em paralelo podem somar mais que o total.
+        """
+        tipos = {}
+        for span in self.spans:
+            quantidade, duracao = tipos.get(span["tipo"], (0, 0.0))
+            tipos[span["tipo"]] = (quantidade + 1, duracao + span["duracao_ms"])
+
+        itens = [
+            f'{tipo};desc="{quantidade}x";dur={duracao:.1f}'
+            for tipo, (quantidade, duracao) in tipos.items()
+        ]
+        itens.append(f"total;dur={(time.perf_counter() - self.inicio) * 1000:.1f}")
+        return ", ".join(itens)
+
+
+def trace_atual():
+    return _trace_atual.get()
+
+
+def acompanhar(etapas: Etapas):
+    """Passa a guardar os spans da requisição em `etapas`; devolve o token para `parar`"""
+    return _etapas_atuais.set(etapas)
+
+
+def parar(token):
+    _etapas_atuais.reset(token)
+
+
+def registrar(tipo: str, nome: str, inicio: float, **atributos):
+    """
+    Span de uma chamada que começou em `inicio` (time.perf_counter()) e
+    terminou agora. Ex.: registrar("s3", "put_object", inicio, bytes=123)
+    """
+    trace = _trace_atual.get()
+    etapas = _etapas_atuais.get()
+    if trace is None and etapas is None:
+        return
+    fim = time.perf_counter()
+    if trace is not None:
+        trace.adicionar(tipo, nome, inicio, fim, atributos)
+    if etapas is not None and etapas is not trace:
+        etapas.adicionar(tipo, nome, inicio, fim, atributos)
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre um Trace para uma fração (`taxa`) das
+    requisições e devolve Server-Timing e X-Trace-Id na resposta
+    """
+
+    def __init__(self, app, taxa: float = TRACE_SAMPLE_RATE):
+        self.app = app
+        self.taxa = taxa
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.taxa:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _trace_atual.set(trace)
+        status = 500
+
+        async def enviar(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+                headers["X-Trace-Id"] = trace.id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _trace_atual.reset(token)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(orjson.dumps({
+                    "trace_id": trace.id,
+                    "method": scope["method"],
+                    "route": getattr(scope.get("route"), "path", scope["path"]),
+                    "status": status,
+                    "duracao_ms": round((time.perf_counter() - trace.inicio) * 1000, 2),
+                    "spans": trace.spans,
+                }).decode())